@@ -1,20 +1,36 @@
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from database.connection import get_db
 from models.user import User
+from schemas.user import TokenData
 from config.settings import settings
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from utils.ttl_cache import TTLCache
+from auth.password_pool import password_pool, PasswordPoolSaturated
+from auth.password_hashing import pwd_context
+from auth.revocation import revocation_list
+from auth.keys import asymmetric_signing, get_key_ring
 
 # Security scheme
 security = HTTPBearer()
 
+# Column values of recently seen users, keyed by id, so authenticated requests
+# don't query the users table every time. Per process: writes here invalidate
+# immediately, changes made by other processes show up within the TTL.
+_user_cache = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+# Payloads of tokens that already passed signature and expiry checks, keyed by
+# the token's sha256 and kept until the token's own exp. Clients send the same
+# token on every request, so most requests skip jwt.decode entirely.
+_token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE, 0)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +39,32 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def _run_in_password_pool(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress. Please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the password pool; 503 when the pool is saturated."""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password in the password pool; 503 when the pool is saturated."""
+    return await _run_in_password_pool(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the password pool; 503 when the pool is saturated."""
+    return await _run_in_password_pool(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -31,52 +73,151 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    if asymmetric_signing():
+        kid, private_key = get_key_ring().signing_key()
+        return jwt.encode(to_encode, private_key, algorithm=settings.ALGORITHM, headers={"kid": kid})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token."""
+def _decode_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        key = settings.SECRET_KEY
+        if asymmetric_signing():
+            key = get_key_ring().verification_key(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+        payload = jwt.decode(token, key, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Authenticate a user with username and password."""
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def verify_token(token: str) -> Optional[dict]:
+    """Verify and decode a JWT token."""
+    key = _token_key(token)
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = _decode_token(token)
+        if payload is None:
+            return None
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            _token_cache.set(key, payload, ttl=exp - time.time())
+    return dict(payload)
+
+def forget_verified_token(token: str):
+    """Drop a revoked token from the verified-token cache."""
+    _token_cache.pop(_token_key(token))
+
+def token_cache_stats() -> dict:
+    return _token_cache.stats()
+
+async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    """Authenticate a user with username and password.
+
+    A hash made with an older scheme or a lower cost than configured is
+    replaced on the way, so hashing parameters can be raised without
+    forcing password resets.
+    """
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    # Give the connection back while bcrypt runs; logins waiting on the password
+    # pool would otherwise hold every connection. The user stays loaded, detached.
+    db.close()
+    verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+    if not verified:
         return None
+    if new_hash:
+        db.query(User).filter(User.id == user.id).update({"password_hash": new_hash})
+        db.commit()
+        user.password_hash = new_hash
+    # The token issued next is usually used straight away
+    _user_cache.set(user.id, _user_record(user))
     return user
 
+def _user_record(user: User) -> dict:
+    return {column: getattr(user, column) for column in _USER_COLUMNS}
+
+def invalidate_user(user_id: int):
+    """Forget the cached record of a user whose role, username or password changed, or who was deleted."""
+    _user_cache.pop(user_id)
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
+def _load_user_record(db: Session, user_id: Optional[int], username: str) -> Optional[dict]:
+    record = _user_cache.get(user_id) if user_id is not None else None
+    if record is None:
+        query = db.query(User)
+        # Tokens issued before the user_id claim existed only carry the username
+        if user_id is not None:
+            user = query.filter(User.id == user_id).first()
+        else:
+            user = query.filter(User.username == username).first()
+        if user is None:
+            return None
+        record = _user_record(user)
+        _user_cache.set(user.id, record)
+    return record
+
+def _authenticate_token(token: str, db: Session) -> Optional[tuple]:
+    """Return ``(identity, record)`` for a valid token, or None."""
+    payload = verify_token(token)
+    if payload is None:
+        return None
+    username = payload.get("sub")
+    if username is None or revocation_list.is_revoked(payload.get("jti")):
+        return None
+    record = _load_user_record(db, payload.get("user_id"), username)
+    # The claims are signed but only as fresh as the token: once a user is
+    # renamed, given another role or deleted, their older tokens stop working.
+    if record is None or record["username"] != username:
+        return None
+    role = payload.get("role")
+    if role is not None and role != record["role"]:
+        return None
+    return TokenData(username=username, id=record["id"], role=record["role"]), record
+
+def get_current_identity(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> TokenData:
+    """Get the id, username and role of the caller without loading the user row.
+
+    For endpoints that only need to know who is calling; answered from the
+    token and the user cache, so there is no query unless the cache misses.
+    """
+    authenticated = _authenticate_token(credentials.credentials, db)
+    if authenticated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return authenticated[0]
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token = credentials.credentials
-    payload = verify_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    username: str = payload.get("sub")
-    if username is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
+    authenticated = _authenticate_token(credentials.credentials, db)
+    if authenticated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Attach a copy of the cached row to this request's session without a SELECT;
+    # relationships still lazy-load and changes commit as usual.
+    user = User(**authenticated[1])
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user."""
@@ -84,7 +225,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
 
 def require_role(required_role: str):
     """Dependency to require a specific role."""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: TokenData = Depends(get_current_identity)) -> TokenData:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -93,8 +234,8 @@ def require_role(required_role: str):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    """Require admin role."""
+def require_admin(current_user: TokenData = Depends(get_current_identity)) -> TokenData:
+    """Require admin role, checked from the token's claims."""
     if current_user.role.lower() != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -102,8 +243,8 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_student(current_user: User = Depends(get_current_user)) -> User:
-    """Require student role."""
+def require_student(current_user: TokenData = Depends(get_current_identity)) -> TokenData:
+    """Require student role, checked from the token's claims."""
     if current_user.role.lower() != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from jose import jwk
+
+from config.settings import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+# How often the key directory is re-read, so a key added by rotation becomes the signing key.
+KEY_RELOAD_SECONDS = 60
+# A new key only signs once it has been in the directory this long: every process has
+# re-read it and every JWKS cache (max-age KEY_RELOAD_SECONDS) has expired by then.
+KEY_PUBLISH_SECONDS = 2 * KEY_RELOAD_SECONDS
+# A token with an unknown kid re-reads the directory at once, but at most this often.
+KEY_MISS_RELOAD_SECONDS = 1.0
+
+
+def asymmetric_signing() -> bool:
+    return settings.ALGORITHM in ASYMMETRIC_ALGORITHMS
+
+
+class KeyRing:
+    """JWT signing keys by ``kid``, read from ``<directory>/<kid>.pem`` private keys.
+
+    The key with the highest kid signs new tokens, unless JWT_ACTIVE_KID
+    names another one. generate_jwt_key.py names keys by creation time. A
+    key that appeared less than KEY_PUBLISH_SECONDS ago only verifies, so
+    every server and JWKS client knows it before the first token signed
+    with it arrives. All keys in the directory verify, so rotation works in
+    three steps: add a key, wait for tokens signed by the old one to expire
+    (ACCESS_TOKEN_EXPIRE_MINUTES), then delete the old file.
+    """
+
+    def __init__(self, directory: str, algorithm: str, active_kid: Optional[str] = None):
+        self.directory = directory
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._lock = threading.Lock()
+        self._private: Dict[str, str] = {}
+        self._public: Dict[str, object] = {}  # kid -> jose key, parsed once
+        self._signing_kid: Optional[str] = None
+        self._loaded_at = 0.0
+        self._missed_at = 0.0
+
+    def load(self):
+        """Read the key directory.
+
+        A file that can't be parsed (say, one still being written) keeps
+        the version loaded before, if any, and is retried on the next load.
+        """
+        private, public, published = {}, {}, []
+        names = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+        for name in names:
+            if not name.endswith(".pem"):
+                continue
+            kid = name[:-len(".pem")]
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as f:
+                    pem = f.read()
+                if self._private.get(kid) == pem:
+                    public[kid] = self._public[kid]
+                else:
+                    public[kid] = jwk.construct(pem, self.algorithm).public_key()
+                private[kid] = pem
+                if time.time() - os.stat(path).st_mtime >= KEY_PUBLISH_SECONDS:
+                    published.append(kid)
+            except Exception as e:
+                print(f"!!! JWT KEY {path} NOT LOADED: {e!r} !!!")
+                public.pop(kid, None)
+                if kid in self._private:
+                    private[kid], public[kid] = self._private[kid], self._public[kid]
+        if not private:
+            raise RuntimeError(f"No JWT signing keys in {self.directory}; run generate_jwt_key.py")
+        # On a fresh install no key is old enough yet; every process starts with the same one then
+        signing_kid = self.active_kid or max(published or private)
+        if signing_kid not in private:
+            raise RuntimeError(f"JWT_ACTIVE_KID {signing_kid} not found in {self.directory}")
+        with self._lock:
+            self._private, self._public, self._signing_kid = private, public, signing_kid
+            self._loaded_at = time.monotonic()
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            # Keep verifying and signing with the keys already loaded
+            print(f"!!! JWT KEY RELOAD FAILED: {e!r} !!!")
+            self._loaded_at = time.monotonic()
+
+    def _reload_if_stale(self):
+        if time.monotonic() - self._loaded_at > KEY_RELOAD_SECONDS:
+            self._reload()
+
+    def signing_key(self) -> Tuple[str, str]:
+        """``(kid, private key PEM)`` for new tokens."""
+        self._reload_if_stale()
+        return self._signing_kid, self._private[self._signing_kid]
+
+    def verification_key(self, kid: Optional[str]):
+        key = self._public.get(kid)
+        if key is None and kid is not None:
+            # Possibly a key added since the last reload; re-read now, but don't let
+            # a stream of made-up kids turn every request into a directory scan
+            now = time.monotonic()
+            if now - self._missed_at >= KEY_MISS_RELOAD_SECONDS:
+                self._missed_at = now
+                self._reload()
+                key = self._public.get(kid)
+        return key
+
+    def jwks(self) -> dict:
+        self._reload_if_stale()
+        return {"keys": [dict(key.to_dict(), kid=kid, use="sig") for kid, key in sorted(self._public.items())]}
+
+
+_key_ring: Optional[KeyRing] = None
+_key_ring_lock = threading.Lock()
+
+def get_key_ring() -> KeyRing:
+    global _key_ring
+    if _key_ring is None:
+        with _key_ring_lock:
+            if _key_ring is None:
+                ring = KeyRing(settings.JWT_KEYS_DIR, settings.ALGORITHM, settings.JWT_ACTIVE_KID)
+                ring.load()
+                _key_ring = ring
+    return _key_ring
+
+def public_jwks() -> dict:
+    """JWKS document of the verification keys; empty while tokens are signed with SECRET_KEY."""
+    if not asymmetric_signing():
+        return {"keys": []}
+    return get_key_ring().jwks()
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+
+from config.settings import settings
+from database.connection import SessionLocal
+from models.login_attempt import LoginAttempt
+
+# Stores drop keys and rows that fell out of the window at most this often.
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class MemoryAttemptStore:
+    """Sliding-window attempt log per key, in this process only."""
+    blocking = False
+
+    def __init__(self):
+        self._attempts: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    def hit(self, limits: Dict[str, int], window: float) -> Optional[Tuple[str, float]]:
+        """Record an attempt for every key, unless one is at its limit.
+
+        Returns None when the attempt is allowed, otherwise the blocking key
+        and the seconds until it frees up. Check and record happen under one
+        lock, so concurrent attempts can't all slip in under the limit.
+        """
+        now = time.monotonic()
+        cutoff = now - window
+        with self._lock:
+            if now - self._swept_at > SWEEP_INTERVAL_SECONDS:
+                self._sweep(cutoff)
+            blocked = None
+            for key, limit in limits.items():
+                attempts = self._attempts.get(key)
+                while attempts and attempts[0] <= cutoff:
+                    attempts.popleft()
+                if attempts and len(attempts) >= limit:
+                    wait = attempts[len(attempts) - limit] + window - now
+                    if blocked is None or wait > blocked[1]:
+                        blocked = (key, wait)
+            if blocked is not None:
+                return blocked
+            for key in limits:
+                self._attempts.setdefault(key, deque()).append(now)
+            return None
+
+    def refund(self, key: str):
+        """Take back the latest attempt recorded for ``key``."""
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts:
+                attempts.pop()
+
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _sweep(self, cutoff: float):
+        for key in [key for key, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+        self._swept_at = time.monotonic()
+
+
+class DatabaseAttemptStore:
+    """Sliding-window attempt log in ``login_attempts``, shared by every process.
+
+    Check and insert run in one short transaction; processes racing on the
+    same key may let a few extra attempts through, which is fine for
+    throttling. Every call is a blocking query, so async callers go through
+    a thread (see LoginThrottle).
+    """
+    blocking = True
+
+    def __init__(self):
+        self._swept_at = time.monotonic()
+
+    def hit(self, limits: Dict[str, int], window: float) -> Optional[Tuple[str, float]]:
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=window)
+        db = SessionLocal()
+        try:
+            if time.monotonic() - self._swept_at > SWEEP_INTERVAL_SECONDS:
+                db.query(LoginAttempt).filter(LoginAttempt.attempted_at <= cutoff).delete(synchronize_session=False)
+                self._swept_at = time.monotonic()
+            counts = db.query(
+                LoginAttempt.key, func.count(LoginAttempt.id), func.min(LoginAttempt.attempted_at)
+            ).filter(
+                LoginAttempt.key.in_(list(limits)),
+                LoginAttempt.attempted_at > cutoff
+            ).group_by(LoginAttempt.key).all()
+            blocked = None
+            for key, count, oldest in counts:
+                if count >= limits[key]:
+                    if oldest.tzinfo is None:  # SQLite returns naive UTC
+                        oldest = oldest.replace(tzinfo=timezone.utc)
+                    # Approximate: waits for the oldest attempt even if several are over the limit
+                    wait = (oldest - cutoff).total_seconds()
+                    if blocked is None or wait > blocked[1]:
+                        blocked = (key, wait)
+            if blocked is None:
+                db.add_all([LoginAttempt(key=key, attempted_at=now) for key in limits])
+            db.commit()
+            return blocked
+        finally:
+            db.close()
+
+    def refund(self, key: str):
+        db = SessionLocal()
+        try:
+            latest = db.query(func.max(LoginAttempt.id)).filter(LoginAttempt.key == key).scalar()
+            if latest is not None:
+                db.query(LoginAttempt).filter(LoginAttempt.id == latest).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    def reset(self, key: str):
+        db = SessionLocal()
+        try:
+            db.query(LoginAttempt).filter(LoginAttempt.key == key).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class LoginThrottle:
+    """Limits failed logins per client IP, and per username from one IP, over a sliding window.
+
+    Checked before the user is even looked up, so a credential-stuffing
+    burst is answered with 429 instead of a bcrypt verify per attempt. Each
+    attempt takes a slot up front, so concurrent guesses can't all slip in
+    under the limit, and a successful login gives its slots back. Only
+    failures count, then: a classroom logging in from one NAT address is
+    never locked out, and nobody can lock an account from another address.
+    """
+
+    def __init__(self, store, window_seconds: float, max_per_username: int, max_per_ip: int):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.max_per_username = max_per_username
+        self.max_per_ip = max_per_ip
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.blocked = 0
+        self.blocked_by_username = 0
+        self.blocked_by_ip = 0
+
+    @staticmethod
+    def username_key(username: str, client_ip: Optional[str]) -> str:
+        return f"user:{username.strip().lower()}@{client_ip or ''}"
+
+    @staticmethod
+    def ip_key(client_ip: str) -> str:
+        return f"ip:{client_ip}"
+
+    def check(self, username: str, client_ip: Optional[str]) -> Optional[float]:
+        """Count an attempt; returns None if allowed, else the seconds to wait."""
+        limits = {self.username_key(username, client_ip): self.max_per_username}
+        if client_ip:
+            limits[self.ip_key(client_ip)] = self.max_per_ip
+        blocked = self.store.hit(limits, self.window_seconds)
+        with self._lock:
+            if blocked is None:
+                self.allowed += 1
+                return None
+            self.blocked += 1
+            if blocked[0].startswith("ip:"):
+                self.blocked_by_ip += 1
+            else:
+                self.blocked_by_username += 1
+        return blocked[1]
+
+    def succeeded(self, username: str, client_ip: Optional[str]):
+        """Give back the slots a successful login took, and clear the username's failures from that IP."""
+        self.store.reset(self.username_key(username, client_ip))
+        if client_ip:
+            self.store.refund(self.ip_key(client_ip))
+
+    async def check_async(self, username: str, client_ip: Optional[str]) -> Optional[float]:
+        if self.store.blocking:
+            return await run_in_threadpool(self.check, username, client_ip)
+        return self.check(username, client_ip)
+
+    async def succeeded_async(self, username: str, client_ip: Optional[str]):
+        if self.store.blocking:
+            await run_in_threadpool(self.succeeded, username, client_ip)
+        else:
+            self.succeeded(username, client_ip)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "store": type(self.store).__name__,
+                "window_seconds": self.window_seconds,
+                "max_per_username": self.max_per_username,
+                "max_per_ip": self.max_per_ip,
+                "allowed": self.allowed,
+                "blocked": self.blocked,
+                "blocked_by_username": self.blocked_by_username,
+                "blocked_by_ip": self.blocked_by_ip
+            }
+
+
+def client_ip(request: Request) -> Optional[str]:
+    if settings.TRUST_X_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+login_throttle = LoginThrottle(
+    DatabaseAttemptStore() if settings.LOGIN_THROTTLE_STORE == "database" else MemoryAttemptStore(),
+    settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME,
+    settings.LOGIN_MAX_ATTEMPTS_PER_IP
+)
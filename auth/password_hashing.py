@@ -0,0 +1,120 @@
+import math
+import time
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from config.settings import settings
+
+# Calibration won't go past these however fast the machine is; each bcrypt round doubles the cost.
+MAX_BCRYPT_ROUNDS = 16
+MAX_ARGON2_TIME_COST = 20
+
+# Updated in place by configure_password_hashing(), so modules holding a reference see the new settings.
+pwd_context = CryptContext(schemes=["bcrypt"])
+
+_calibration: Optional[dict] = None
+
+
+def argon2_available() -> bool:
+    """argon2 needs the optional argon2-cffi package."""
+    try:
+        from passlib.hash import argon2
+    except ImportError:
+        return False
+    return argon2.has_backend()
+
+
+def _scheme() -> str:
+    scheme = settings.PASSWORD_HASH_SCHEME.lower()
+    if scheme == "argon2" and not argon2_available():
+        print("PASSWORD_HASH_SCHEME is argon2 but argon2-cffi is not installed; using bcrypt")
+        return "bcrypt"
+    return scheme if scheme in ("bcrypt", "argon2") else "bcrypt"
+
+
+def _context_options(scheme: str, bcrypt_rounds: int, argon2_time_cost: int) -> dict:
+    # The preferred scheme comes first and hashes new passwords. Hashes in the other
+    # scheme, or with a lower cost than configured, still verify but count as outdated,
+    # so verify_and_update() hands back a replacement at the user's next login.
+    # Stronger hashes are never downgraded.
+    schemes = [scheme] + [other for other in ("bcrypt", "argon2")
+                          if other != scheme and (other == "bcrypt" or argon2_available())]
+    options = {
+        "schemes": schemes,
+        "deprecated": schemes[1:],
+        "bcrypt__default_rounds": bcrypt_rounds,
+        "bcrypt__min_rounds": bcrypt_rounds
+    }
+    if "argon2" in schemes:
+        options.update({
+            "argon2__type": "ID",
+            "argon2__default_rounds": argon2_time_cost,
+            "argon2__min_rounds": argon2_time_cost,
+            "argon2__memory_cost": settings.PASSWORD_ARGON2_MEMORY_KIB,
+            "argon2__parallelism": settings.PASSWORD_ARGON2_PARALLELISM
+        })
+    return options
+
+
+def _time_hash(context: CryptContext, samples: int = 3) -> float:
+    """Fastest of a few hashes, in seconds; the fastest is the least disturbed by other load."""
+    best = math.inf
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibration password")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _calibrate(scheme: str, bcrypt_rounds: int, argon2_time_cost: int) -> tuple:
+    """Pick the cost that makes one hash take about PASSWORD_HASH_TARGET_MS on this machine.
+
+    bcrypt's cost is exponential (rounds = log2 iterations); argon2's time
+    cost is linear at fixed memory. Neither goes below the configured
+    minimums, so a slow or busy host can't weaken new hashes.
+    """
+    target = settings.PASSWORD_HASH_TARGET_MS / 1000
+    measured = _time_hash(CryptContext(**_context_options(scheme, bcrypt_rounds, argon2_time_cost)))
+    if scheme == "bcrypt":
+        rounds = bcrypt_rounds + round(math.log2(target / measured))
+        bcrypt_rounds = min(MAX_BCRYPT_ROUNDS, max(settings.PASSWORD_HASH_MIN_BCRYPT_ROUNDS, rounds))
+    else:
+        time_cost = round(argon2_time_cost * target / measured)
+        argon2_time_cost = min(MAX_ARGON2_TIME_COST, max(settings.PASSWORD_HASH_MIN_ARGON2_TIME_COST, time_cost))
+    return bcrypt_rounds, argon2_time_cost, measured
+
+
+def configure_password_hashing(calibrate: Optional[bool] = None) -> dict:
+    """Apply the hashing settings to pwd_context, calibrating the cost first if enabled.
+
+    Runs once at startup; calibration hashes a few times, so it takes a
+    second or two.
+    """
+    global _calibration
+    if calibrate is None:
+        calibrate = settings.PASSWORD_HASH_CALIBRATE
+    scheme = _scheme()
+    bcrypt_rounds = settings.PASSWORD_BCRYPT_ROUNDS
+    argon2_time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    measured = None
+    if calibrate:
+        bcrypt_rounds, argon2_time_cost, measured = _calibrate(scheme, bcrypt_rounds, argon2_time_cost)
+    pwd_context.update(**_context_options(scheme, bcrypt_rounds, argon2_time_cost))
+    _calibration = {
+        "scheme": scheme,
+        "bcrypt_rounds": bcrypt_rounds,
+        "argon2_time_cost": argon2_time_cost if scheme == "argon2" else None,
+        "calibrated": bool(calibrate),
+        "measured_ms_at_configured_cost": round(measured * 1000, 1) if measured is not None else None,
+        "target_ms": settings.PASSWORD_HASH_TARGET_MS if calibrate else None
+    }
+    return _calibration
+
+
+def password_hashing_info() -> Optional[dict]:
+    return _calibration
+
+
+# Configured (not calibrated) on import, so scripts that never start the app hash with the settings too.
+configure_password_hashing(calibrate=False)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from config.settings import settings
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised instead of queueing when the password pool already has too much waiting."""
+
+
+class PasswordHashPool:
+    """Runs password hashing and verification off the event loop.
+
+    A bcrypt call costs hundreds of milliseconds of CPU. Run inline in an
+    ``async def`` route, it stalls every other request on the worker. The
+    bcrypt extension releases the GIL while it hashes, so a small thread
+    pool gives real parallelism up to the number of cores. Work beyond
+    ``workers + queue_size`` calls is refused with PasswordPoolSaturated:
+    a login that would wait seconds in a queue is better retried.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+    def stop(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        self.start()  # lazily, for scripts and tests that never run the app's lifespan
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise PasswordPoolSaturated()
+            self._pending += 1
+            executor = self._executor
+        future = executor.submit(fn, *args)
+        # Counted until the thread is done, even if the awaiting request is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
+def start_password_pool():
+    password_pool.start()
+
+
+def stop_password_pool():
+    password_pool.stop()
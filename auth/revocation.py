@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database.connection import SessionLocal
+from models.auth_token import RevokedToken
+
+# Rows revoked this long before the last sync are fetched again, in case another
+# server's clock runs behind ours or its transaction committed late.
+SYNC_OVERLAP = timedelta(seconds=60)
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite hands back naive datetimes; every timestamp here is stored in UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenRevocationList:
+    """The jtis of revoked, not yet expired access tokens, mirrored from ``revoked_tokens``.
+
+    Checking a token is a single set lookup, with no query. Only tokens that
+    were revoked before their exp are kept, so the set stays small. A
+    revocation made in this process applies at once; one made by another
+    process applies after the next sync.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}  # jti -> exp (epoch seconds)
+        self._lock = threading.Lock()
+        self._synced_until: Optional[datetime] = None
+        self._pruned_at = 0.0
+        self.syncs = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def add(self, jti: str, expires_at: float):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime, user_id: Optional[int] = None):
+        """Record the revocation; the caller commits."""
+        if db.get(RevokedToken, jti) is None:
+            db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at,
+                                revoked_at=datetime.now(timezone.utc)))
+        self.add(jti, _epoch(expires_at))
+
+    def sync(self):
+        """Pull revocations made since the last sync and forget expired ones."""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            query = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(RevokedToken.expires_at > now)
+            if self._synced_until is not None:
+                query = query.filter(RevokedToken.revoked_at >= self._synced_until - SYNC_OVERLAP)
+            rows = query.all()
+            if time.monotonic() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+                db.commit()
+                self._pruned_at = time.monotonic()
+        finally:
+            db.close()
+        cutoff = now.timestamp()
+        with self._lock:
+            for jti, expires_at in rows:
+                self._revoked[jti] = _epoch(expires_at)
+            for jti in [jti for jti, exp in self._revoked.items() if exp <= cutoff]:
+                del self._revoked[jti]
+        self._synced_until = now
+        self.syncs += 1
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "syncs": self.syncs,
+            "synced_until": self._synced_until.isoformat() if self._synced_until else None
+        }
+
+
+revocation_list = TokenRevocationList()
+
+
+# --- Background sync, started and stopped by main.py's lifespan ---
+_sync_task: Optional[asyncio.Task] = None
+
+async def _sync_loop():
+    while True:
+        await asyncio.sleep(settings.AUTH_REVOCATION_SYNC_SECONDS)
+        try:
+            await run_in_threadpool(revocation_list.sync)
+        except Exception as e:
+            print(f"Token revocation sync failed: {e}")
+
+async def start_token_revocation_sync():
+    global _sync_task
+    await run_in_threadpool(revocation_list.sync)
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_token_revocation_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        await asyncio.gather(_sync_task, return_exceptions=True)
+        _sync_task = None
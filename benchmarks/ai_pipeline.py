@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AI generate-and-save pipeline offline.
+
+    python benchmarks/ai_pipeline.py [--concurrency 1,4,16] [--requests 32] [--count 20]
+                                     [--latency 0.3] [--tokens-per-second 1000] [--malformed-rate 0.05]
+
+Each request runs the same path as POST /ai/generate-questions-and-save:
+chunked prompts against the mock backend, parsing and validation, then a
+bulk insert. Runs against a throwaway SQLite database unless --database-url
+is given. Run from the repository root so .env is found.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrent request levels")
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--count", type=int, default=20, help="questions per request")
+    parser.add_argument("--chunk-size", type=int, default=None, help="override AI_CHUNK_SIZE")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=1000.0, help="mock output rate (0 = instant)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of corrupted mock responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_level(service, save, concurrency: int, requests: int, count: int, owner_id: int) -> dict:
+    from fastapi.concurrency import run_in_threadpool
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, generate_times, save_times = [], [], []
+    totals = {"saved": 0, "failed": 0}
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                questions = await service.generate_questions_async(
+                    topic=f"Benchmark c{concurrency} r{index}",
+                    difficulty="medium",
+                    count=count,
+                    use_cache=False
+                )
+                generated = time.perf_counter()
+                saved_ids = await run_in_threadpool(save, questions, owner_id)
+            except Exception as e:
+                totals["failed"] += 1
+                print(f"  request {index} failed: {e}")
+                return
+            done = time.perf_counter()
+            latencies.append(done - start)
+            generate_times.append(generated - start)
+            save_times.append(done - generated)
+            totals["saved"] += len(saved_ids)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "failed": totals["failed"],
+        "saved": totals["saved"],
+        "wall": wall,
+        "req_per_s": len(latencies) / wall,
+        "q_per_s": totals["saved"] / wall,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "gen_mean": statistics.mean(generate_times) if generate_times else 0.0,
+        "save_mean": statistics.mean(save_times) if save_times else 0.0
+    }
+
+
+def main():
+    args = parse_args()
+    temp_path = None
+    if args.database_url is None:
+        fd, temp_path = tempfile.mkstemp(suffix=".db", prefix="ai_pipeline_")
+        os.close(fd)
+        args.database_url = f"sqlite:///{temp_path}"
+
+    # Must be set before config.settings is imported.
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["AI_BACKEND"] = "mock"
+    os.environ["AI_CACHE_ENABLED"] = "false"
+    # Measures the pipeline, not the provider rate limit
+    os.environ["AI_REQUESTS_PER_MINUTE"] = str(10 ** 9)
+    os.environ["AI_REQUEST_BURST"] = str(10 ** 6)
+
+    from config.settings import settings
+    from database.connection import Base, SessionLocal, engine
+    from models import user, question, choice, topic, assessment, assessment_question, user_assessment, user_answer, question_version, ai_job  # noqa: F401
+    from models.user import User
+    from services.ai_backends import MockBackend
+    from services.ai_service import AIService
+    from services.question_service import QuestionService
+
+    if args.chunk_size:
+        settings.AI_CHUNK_SIZE = args.chunk_size
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    owner = db.query(User).filter(User.username == "benchmark").first()
+    if owner is None:
+        owner = User(name="Benchmark", username="benchmark", email="benchmark@example.com",
+                     role="admin", password_hash="!")
+        db.add(owner)
+        db.commit()
+    owner_id = owner.id
+    db.close()
+
+    def save(questions, user_id):
+        session = SessionLocal()
+        try:
+            return QuestionService.save_generated_questions(session, questions, user_id)
+        finally:
+            session.close()
+
+    backend = MockBackend(args.latency, args.tokens_per_second, args.malformed_rate, args.seed)
+    service = AIService(backend)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    print(f"{args.requests} requests x {args.count} questions per level, chunk size {settings.AI_CHUNK_SIZE}, "
+          f"mock latency {args.latency}s, {args.tokens_per_second} tok/s, malformed {args.malformed_rate:.0%}")
+    print(f"{'conc':>5} {'ok':>5} {'fail':>5} {'saved':>7} {'wall s':>8} {'req/s':>8} {'q/s':>9} "
+          f"{'p50 s':>7} {'p95 s':>7} {'gen s':>7} {'save s':>7}")
+    try:
+        for level in levels:
+            r = asyncio.run(run_level(service, save, level, args.requests, args.count, owner_id))
+            print(f"{r['concurrency']:>5} {r['ok']:>5} {r['failed']:>5} {r['saved']:>7} {r['wall']:>8.2f} "
+                  f"{r['req_per_s']:>8.2f} {r['q_per_s']:>9.1f} {r['p50']:>7.3f} {r['p95']:>7.3f} "
+                  f"{r['gen_mean']:>7.3f} {r['save_mean']:>7.3f}")
+        print(f"mock backend: {backend.stats()}")
+        print(f"salvage: {service.salvage}")
+    finally:
+        engine.dispose()
+        if temp_path:
+            os.remove(temp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering invitation emails for a large campaign.
+
+    python benchmarks/email_rendering.py [--recipients 100000] [--legacy-sample 5000]
+
+Compares the old f-string builder, which assembled an EmailMessage per
+invite, with the compiled Jinja2 templates. The templates are rendered
+one recipient at a time with render_email, and as a batch with
+render_emails. --serialize also flattens each message to the bytes the
+SMTP client sends. The legacy builder is slow, so it runs on a sample and
+is extrapolated. Also reports how long the templates take to compile on
+startup, with a cold and a warm bytecode cache. Run from the repository
+root so .env and the templates are found.
+"""
+
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=100000)
+    parser.add_argument("--legacy-sample", type=int, default=5000, help="recipients for the f-string baseline")
+    parser.add_argument("--serialize", action="store_true", help="also flatten every message to bytes")
+    return parser.parse_args()
+
+
+def legacy_invite_email(recipient_email: str, recruiter_name: str, recruiter_email: str, invitation_link: str):
+    """The builder the templates replaced: an f-string body in an EmailMessage."""
+    from email.message import EmailMessage
+    from email.utils import formataddr
+    from config.settings import settings
+
+    html_content = f"""
+    <html>
+        <body>
+            <h3>Hi there,</h3>
+            <p>
+                {recruiter_name} has invited you to take a quiz on our platform.
+            </p>
+            <p>
+                Please click the link below to begin:
+                <br>
+                <a href="{invitation_link}">{invitation_link}</a>
+            </p>
+            <p>Good luck!</p>
+        </body>
+    </html>
+    """
+    message = EmailMessage()
+    message["Subject"] = f"Quiz Invitation from {recruiter_name}"
+    message["From"] = formataddr((f"{recruiter_name} (via QuizApp)", settings.MAIL_FROM))
+    message["To"] = recipient_email
+    message["Reply-To"] = recruiter_email
+    message.set_content("This message is best viewed in an HTML-capable email client.")
+    message.add_alternative(html_content, subtype="html")
+    return message
+
+
+def recipients_for(count: int):
+    return [
+        (f"candidate{i}@example{i % 50}.com", {
+            "recruiter_name": "Dana Recruiter",
+            "recruiter_email": "dana@example.com",
+            "invitation_link": f"https://your-frontend-app.com/take-quiz?token={i:032x}"
+        })
+        for i in range(count)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def report(mode: str, count: int, wall: float, total: int):
+    rate = count / wall
+    print(f"{mode:<34} {count:>9} {wall:>8.2f} {rate:>10.0f} {total / rate:>9.1f}s")
+
+
+def main():
+    args = parse_args()
+    from config.settings import settings
+    from aiosmtplib.email import flatten_message
+    from utils.email import render_email, render_emails
+    from utils.email_templates import EmailTemplates
+
+    cache_dir = tempfile.mkdtemp(prefix="email-bytecode-")
+    try:
+        cold, _ = timed(lambda: EmailTemplates(settings.EMAIL_TEMPLATES_DIR, cache_dir, settings.MAIL_FROM))
+        warm, templates = timed(lambda: EmailTemplates(settings.EMAIL_TEMPLATES_DIR, cache_dir, settings.MAIL_FROM))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    print(f"compile {len(templates.names)} templates: {cold * 1000:.1f} ms cold cache, {warm * 1000:.1f} ms warm cache")
+
+    total = args.recipients
+    recipients = recipients_for(total)
+    sample = recipients[:args.legacy_sample]
+    serialize = flatten_message if args.serialize else (lambda message: message)
+    print(f"{'mode':<34} {'messages':>9} {'wall s':>8} {'msg/s':>10} {f'{total} est':>10}")
+
+    wall, _ = timed(lambda: [
+        serialize(legacy_invite_email(recipient, **context)) for recipient, context in sample
+    ])
+    report("f-string + EmailMessage (before)", len(sample), wall, total)
+
+    wall, _ = timed(lambda: [serialize(render_email("invite", recipient, context)) for recipient, context in recipients])
+    report("render_email per recipient", total, wall, total)
+
+    wall, messages = timed(lambda: [serialize(message) for message in render_emails("invite", recipients)])
+    failed = sum(isinstance(message, Exception) for message in messages)
+    report("render_emails batch", total, wall, total)
+    if failed:
+        print(f"{failed} renders failed")
+
+
+if __name__ == "__main__":
+    main()
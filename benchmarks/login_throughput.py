@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /auth/login under concurrency.
+
+    python benchmarks/login_throughput.py [--concurrency 1,8,32] [--requests 64]
+                                          [--workers 4] [--queue-size 64]
+
+Logins go through the ASGI app in-process, so the numbers are the app's own
+and not the network's. While they run, a probe calls GET /health every 50 ms.
+Its latency shows whether password hashing still stalls the event loop for
+everyone else. Rejected logins (503, pool saturated) are counted separately.
+Runs against a throwaway SQLite database unless --database-url is given.
+Run from the repository root so .env is found.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrent login levels")
+    parser.add_argument("--requests", type=int, default=64, help="logins per concurrency level")
+    parser.add_argument("--workers", type=int, default=None, help="override PASSWORD_HASH_WORKERS")
+    parser.add_argument("--queue-size", type=int, default=None, help="override PASSWORD_HASH_QUEUE_SIZE")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_level(client, concurrency: int, requests: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, probe_latencies = [], []
+    totals = {"rejected": 0, "failed": 0}
+    body = {"email": "benchmark@example.com", "username": "benchmark", "password": "benchmark"}
+    done = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/auth/login", json=body)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            elif response.status_code == 503:
+                totals["rejected"] += 1
+            else:
+                totals["failed"] += 1
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - start
+    done.set()
+    await prober
+    return {
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "rejected": totals["rejected"],
+        "failed": totals["failed"],
+        "wall": wall,
+        "logins_per_s": len(latencies) / wall,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "probe_p50": percentile(probe_latencies, 0.5),
+        "probe_max": max(probe_latencies) if probe_latencies else 0.0
+    }
+
+
+async def run(app, levels, requests):
+    import httpx
+    from auth.password_pool import password_pool
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        print(f"{'conc':>5} {'ok':>5} {'503':>5} {'fail':>5} {'wall s':>8} {'login/s':>8} "
+              f"{'p50 s':>7} {'p95 s':>7} {'probe p50':>10} {'probe max':>10}")
+        for level in levels:
+            r = await run_level(client, level, requests)
+            print(f"{r['concurrency']:>5} {r['ok']:>5} {r['rejected']:>5} {r['failed']:>5} {r['wall']:>8.2f} "
+                  f"{r['logins_per_s']:>8.2f} {r['p50']:>7.3f} {r['p95']:>7.3f} "
+                  f"{r['probe_p50']:>10.4f} {r['probe_max']:>10.4f}")
+        print(f"password pool: {password_pool.stats()}")
+    password_pool.stop()
+
+
+def main():
+    args = parse_args()
+    temp_path = None
+    if args.database_url is None:
+        fd, temp_path = tempfile.mkstemp(suffix=".db", prefix="login_throughput_")
+        os.close(fd)
+        args.database_url = f"sqlite:///{temp_path}"
+
+    # Must be set before config.settings is imported.
+    os.environ["DATABASE_URL"] = args.database_url
+    # Every login here is the same user from the same address; keep the brute-force throttle out of the way.
+    os.environ["LOGIN_MAX_ATTEMPTS_PER_USERNAME"] = str(10 ** 9)
+    os.environ["LOGIN_MAX_ATTEMPTS_PER_IP"] = str(10 ** 9)
+    if args.workers is not None:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    if args.queue_size is not None:
+        os.environ["PASSWORD_HASH_QUEUE_SIZE"] = str(args.queue_size)
+
+    from config.settings import settings
+    from database.connection import SessionLocal, engine
+    import main as app_module  # also creates the tables
+    from models.user import User
+    from auth.jwt import get_password_hash
+
+    db = SessionLocal()
+    if db.query(User).filter(User.username == "benchmark").first() is None:
+        db.add(User(name="Benchmark", username="benchmark", email="benchmark@example.com",
+                    role="admin", password_hash=get_password_hash("benchmark")))
+        db.commit()
+    db.close()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    print(f"{args.requests} logins per level, {settings.PASSWORD_HASH_WORKERS} hash workers, "
+          f"queue {settings.PASSWORD_HASH_QUEUE_SIZE}, {os.cpu_count()} CPUs")
+    try:
+        asyncio.run(run(app_module.app, levels, args.requests))
+    finally:
+        engine.dispose()
+        if temp_path:
+            os.remove(temp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark email delivery: one SMTP connection per message vs the pooled connections.
+
+    pip install aiosmtpd
+    python benchmarks/smtp_throughput.py [--messages 2000] [--pool-sizes 1,4,16]
+                                         [--handshake-delay 0.05] [--data-delay 0.002]
+
+Messages go to a local aiosmtpd server that accepts and drops them. A
+local server has no network round trips, TLS or AUTH, so on its own it
+flatters the per-message connection. --handshake-delay adds that cost to
+every new connection (answered at EHLO), and --data-delay adds the
+server's per-message time. Run from the repository root so .env is found.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-sizes", default="1,4,16", help="comma-separated SMTP_POOL_SIZE values")
+    parser.add_argument("--baseline-messages", type=int, default=200,
+                        help="messages for the connection-per-message baseline, which is slow")
+    parser.add_argument("--handshake-delay", type=float, default=0.05, help="seconds added to each new connection")
+    parser.add_argument("--data-delay", type=float, default=0.002, help="seconds added to each message")
+    parser.add_argument("--port", type=int, default=8025)
+    return parser.parse_args()
+
+
+class SinkHandler:
+    def __init__(self, handshake_delay: float, data_delay: float):
+        self.handshake_delay = handshake_delay
+        self.data_delay = data_delay
+        self.received = 0
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.data_delay)
+        self.received += 1
+        return "250 OK"
+
+
+def messages_for(count: int):
+    from utils.email import build_welcome_email
+    return [build_welcome_email(f"candidate{i}@example.com", f"candidate{i}") for i in range(count)]
+
+
+async def run_baseline(port: int, count: int, concurrency: int) -> float:
+    """What sending looked like before the pool: a fresh connection for every message."""
+    import aiosmtplib
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(message):
+        async with semaphore:
+            await aiosmtplib.send(message, hostname="127.0.0.1", port=port, start_tls=False)
+
+    messages = messages_for(count)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(message) for message in messages))
+    return time.perf_counter() - start
+
+
+async def run_pool(port: int, count: int, size: int) -> tuple:
+    from utils.smtp_pool import SMTPPool
+
+    pool = SMTPPool("127.0.0.1", port, None, None, start_tls=False, use_tls=False, size=size,
+                    max_messages=10 ** 6, idle_timeout=60, timeout=30)
+    messages = messages_for(count)
+    start = time.perf_counter()
+    errors = await pool.send_many(messages)
+    wall = time.perf_counter() - start
+    await pool.close()
+    return wall, sum(error is not None for error in errors), pool.stats()
+
+
+def main():
+    args = parse_args()
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("This benchmark needs aiosmtpd: pip install aiosmtpd")
+
+    handler = SinkHandler(args.handshake_delay, args.data_delay)
+    controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    sizes = [int(size) for size in args.pool_sizes.split(",") if size.strip()]
+    print(f"handshake delay {args.handshake_delay}s, data delay {args.data_delay}s")
+    print(f"{'mode':<28} {'messages':>9} {'failed':>7} {'conns':>6} {'wall s':>8} {'msg/s':>9} {'10k est':>9}")
+    try:
+        for concurrency in sorted(set([1] + sizes)):
+            connections = handler.connections
+            wall = asyncio.run(run_baseline(args.port, args.baseline_messages, concurrency))
+            rate = args.baseline_messages / wall
+            print(f"{f'per-message x{concurrency}':<28} {args.baseline_messages:>9} {0:>7} "
+                  f"{handler.connections - connections:>6} {wall:>8.2f} {rate:>9.1f} {10000 / rate:>8.0f}s")
+        for size in sizes:
+            wall, failed, stats = asyncio.run(run_pool(args.port, args.messages, size))
+            rate = (args.messages - failed) / wall
+            print(f"{f'pool size {size}':<28} {args.messages:>9} {failed:>7} {stats['connections_opened']:>6} "
+                  f"{wall:>8.2f} {rate:>9.1f} {10000 / rate:>8.0f}s")
+        print(f"server received {handler.received} messages over {handler.connections} connections")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
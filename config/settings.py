@@ -7,12 +7,66 @@ class Settings(BaseSettings):
 
     # Security
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
-    ALGORITHM: str = "HS256"
+    ALGORITHM: str = "HS256"  # HS256 signs with SECRET_KEY; RS256/ES256 sign with the key ring below and publish /.well-known/jwks.json
+    JWT_KEYS_DIR: str = "keys/jwt"  # <kid>.pem private keys, created with generate_jwt_key.py
+    JWT_ACTIVE_KID: Optional[str] = None  # signing key; defaults to the newest
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    AUTH_REVOCATION_SYNC_SECONDS: float = 5.0  # how often revocations made by other processes are picked up
+    AUTH_USER_CACHE_SIZE: int = 10000  # user records kept in memory per process for token checks; 0 disables
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0  # how long another process's role change or delete can go unnoticed
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # verified token payloads kept per process, each until its exp; 0 disables
+    LOGIN_THROTTLE_STORE: str = "memory"  # or "database" to share attempt counts between processes
+    LOGIN_THROTTLE_WINDOW_SECONDS: float = 300.0  # sliding window for the limits below
+    LOGIN_MAX_ATTEMPTS_PER_USERNAME: int = 10  # failed logins to one username from one IP; a success clears them
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 50  # failed logins from one IP, to any username
+    TRUST_X_FORWARDED_FOR: bool = False  # take the client IP from X-Forwarded-For; only behind a proxy that sets it
+    PASSWORD_HASH_WORKERS: int = 4  # threads hashing/verifying passwords at once per process; about one per core
+    PASSWORD_HASH_QUEUE_SIZE: int = 64  # calls waiting for a thread before login/register answer 503
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # or "argon2" (argon2id, needs argon2-cffi); hashes in the other scheme are replaced at login
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # hashes below this cost are upgraded at the user's next login
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_KIB: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    PASSWORD_HASH_CALIBRATE: bool = False  # at startup, tune bcrypt rounds / argon2 time cost so one hash takes PASSWORD_HASH_TARGET_MS
+    PASSWORD_HASH_TARGET_MS: float = 250.0
+    PASSWORD_HASH_MIN_BCRYPT_ROUNDS: int = 10  # calibration never goes below these
+    PASSWORD_HASH_MIN_ARGON2_TIME_COST: int = 2
 
 
     # AI Configuration
     GEMINI_API_KEY: Optional[str] = None
+    AI_BACKEND: str = "gemini"  # "gemini", or "mock" for offline load tests and local development
+    AI_MOCK_LATENCY_SECONDS: float = 0.5  # mock: time to first token
+    AI_MOCK_TOKENS_PER_SECOND: float = 200.0  # mock: output rate; 0 returns the whole response at once
+    AI_MOCK_MALFORMED_RATE: float = 0.0  # mock: fraction of responses that are corrupted
+    AI_MOCK_SEED: int = 0
+    AI_CHUNK_SIZE: int = 10  # questions per model call
+    AI_MAX_CONCURRENCY: int = 5  # parallel model calls per generation request
+    AI_CHUNK_AUTOTUNE: bool = False  # pick the chunk size from measured call latency instead of AI_CHUNK_SIZE
+    AI_CHUNK_SIZE_MIN: int = 3  # autotuning range
+    AI_CHUNK_SIZE_MAX: int = 25
+    AI_PRICE_PER_1K_PROMPT_TOKENS: float = 0.0  # for the estimated cost in /ai/metrics
+    AI_PRICE_PER_1K_RESPONSE_TOKENS: float = 0.0
+    AI_SALVAGE_MAX_FOLLOWUPS: int = 1  # extra calls per chunk asking only for questions dropped as malformed
+    AI_WARMUP_ON_STARTUP: bool = False  # import the SDK and build the model at startup instead of first use
+    AI_SHUTDOWN_TIMEOUT_SECONDS: float = 30.0
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_DIR: str = ".cache/ai"
+    AI_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_JOB_WORKERS: int = 2  # generation jobs running at once per process
+    AI_JOB_QUEUE_SIZE: int = 100  # jobs waiting per process before submissions get 503
+    AI_JOB_STALE_SECONDS: int = 600  # running jobs without a heartbeat this long are requeued
+    AI_JOB_HEARTBEAT_SECONDS: float = 30.0  # running jobs and campaigns write a heartbeat, and stale or waiting ones are picked up, this often
+    AI_REQUESTS_PER_MINUTE: float = 60.0  # model calls per minute in this process: requests, jobs and campaigns together
+    AI_REQUEST_BURST: int = 10  # model calls that may start back to back before the rate limit applies
+    AI_RATE_LIMIT_PAUSE_SECONDS: float = 30.0  # every model call waits this long after the provider answers 429
+    AI_CAMPAIGN_CONCURRENCY: int = 4  # campaign items generating at once per process
+    AI_CAMPAIGN_MAX_ATTEMPTS: int = 5  # per item, before it is marked Failed
+    AI_CAMPAIGN_BACKOFF_BASE_SECONDS: float = 2.0  # doubled after every failed attempt
+    AI_CAMPAIGN_BACKOFF_MAX_SECONDS: float = 300.0
+    AI_CAMPAIGN_INSERT_BATCH_SIZE: int = 200  # generated questions buffered per bulk insert
     
     # App Configuration
     APP_NAME: str = "Quiz Application"
@@ -24,6 +78,29 @@ class Settings(BaseSettings):
     MAIL_FROM: str
     MAIL_PORT: int
     MAIL_SERVER: str
+    MAIL_STARTTLS: bool = True
+    MAIL_SSL_TLS: bool = False
+    SMTP_POOL_SIZE: int = 4  # SMTP connections kept open per process; also the number of messages in flight
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 500  # then reconnect; some providers cap messages per session
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60.0  # idle connections older than this are replaced before use
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    EMAIL_TEMPLATES_DIR: str = "templates/email"  # <kind>.subject.txt, <kind>.txt, <kind>.html; <locale>/ for translations
+    EMAIL_TEMPLATE_CACHE_DIR: str = ""  # Jinja bytecode cache; empty uses a directory under the system temp dir
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100  # emails email_worker.py claims per round
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2.0  # worker sleep when nothing is due
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8  # then the email is marked Failed
+    EMAIL_OUTBOX_BACKOFF_BASE_SECONDS: float = 30.0  # first retry delay, doubled per attempt
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: float = 3600.0
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300.0  # a claimed email is reclaimable after this if its worker died; renewed while the batch sends
+    EMAIL_SEND_RATE_PER_SECOND: float = 10.0  # per worker process, i.e. per SMTP provider connection pool
+    EMAIL_SEND_BURST: int = 20  # messages that may go back to back before the rate applies
+    EMAIL_MAX_CONCURRENT_PER_DOMAIN: int = 2  # messages in flight to one recipient domain (gmail.com, ...)
+    EMAIL_THROTTLE_PAUSE_SECONDS: float = 60.0  # sending stops this long after the provider says to slow down
+    INVITE_CAMPAIGN_MAX_EMAILS: int = 100000  # rows accepted per CSV upload
+    INVITE_CAMPAIGN_CHUNK_SIZE: int = 1000  # invitations inserted, emails queued and progress committed per chunk
+    RECRUITER_DIGESTS_ENABLED: bool = False  # roll completed attempts up into one email per recruiter per window
+    RECRUITER_DIGEST_WINDOW_MINUTES: int = 60  # email_worker.py sends each window's digest once it closes
+    RECRUITER_DIGEST_TOP_SCORES: int = 5  # best attempts listed in a digest
 
     class Config:
         env_file = ".env"
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config.settings import settings
@@ -15,3 +16,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# INSERT constructs with ON CONFLICT DO NOTHING / RETURNING support, per dialect
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def dialect_insert(db):
+    """The insert() of the session's database, for INSERT ... ON CONFLICT."""
+    return _DIALECT_INSERTS[db.get_bind().dialect.name]
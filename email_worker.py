@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Email delivery worker: sends what the web app queued in the email_outbox table.
+
+    python email_worker.py [--once]
+
+Claims due emails in batches, highest priority first (FOR UPDATE SKIP
+LOCKED, so several workers can run side by side), sends them over pooled
+SMTP connections at EMAIL_SEND_RATE_PER_SECOND with at most
+EMAIL_MAX_CONCURRENT_PER_DOMAIN in flight per recipient domain, and
+records each outcome; the batch's lease is renewed while it sends.
+Failed sends are retried with exponential backoff up to
+EMAIL_OUTBOX_MAX_ATTEMPTS; a permanent refusal (5xx) or an email that
+can't be rendered is marked Failed at once. Stops cleanly on
+SIGINT/SIGTERM after the batch in flight. --once exits when nothing is due.
+With RECRUITER_DIGESTS_ENABLED, it also queues each recruiter's completion
+digest once its window closes.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import signal
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import aiosmtplib
+
+from config.settings import settings
+from database.connection import SessionLocal
+import migrations  # noqa: F401  (imports every model so the mappers configure)
+from services.email_outbox_service import EmailOutboxService
+from services.recruiter_digest_service import RecruiterDigestService
+from utils.email import render_emails
+from utils.email_scheduler import EmailScheduler, create_email_scheduler
+from utils.email_templates import get_email_templates
+from utils.smtp_pool import create_smtp_pool
+
+# Claim about this many seconds of sending at a time, so a welcome email
+# queued behind a bulk campaign waits at most one batch
+BATCH_SECONDS = 5
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies won't change on retry; 4xx and connection errors might."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(recipient.code >= 500 for recipient in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return False
+
+
+async def keep_leased(email_ids: list):
+    """Renew the batch's lease until cancelled, so a batch that outlasts
+    EMAIL_OUTBOX_LEASE_SECONDS isn't reclaimed and sent again by another worker."""
+    while True:
+        await asyncio.sleep(settings.EMAIL_OUTBOX_LEASE_SECONDS / 3)
+        db = SessionLocal()
+        try:
+            EmailOutboxService.extend_lease(db, email_ids)
+        except Exception as e:
+            print(f"!!! EMAIL LEASE RENEWAL ERROR: {e!r} !!!")
+        finally:
+            db.close()
+
+
+async def deliver_batch(scheduler: EmailScheduler, limit: int) -> int:
+    """Claim, send and record up to ``limit`` emails; returns how many were claimed."""
+    # Claimed rows stay loaded after the claim's commit instead of being re-read one by one
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        emails = EmailOutboxService.claim_batch(db, limit)
+        if not emails:
+            return 0
+
+        # One render_emails call per kind; kinds keep the priority order of the claim
+        by_kind = defaultdict(list)
+        for email in emails:
+            by_kind[email.kind].append(email)
+        to_send, messages = [], []
+        for kind, group in by_kind.items():
+            rendered = render_emails(kind, [(email.recipient, email.context) for email in group])
+            for email, result in zip(group, rendered):
+                if isinstance(result, Exception):
+                    EmailOutboxService.mark_failed(db, email, f"render: {result!r}", permanent=True)
+                else:
+                    to_send.append(email)
+                    messages.append(result)
+
+        renewal = asyncio.ensure_future(keep_leased([email.id for email in to_send]))
+        try:
+            errors = await scheduler.send_many(messages)
+        finally:
+            renewal.cancel()
+        failed = 0
+        for email, error in zip(to_send, errors):
+            if error is None:
+                EmailOutboxService.mark_sent(db, email)
+            else:
+                failed += 1
+                EmailOutboxService.mark_failed(db, email, repr(error), permanent=is_permanent(error))
+        db.commit()
+
+        print(f"--- {len(to_send) - failed} of {len(emails)} emails sent ---")
+        if failed or len(to_send) < len(emails):
+            print(f"!!! {failed + len(emails) - len(to_send)} emails failed; see email_outbox.last_error !!!")
+        return len(emails)
+    finally:
+        db.close()
+
+
+def flush_digests() -> int:
+    db = SessionLocal()
+    try:
+        return RecruiterDigestService.flush_due(db)
+    finally:
+        db.close()
+
+
+async def run(once: bool):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    templates = get_email_templates()  # compile every template before the first batch
+    pool = create_smtp_pool()
+    scheduler = create_email_scheduler(pool)
+    batch_size = max(1, min(settings.EMAIL_OUTBOX_BATCH_SIZE, int(settings.EMAIL_SEND_RATE_PER_SECOND * BATCH_SECONDS)))
+    print(f"Email worker started: batches of {batch_size}, {pool.size} SMTP connections, "
+          f"{settings.EMAIL_SEND_RATE_PER_SECOND} messages/s, {len(templates.names)} templates")
+    try:
+        while not stop.is_set():
+            if settings.RECRUITER_DIGESTS_ENABLED:
+                try:
+                    flushed = flush_digests()
+                    if flushed:
+                        print(f"--- {flushed} recruiter digests queued ---")
+                except Exception as e:
+                    print(f"!!! RECRUITER DIGEST ERROR: {e!r} !!!")
+            try:
+                claimed = await deliver_batch(scheduler, batch_size)
+            except Exception as e:
+                # Database or SMTP outage: the claimed rows' leases expire and they are retried
+                print(f"!!! EMAIL WORKER ERROR: {e!r} !!!")
+                claimed = 0
+            if claimed == batch_size:
+                continue  # more may be due right away
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await pool.close()
+        print(f"Email worker stopped: {scheduler.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="exit once no email is due")
+    args = parser.parse_args()
+    asyncio.run(run(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,59 @@
 import streamlit as st
 import requests
+import time
 
 API_BASE_URL = "http://localhost:8000/api/v1"
 #
-def generate_and_save_questions_api(topic: str, difficulty: str, count: int):
-    """Calls the backend to generate and save questions using AI."""
-    
-    # --- Check 1: Is the user logged in? ---
-    # If this is missing, the header will be wrong.
+def submit_generation_job_api(topic: str, difficulty: str, count: int):
+    """Queues a background job that generates and saves questions using AI."""
     if not st.session_state.token:
         st.error("Authentication token not found. Please log in.")
         return None
 
-    # --- Check 2: Is the URL correct? ---
-    # It must exactly match the one in your API client.
-    api_url = f"{API_BASE_URL}/ai/generate-questions-and-save"
-    
-    # --- Check 3: Is the payload correct? ---
-    # The keys 'topic', 'difficulty', and 'count' must match your backend model.
     payload = {
         "topic": topic,
         "difficulty": difficulty.lower(),
-        "count": count
+        "count": count,
+        "save": True
     }
-    
-    # --- Check 4: Is the Authorization header being sent correctly? ---
     headers = {
         "Authorization": f"Bearer {st.session_state.token}"
     }
 
     try:
-        # Give the request a longer timeout as AI generation can be slow
-        response = requests.post(api_url, json=payload, headers=headers, timeout=120) 
-        return response
+        # The backend answers immediately with a job id; generation happens in the background
+        return requests.post(f"{API_BASE_URL}/ai/jobs", json=payload, headers=headers, timeout=10)
+    except requests.exceptions.RequestException as e:
+        st.error(f"API connection error: {e}")
+        return None
+
+def get_generation_job_api(job_id: str):
+    """Fetches the status and partial results of a generation job."""
+    headers = {
+        "Authorization": f"Bearer {st.session_state.token}"
+    }
+    try:
+        return requests.get(f"{API_BASE_URL}/ai/jobs/{job_id}", headers=headers, timeout=10)
     except requests.exceptions.RequestException as e:
         st.error(f"API connection error: {e}")
         return None
+
+def wait_for_generation_job(job_id: str, count: int, timeout: int = 600):
+    """Polls a job until it finishes, showing progress. Returns the final job or None."""
+    progress = st.progress(0.0, text="Waiting for the generator to start...")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = get_generation_job_api(job_id)
+        if response is None or response.status_code != 200:
+            return None
+        job = response.json()
+        done = min(job.get("generated_count", 0) / max(count, 1), 1.0)
+        progress.progress(done, text=f"{job['status']}: {job.get('generated_count', 0)} of {count} questions generated")
+        if job["status"] in ("Succeeded", "Failed", "Cancelled"):
+            return job
+        time.sleep(2)
+    st.warning(f"Still running. Job id: {job_id} - the questions will be saved when it finishes.")
+    return None
     
 #
 def show_ai_generator_page():
@@ -71,15 +89,18 @@ def show_ai_generator_page():
             if not topic:
                 st.warning("Please enter a topic.")
             else:
-                with st.spinner(f"Generating {count} questions on '{topic}'... This may take a moment."):
-                    response = generate_and_save_questions_api(topic, difficulty, count)
+                response = submit_generation_job_api(topic, difficulty, count)
                 
-                if response and response.status_code == 200: # Your endpoint returns 200 OK
-                    response_data = response.json()
-                    st.success(response_data.get("message", "Questions saved successfully!"))
+                if response and response.status_code == 202: # The job was queued
+                    job = wait_for_generation_job(response.json()["id"], count)
+                    if job and job["status"] == "Succeeded":
+                        saved = len(job.get("saved_question_ids") or [])
+                        st.success(f"Successfully generated and saved {saved} questions")
+                    elif job:
+                        st.error(f"Error: {job.get('error') or job['status']}")
                     
                     # Optionally, display the questions that were generated
-                    generated_questions = response_data.get("questions", [])
+                    generated_questions = job.get("questions", []) if job else []
                     if generated_questions:
                         st.markdown("---")
                         st.subheader("Generated Questions:")
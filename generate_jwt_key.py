@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script to add a JWT signing key to the key ring.
+
+    python generate_jwt_key.py [--algorithm RS256] [--dir keys/jwt]
+
+The new key is named by its creation time, so it becomes the signing key
+once it has been published for KEY_PUBLISH_SECONDS (two minutes): running
+servers verify with it within a minute, and sign with it only after every
+server and JWKS client has had time to pick it up. Tokens
+signed with older keys stay valid; delete an old key file once
+ACCESS_TOKEN_EXPIRE_MINUTES have passed since the rotation.
+Set ALGORITHM to the same algorithm to sign with the key ring.
+"""
+
+import sys
+import os
+import argparse
+import secrets
+from datetime import datetime, timezone
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+CURVES = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+
+
+def generate_key(algorithm: str, bits: int):
+    if algorithm.startswith("RS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=bits)
+    if algorithm in CURVES:
+        return ec.generate_private_key(CURVES[algorithm]())
+    raise SystemExit(f"Unsupported algorithm {algorithm}; use RS256/RS384/RS512 or ES256/ES384/ES512")
+
+
+def main():
+    from config.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm", default=settings.ALGORITHM if settings.ALGORITHM != "HS256" else "RS256")
+    parser.add_argument("--bits", type=int, default=2048, help="RSA key size")
+    parser.add_argument("--dir", default=settings.JWT_KEYS_DIR)
+    args = parser.parse_args()
+
+    key = generate_key(args.algorithm, args.bits)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption())
+    kid = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S") + "-" + secrets.token_hex(4)
+
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f"{kid}.pem")
+    # Readable by the owner only; written under another name and renamed, so servers never read half a key
+    tmp_path = os.path.join(args.dir, f".{kid}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+    print(f"Created {args.algorithm} key {kid} at {path}")
+    if settings.ALGORITHM != args.algorithm:
+        print(f"Set ALGORITHM={args.algorithm} to start signing tokens with the key ring.")
+
+
+if __name__ == "__main__":
+    main()
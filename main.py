@@ -1,13 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
 import uvicorn
-from typing import Optional
 
 from database.connection import engine, Base
-from routers import auth, assessment, question, user_assessment, ai,invite
+from routers import auth, assessment, question, user_assessment, ai,invite, topic
 from config.settings import settings
+from services.ai_service import init_ai_service, shutdown_ai_service, get_ai_service
+from services.ai_job_service import start_ai_job_runner, stop_ai_job_runner
+from services.ai_campaign_service import start_ai_campaign_runner, stop_ai_campaign_runner
+from auth.password_pool import start_password_pool, stop_password_pool
+from auth.password_hashing import configure_password_hashing
+from auth.revocation import start_token_revocation_sync, stop_token_revocation_sync
+from utils.smtp_pool import close_smtp_pool
+from auth.keys import asymmetric_signing, get_key_ring, public_jwks, KEY_RELOAD_SECONDS
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -16,9 +22,24 @@ Base.metadata.create_all(bind=engine)
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting Quiz Application...")
+    print(f"Password hashing: {configure_password_hashing()}")
+    if asymmetric_signing():
+        # Fail at startup, not on the first login, when the keys are missing
+        print(f"JWT signing key: {get_key_ring().signing_key()[0]}")
+    start_password_pool()
+    await start_token_revocation_sync()
+    init_ai_service()
+    await start_ai_job_runner()
+    await start_ai_campaign_runner()
     yield
     # Shutdown
     print("Shutting down Quiz Application...")
+    await stop_ai_campaign_runner()
+    await stop_ai_job_runner()
+    await shutdown_ai_service(settings.AI_SHUTDOWN_TIMEOUT_SECONDS)
+    await stop_token_revocation_sync()
+    await close_smtp_pool()
+    stop_password_pool()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -51,6 +72,7 @@ app.include_router(question.router, prefix="/api/v1")
 app.include_router(user_assessment.router, prefix="/api/v1")
 app.include_router(ai.router, prefix="/api/v1")
 app.include_router(invite.router, prefix="/api/v1")
+app.include_router(topic.router, prefix="/api/v1")
 
 
 
@@ -67,12 +89,23 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
+    ai_health = get_ai_service().health()
     return {
         "status": "healthy",
         "service": settings.APP_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ai": {
+            "configured": ai_health["configured"],
+            "accepting_requests": ai_health["accepting_requests"]
+        }
     }
 
+@app.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Public keys for verifying access tokens locally, by the token's kid."""
+    response.headers["Cache-Control"] = f"public, max-age={KEY_RELOAD_SECONDS}"
+    return public_jwks()
+
 @app.get("/api/v1/info")
 async def api_info():
     """API information endpoint."""
@@ -92,6 +125,7 @@ async def api_info():
             "authentication": "/api/v1/auth",
             "assessments": "/api/v1/assessments",
             "questions": "/api/v1/questions",
+            "topics": "/api/v1/topics",
             "user_assessments": "/api/v1/user-assessments",
             "ai_services": "/api/v1/ai"
         }
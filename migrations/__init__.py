@@ -0,0 +1,42 @@
+"""
+One-off schema/data migrations for existing databases.
+
+``Base.metadata.create_all`` in main.py creates new tables but never alters
+existing ones, so each script here adds the columns a feature needs and
+backfills data. Run them from the project root, e.g.::
+
+    python -m migrations.topic_taxonomy
+
+Every script is idempotent and safe to re-run.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# Relationships are declared by class name, so every model must be imported
+# before the first query configures the mappers.
+from models import (  # noqa: F401
+    user, question, choice, topic, assessment, assessment_question,
+    user_assessment, user_answer, question_version, ai_job, ai_campaign, auth_token, login_attempt,
+    email_outbox, invite_campaign, recruiter_digest
+)
+
+
+def add_column_if_missing(engine: Engine, table: str, column: str, ddl: str) -> bool:
+    """Run ``ALTER TABLE <table> ADD COLUMN <column> <ddl>`` unless the column exists."""
+    existing = {col["name"] for col in inspect(engine).get_columns(table)}
+    if column in existing:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def create_index_if_missing(engine: Engine, table: str, name: str, columns: str) -> bool:
+    """Create a plain btree index ``name`` on ``table(columns)`` unless it exists."""
+    existing = {index["name"] for index in inspect(engine).get_indexes(table)}
+    if name in existing:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+    return True
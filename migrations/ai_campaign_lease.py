@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Add the ``lease_token`` column to ``ai_campaigns``.
+
+    python -m migrations.ai_campaign_lease
+"""
+
+from database.connection import engine
+from migrations import add_column_if_missing
+
+
+def migrate():
+    added = add_column_if_missing(engine, "ai_campaigns", "lease_token", "VARCHAR(32)")
+    print("Added ai_campaigns.lease_token." if added else "ai_campaigns.lease_token already exists.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Add the ``metrics`` column to ``ai_generation_jobs``.
+
+    python -m migrations.ai_job_metrics
+"""
+
+from database.connection import engine
+from migrations import add_column_if_missing
+
+
+def migrate():
+    # JSON is stored as json on PostgreSQL and as text on SQLite, matching the model's Column(JSON).
+    ddl = "JSON" if engine.dialect.name == "postgresql" else "TEXT"
+    added = add_column_if_missing(engine, "ai_generation_jobs", "metrics", ddl)
+    print("Added ai_generation_jobs.metrics." if added else "ai_generation_jobs.metrics already exists.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Add ``priority`` to ``email_outbox`` and index it for the worker's claim order.
+
+    python -m migrations.email_scheduling
+"""
+
+from database.connection import engine
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def migrate():
+    added = add_column_if_missing(engine, "email_outbox", "priority", "INTEGER NOT NULL DEFAULT 5")
+    print("Added email_outbox.priority." if added else "email_outbox.priority already exists.")
+    create_index_if_missing(engine, "email_outbox", "ix_email_outbox_status_priority",
+                            "status, priority, next_attempt_at")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Add ``campaign_id`` to ``email_outbox`` for CSV invite campaigns.
+
+    python -m migrations.invite_campaigns
+
+The ``invite_campaigns`` table itself is created by ``create_all`` on startup.
+"""
+
+from database.connection import engine
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def migrate():
+    added = add_column_if_missing(engine, "email_outbox", "campaign_id", "VARCHAR(32)")
+    print("Added email_outbox.campaign_id." if added else "email_outbox.campaign_id already exists.")
+    create_index_if_missing(engine, "email_outbox", "ix_email_outbox_campaign_id", "campaign_id")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Snapshot every existing question into ``question_versions`` and pin
+existing assessments and answers to those snapshots.
+
+Past answers are pinned to the content the question has today, which is
+the best record available; everything graded after this runs is exact.
+
+    python -m migrations.question_versions
+"""
+
+from sqlalchemy import text
+from database.connection import engine, Base, SessionLocal
+from models.question import Question
+from models.question_version import QuestionVersion
+from services.question_version_service import QuestionVersionService
+from migrations import add_column_if_missing
+
+BATCH_SIZE = 500
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine, tables=[QuestionVersion.__table__])
+    add_column_if_missing(engine, "questions", "current_version_id", "INTEGER")
+    add_column_if_missing(engine, "assessment_questions", "question_version_id",
+                          "INTEGER REFERENCES question_versions(id)")
+    add_column_if_missing(engine, "user_answers", "question_version_id",
+                          "INTEGER REFERENCES question_versions(id)")
+    add_column_if_missing(engine, "choices", "retired", "BOOLEAN NOT NULL DEFAULT FALSE")
+
+    db = SessionLocal()
+    try:
+        snapshotted = 0
+        while True:
+            batch = db.query(Question).filter(
+                Question.current_version_id.is_(None)
+            ).limit(BATCH_SIZE).all()
+            if not batch:
+                break
+            for question in batch:
+                QuestionVersionService.snapshot(db, question)
+            db.commit()
+            snapshotted += len(batch)
+
+        for table in ("assessment_questions", "user_answers"):
+            db.execute(text(
+                f"UPDATE {table} SET question_version_id = ("
+                f"SELECT current_version_id FROM questions WHERE questions.id = {table}.question_id"
+                f") WHERE question_version_id IS NULL"
+            ))
+        db.commit()
+        print(f"Snapshotted {snapshotted} questions and pinned existing assessments and answers.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Map existing free-text ``questions.topic`` values onto the topic taxonomy.
+
+Creates the ``topics`` table, adds ``questions.topic_id`` and fills it in
+with one UPDATE per distinct topic string. Re-running it re-derives node
+paths with the current ``slugify`` and re-maps questions whose topic no
+longer resolves to their node (older slugs merged e.g. "C" and "C++").
+
+    python -m migrations.topic_taxonomy
+"""
+
+from database.connection import engine, Base, SessionLocal
+from models.question import Question
+from models.topic import Topic
+from services.topic_service import TopicService, PATH_SEPARATOR
+from migrations import add_column_if_missing, create_index_if_missing
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine, tables=[Topic.__table__])
+    add_column_if_missing(engine, "questions", "topic_id", "INTEGER REFERENCES topics(id)")
+    create_index_if_missing(engine, "questions", "ix_questions_topic_id", "topic_id")
+
+    db = SessionLocal()
+    try:
+        reslugged = 0
+        paths = {}
+        for node in db.query(Topic).order_by(Topic.depth, Topic.id):
+            slug = TopicService.slugify(node.name)
+            path = f"{paths[node.parent_id]}{PATH_SEPARATOR}{slug}" if node.parent_id in paths else slug
+            paths[node.id] = path
+            if node.path != path:
+                node.path = path
+                reslugged += 1
+        db.flush()
+
+        for question_topic, path in db.query(Question.topic, Topic.path).join(
+            Topic, Question.topic_id == Topic.id
+        ).distinct().all():
+            if TopicService.normalize_path(question_topic) != path:
+                db.query(Question).filter(Question.topic == question_topic).update(
+                    {Question.topic_id: None}, synchronize_session=False
+                )
+
+        topics = [
+            row[0] for row in db.query(Question.topic).filter(
+                Question.topic.isnot(None),
+                Question.topic_id.is_(None)
+            ).distinct()
+        ]
+        cache = {}
+        mapped = 0
+        for topic in topics:
+            node = TopicService.get_or_create_topic(db, topic, cache)
+            if node is None:
+                continue
+            mapped += db.query(Question).filter(
+                Question.topic == topic,
+                Question.topic_id.is_(None)
+            ).update({Question.topic_id: node.id}, synchronize_session=False)
+        db.commit()
+        print(f"Re-slugged {reslugged} taxonomy nodes.")
+        print(f"Mapped {mapped} questions across {len(topics)} distinct topics ({len(cache)} taxonomy nodes).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database.connection import Base
+from models.ai_job import AIJobStatus
+import uuid
+
+
+class AICampaign(Base):
+    """A batch of (topic, difficulty, count) generation items run as one unit."""
+    __tablename__ = "ai_campaigns"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String, nullable=True)
+    status = Column(Enum(AIJobStatus), nullable=False, default=AIJobStatus.QUEUED, index=True)
+    total_items = Column(Integer, nullable=False, default=0)
+    completed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    generated_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Touched every AI_JOB_HEARTBEAT_SECONDS; a running campaign with a stale heartbeat was orphaned by a dead worker
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # New on every claim; writes from a runner whose claim was taken over are refused
+    lease_token = Column(String(32), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    created_by = relationship("User")
+    items = relationship("AICampaignItem", back_populates="campaign", cascade="all, delete-orphan",
+                         order_by="AICampaignItem.position")
+
+
+class AICampaignItem(Base):
+    __tablename__ = "ai_campaign_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(String(32), ForeignKey("ai_campaigns.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    topic = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+    # Stays Queued until the transaction that saves its questions marks it Succeeded,
+    # so a crash never loses or duplicates an item; Failed once attempts run out
+    status = Column(Enum(AIJobStatus), nullable=False, default=AIJobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    generated_count = Column(Integer, nullable=False, default=0)
+    saved_question_ids = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    campaign = relationship("AICampaign", back_populates="items")
+
+    # --- Constraints ---
+    __table_args__ = (
+        Index("ix_ai_campaign_items_campaign_status", "campaign_id", "status"),
+    )
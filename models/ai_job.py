@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database.connection import Base
+import uuid
+import enum
+
+
+class AIJobStatus(str, enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    SUCCEEDED = "Succeeded"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
+
+class AIGenerationJob(Base):
+    __tablename__ = "ai_generation_jobs"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    topic = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+    save = Column(Boolean, nullable=False, default=True)
+    use_cache = Column(Boolean, nullable=False, default=True)
+    status = Column(Enum(AIJobStatus), nullable=False, default=AIJobStatus.QUEUED, index=True)
+    generated_count = Column(Integer, nullable=False, default=0)
+    # Generated questions as GeneratedQuestion dicts; grows chunk by chunk while running
+    result = Column(JSON, nullable=True)
+    saved_question_ids = Column(JSON, nullable=True)
+    # AIMetrics snapshot of this job's model calls: latency, tokens, parse time, retries
+    metrics = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Touched after every chunk; a running job with a stale heartbeat was orphaned by a dead worker
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    created_by = relationship("User")
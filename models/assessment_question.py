@@ -9,6 +9,8 @@ class AssessmentQuestion(Base):
     assessment_id = Column(Integer, ForeignKey("assessments.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     marks = Column(Integer, nullable=True)
+    # The question version this assessment was built with; grading reads this, not the live row
+    question_version_id = Column(Integer, ForeignKey("question_versions.id"), nullable=True)
 
     # Composite primary key
     __table_args__ = (
@@ -18,4 +20,5 @@ class AssessmentQuestion(Base):
 
     # Relationships
     assessment = relationship("Assessment", back_populates="assessment_questions")
-    question = relationship("Question", back_populates="assessment_questions") 
\ No newline at end of file
+    question = relationship("Question", back_populates="assessment_questions")
+    question_version = relationship("QuestionVersion") 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Text, Boolean, ForeignKey, false
 from sqlalchemy.orm import relationship
 from database.connection import Base
 
@@ -8,6 +8,8 @@ class Choice(Base):
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     choice_text = Column(Text, nullable=False)
     iss_correct = Column(Boolean, nullable=False)
+    # Edited or deleted choices are retired rather than changed, so question versions and answers that reference them stay valid
+    retired = Column(Boolean, nullable=False, default=False, server_default=false())
 
-    question = relationship("Question", back_populates="choices")
+    question = relationship("Question", back_populates="all_choices")
     user_answers = relationship("UserAnswer", back_populates="selected_choice") 
\ No newline at end of file
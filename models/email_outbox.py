@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Index
+from sqlalchemy.sql import func
+from database.connection import Base
+import enum
+
+
+class EmailStatus(str, enum.Enum):
+    PENDING = "Pending"
+    SENDING = "Sending"
+    SENT = "Sent"
+    FAILED = "Failed"
+
+
+class EmailOutbox(Base):
+    """An email waiting for, or done with, delivery by email_worker.py.
+
+    Written in the same transaction as the row it is about (a new user, an
+    invitation), so an email is queued exactly when that row is committed
+    and survives restarts. The worker renders ``kind`` with ``context`` at
+    send time.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "welcome", "invite", ...
+    priority = Column(Integer, nullable=False, default=5)  # lower goes first; see services/email_outbox_service.py
+    recipient = Column(String, nullable=False)
+    context = Column(JSON, nullable=False)
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # The scheduled send time at first, then the time of the next retry
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Set while a worker holds the row; a Sending row past this was orphaned by a dead worker
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    # Set for emails queued by a CSV invite campaign, to report its delivery progress
+    campaign_id = Column(String(32), ForeignKey("invite_campaigns.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # --- Constraints ---
+    __table_args__ = (
+        Index("ix_email_outbox_status_priority", "status", "priority", "next_attempt_at"),
+    )
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database.connection import Base
+import uuid
+import enum
+
+
+class InviteCampaignStatus(str, enum.Enum):
+    PROCESSING = "Processing"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+
+class InviteCampaign(Base):
+    """One CSV upload of invitations to an assessment.
+
+    The counters are committed after every chunk of rows, so they show the
+    upload's progress while it is still running. Delivery progress comes
+    from the email_outbox rows that carry this campaign's id.
+    """
+    __tablename__ = "invite_campaigns"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    recruiter_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), nullable=False)
+    status = Column(Enum(InviteCampaignStatus), nullable=False, default=InviteCampaignStatus.PROCESSING)
+    total_rows = Column(Integer, nullable=False, default=0)
+    invited_count = Column(Integer, nullable=False, default=0)
+    duplicate_count = Column(Integer, nullable=False, default=0)  # repeated in the file or already invited
+    invalid_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    recruiter = relationship("User")
+    assessment = relationship("Assessment")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from database.connection import Base
+
+
+class LoginAttempt(Base):
+    """One login attempt counted against a throttle key (``user:<name>@<address>`` or ``ip:<address>``).
+
+    Only used when LOGIN_THROTTLE_STORE is "database"; rows older than the
+    throttle window are pruned.
+    """
+    __tablename__ = "login_attempts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)
+    attempted_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    # --- Constraints ---
+    __table_args__ = (
+        Index("ix_login_attempts_key_attempted_at", "key", "attempted_at"),
+    )
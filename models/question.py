@@ -13,14 +13,22 @@ class Question(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     question_text = Column(Text, nullable=False)
     topic = Column(String, nullable=True)
+    topic_id = Column(Integer, ForeignKey("topics.id"), nullable=True, index=True)
     level = Column(String, nullable=True)
     marks = Column(Integer, default=1)
+    # Latest QuestionVersion.id; kept without a FK to avoid a questions <-> question_versions cycle
+    current_version_id = Column(Integer, nullable=True)
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     created_by = relationship("User", back_populates="questions")
-    choices = relationship("Choice", back_populates="question", cascade="all,delete-orphan")
+    topic_node = relationship("Topic", back_populates="questions")
+    # The current choices; all_choices also holds retired ones, and owns them for deletes
+    choices = relationship("Choice", primaryjoin="and_(Question.id == Choice.question_id, Choice.retired == False)",
+                           order_by="Choice.id", viewonly=True)
+    all_choices = relationship("Choice", back_populates="question", cascade="all,delete-orphan")
     assessment_questions = relationship("AssessmentQuestion", back_populates="question", cascade="all,delete-orphan")
-    user_answers = relationship("UserAnswer", back_populates="question", cascade="all,delete-orphan")
\ No newline at end of file
+    user_answers = relationship("UserAnswer", back_populates="question", cascade="all,delete-orphan")
+    versions = relationship("QuestionVersion", back_populates="question", foreign_keys="[QuestionVersion.question_id]", cascade="all,delete-orphan")
\ No newline at end of file
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database.connection import Base
+
+
+class QuestionVersion(Base):
+    """Immutable snapshot of a question and its choices.
+
+    Rows are never updated. ``content`` is zlib-compressed canonical JSON (see
+    QuestionVersionService) and ``content_hash`` is the SHA-256 of that JSON,
+    so saving identical content twice reuses the existing version.
+    """
+    __tablename__ = "question_versions"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    question = relationship("Question", back_populates="versions", foreign_keys=[question_id])
+
+    # --- Constraints ---
+    __table_args__ = (
+        UniqueConstraint('question_id', 'version', name='unique_question_version'),
+        UniqueConstraint('question_id', 'content_hash', name='unique_question_content'),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, JSON, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from database.connection import Base
+
+
+class RecruiterDigest(Base):
+    """Rollup of one recruiter's candidate completions over one digest window.
+
+    Updated in the transaction of every submit_assessment, so the digest
+    email is built from this row alone, never from the attempts themselves.
+    email_worker.py queues the email once ``window_end`` has passed and
+    sets ``flushed_at``.
+    """
+    __tablename__ = "recruiter_digests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recruiter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    window_end = Column(DateTime(timezone=True), nullable=False)
+    completions = Column(Integer, nullable=False, default=0)
+    percentage_sum = Column(Float, nullable=False, default=0.0)  # for the average
+    # The best RECRUITER_DIGEST_TOP_SCORES attempts: [{"candidate", "assessment", "score", "total_marks", "percentage"}]
+    top_scores = Column(JSON, nullable=False, default=list)
+    by_assessment = Column(JSON, nullable=False, default=dict)  # assessment name -> completions
+    flushed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    recruiter = relationship("User")
+
+    # --- Constraints ---
+    __table_args__ = (
+        UniqueConstraint("recruiter_id", "window_start", name="unique_recruiter_digest_window"),
+        Index("ix_recruiter_digests_flushed_window_end", "flushed_at", "window_end"),
+    )
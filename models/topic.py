@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database.connection import Base
+
+
+class Topic(Base):
+    __tablename__ = "topics"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    # Materialized path of slugs from the root, e.g. "python/async/asyncio".
+    # A subtree is everything equal to the path or starting with "path/".
+    path = Column(String, nullable=False, unique=True)
+    depth = Column(Integer, nullable=False, default=0)
+    parent_id = Column(Integer, ForeignKey("topics.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    parent = relationship("Topic", remote_side=[id], back_populates="children")
+    children = relationship("Topic", back_populates="parent")
+    questions = relationship("Question", back_populates="topic_node")
+
+    # text_pattern_ops lets Postgres use the btree index for LIKE 'prefix/%'
+    # regardless of the database collation.
+    __table_args__ = (
+        Index("ix_topics_path_prefix", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
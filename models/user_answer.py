@@ -10,6 +10,7 @@ class UserAnswer(Base):
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     selected_choice_id = Column(Integer, ForeignKey("choices.id"))
     is_correct = Column(Boolean)
+    question_version_id = Column(Integer, ForeignKey("question_versions.id"), nullable=True)
 
 
     # Composite primary key
@@ -20,4 +21,5 @@ class UserAnswer(Base):
     # Relationships
     user_assessment = relationship("UserAssessment", back_populates="user_answers")
     question = relationship("Question", back_populates="user_answers")
-    selected_choice = relationship("Choice", back_populates="user_answers") 
\ No newline at end of file
+    selected_choice = relationship("Choice", back_populates="user_answers")
+    question_version = relationship("QuestionVersion") 
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Export or import the question bank as gzip-compressed JSON lines.
+
+    python question_bank.py export questions.jsonl.gz [--assessment-id 3]
+    python question_bank.py import questions.jsonl.gz --username admin [--assessment-id 3]
+
+Uses the same format as GET /api/v1/questions/export and POST /api/v1/questions/import.
+"""
+
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.connection import get_db
+from models import user, question, choice, topic, assessment, assessment_question, user_assessment, user_answer, question_version  # noqa: F401
+from models.user import User
+from services.question_bank_service import QuestionBankService
+
+def export_bank(path: str, assessment_id=None):
+    db = next(get_db())
+    start = time.perf_counter()
+    size = 0
+    with open(path, "wb") as out:
+        for chunk in QuestionBankService.iter_export(db, assessment_id):
+            out.write(chunk)
+            size += len(chunk)
+    print(f"Exported to {path} ({size} bytes) in {time.perf_counter() - start:.1f}s")
+
+def import_bank(path: str, username: str, assessment_id=None):
+    db = next(get_db())
+    owner = db.query(User).filter(User.username == username).first()
+    if not owner:
+        print(f"User '{username}' not found!")
+        sys.exit(1)
+    start = time.perf_counter()
+    with open(path, "rb") as src:
+        try:
+            result = QuestionBankService.import_bank(db, src, owner.id, assessment_id)
+        except ValueError as e:
+            db.rollback()
+            print(f"Import failed: {e}")
+            sys.exit(1)
+    print(f"Imported {result['imported']} questions in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--assessment-id", type=int, default=None)
+    parser.add_argument("--username", default="admin", help="owner of imported questions")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        export_bank(args.path, args.assessment_id)
+    else:
+        import_bank(args.path, args.username, args.assessment_id)
@@ -1,40 +1,48 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from typing import List
 
 from database.connection import get_db
-from models.user import User
-from models.question import Question
-from models.choice import Choice
 from schemas.ai import (
     QuestionGenerationRequest,
     QuestionGenerationResponse,
-    GeneratedQuestion,
-    GeneratedChoice,
-    DifficultyLevel
+    AIJobCreate,
+    AIJob as AIJobSchema,
+    AICampaignCreate,
+    AICampaign as AICampaignSchema,
+    AICampaignDetail
 )
-from auth.jwt import get_current_user, require_admin
-from services.ai_service import AIService
+from models.ai_job import AIGenerationJob
+from models.ai_campaign import AICampaign
+from auth.jwt import require_admin
+from schemas.user import TokenData
+from services.ai_service import AIService, get_ai_service
+from services.question_service import QuestionService
+from services.ai_job_service import AIJobRunner, JobQueueFull, get_ai_job_runner
+from services.ai_campaign_service import AICampaignRunner, get_ai_campaign_runner
 
 router = APIRouter(prefix="/ai", tags=["AI Services"])
 
 @router.post("/generate-questions", response_model=QuestionGenerationResponse)
-def generate_questions(
+async def generate_questions(
     request: QuestionGenerationRequest,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
+    ai_service: AIService = Depends(get_ai_service),
     db: Session = Depends(get_db)
 ):
     """Generate questions using AI (admin only)."""
     try:
-        ai_service = AIService()
-        generated_questions = ai_service.generate_questions(
+        generated_questions = await ai_service.generate_questions_async(
             topic=request.topic,
             difficulty=request.difficulty.value,
-            count=request.count
+            count=request.count,
+            use_cache=request.use_cache
         )
         
-        return QuestionGenerationResponse(question=generated_questions)
+        return QuestionGenerationResponse(question=generated_questions, requested=request.count)
     
     except Exception as e:
         raise HTTPException(
@@ -42,50 +50,68 @@ def generate_questions(
             detail=f"Failed to generate questions: {str(e)}"
         )
 
+@router.post("/generate-questions/stream")
+async def stream_generate_questions(
+    request: QuestionGenerationRequest,
+    current_user: TokenData = Depends(require_admin),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """Stream generated questions as NDJSON, one line per question (admin only).
+
+    Lines are ``{"type": "question", "question": {...}}``, followed by either
+    ``{"type": "done", "count": n}`` or ``{"type": "error", "detail": ...}``.
+    """
+    if not ai_service.configured:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gemini API key not configured"
+        )
+
+    async def lines():
+        emitted = 0
+        try:
+            async for question in ai_service.stream_questions(
+                topic=request.topic,
+                difficulty=request.difficulty.value,
+                count=request.count,
+                use_cache=request.use_cache
+            ):
+                emitted += 1
+                yield json.dumps({"type": "question", "question": question.model_dump()}) + "\n"
+            yield json.dumps({"type": "done", "count": emitted}) + "\n"
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band.
+            yield json.dumps({"type": "error", "detail": f"Failed to generate questions: {str(e)}"}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.post("/generate-questions-and-save")
-def generate_and_save_questions(
+async def generate_and_save_questions(
     request: QuestionGenerationRequest,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
+    ai_service: AIService = Depends(get_ai_service),
     db: Session = Depends(get_db)
 ):
-    """Generate questions using AI and save them to database (admin only)."""
+    """Generate questions using AI and save them to database (admin only).
+
+    Always generates afresh: a cached result would save the same questions
+    to the bank again.
+    """
     try:
-        ai_service = AIService()
-        generated_questions = ai_service.generate_questions(
+        generated_questions = await ai_service.generate_questions_async(
             topic=request.topic,
             difficulty=request.difficulty.value,
-            count=request.count
+            count=request.count,
+            use_cache=False
         )
         
-        saved_questions = []
-        
-        for gen_question in generated_questions:
-            # Create question
-            db_question = Question(
-                question_text=gen_question.question_text,
-                topic=gen_question.topic,
-                level=gen_question.level,
-                created_by_user_id=current_user.id
-            )
-            
-            db.add(db_question)
-            db.flush()
-            
-            # Create choices
-            for choice_data in gen_question.choices:
-                db_choice = Choice(
-                    choice_text=choice_data.choice_text,
-                    iss_correct=choice_data.is_correct,
-                    question_id=db_question.id
-                )
-                db.add(db_choice)
-            
-            saved_questions.append(db_question)
-        
-        db.commit()
+        # Inserting is blocking DB work; keep it off the event loop
+        saved_ids = await run_in_threadpool(
+            QuestionService.save_generated_questions, db, generated_questions, current_user.id
+        )
         
         return {
-            "message": f"Successfully generated and saved {len(saved_questions)} questions",
+            "message": f"Successfully generated and saved {len(saved_ids)} of {request.count} questions",
             "questions": generated_questions
         }
     
@@ -93,4 +119,194 @@ def generate_and_save_questions(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate and save questions: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/health")
+async def ai_health(
+    current_user: TokenData = Depends(require_admin),
+    ai_service: AIService = Depends(get_ai_service),
+    runner: AIJobRunner = Depends(get_ai_job_runner),
+    campaign_runner: AICampaignRunner = Depends(get_ai_campaign_runner)
+):
+    """Detailed state of the shared AI client, job workers and campaign scheduler (admin only)."""
+    return {**ai_service.health(), "jobs": runner.stats(), "campaigns": campaign_runner.stats()}
+
+@router.get("/metrics")
+async def ai_metrics(
+    current_user: TokenData = Depends(require_admin),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """Latency, token, parse-time and retry histograms of model calls in this process (admin only)."""
+    return ai_service.metrics_snapshot()
+
+def _job_response(job: AIGenerationJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status.value,
+        "topic": job.topic,
+        "difficulty": job.difficulty,
+        "count": job.count,
+        "save": job.save,
+        "generated_count": job.generated_count,
+        "questions": job.result or [],
+        "saved_question_ids": job.saved_question_ids,
+        "metrics": job.metrics,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+def _get_own_job(db: Session, job_id: str, current_user: TokenData) -> AIGenerationJob:
+    job = db.query(AIGenerationJob).filter(
+        AIGenerationJob.id == job_id,
+        AIGenerationJob.created_by_user_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+# Submitting and cancelling touch the runner's asyncio queue and tasks, so
+# these two routes must run on the event loop rather than in the threadpool.
+@router.post("/jobs", response_model=AIJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_job(
+    request: AIJobCreate,
+    current_user: TokenData = Depends(require_admin),
+    runner: AIJobRunner = Depends(get_ai_job_runner),
+    db: Session = Depends(get_db)
+):
+    """Queue a generation job and return immediately; poll GET /ai/jobs/{job_id} (admin only)."""
+    try:
+        job = runner.submit(db, current_user.id, request)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many generation jobs queued, try again shortly",
+            headers={"Retry-After": "30"}
+        )
+    return _job_response(job)
+
+@router.get("/jobs", response_model=List[AIJobSchema])
+def list_generation_jobs(
+    limit: int = 20,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """List your most recent generation jobs (admin only)."""
+    jobs = db.query(AIGenerationJob).filter(
+        AIGenerationJob.created_by_user_id == current_user.id
+    ).order_by(AIGenerationJob.created_at.desc()).limit(limit).all()
+    return [_job_response(job) for job in jobs]
+
+@router.get("/jobs/{job_id}", response_model=AIJobSchema)
+def get_generation_job(
+    job_id: str,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Get a job's status and the questions generated so far (admin only)."""
+    return _job_response(_get_own_job(db, job_id, current_user))
+
+@router.delete("/jobs/{job_id}", response_model=AIJobSchema)
+async def cancel_generation_job(
+    job_id: str,
+    current_user: TokenData = Depends(require_admin),
+    runner: AIJobRunner = Depends(get_ai_job_runner),
+    db: Session = Depends(get_db)
+):
+    """Cancel a queued or running job (admin only)."""
+    job = _get_own_job(db, job_id, current_user)
+    return _job_response(runner.cancel(db, job))
+
+def _campaign_response(campaign: AICampaign, with_items: bool = False) -> dict:
+    response = {
+        "id": campaign.id,
+        "name": campaign.name,
+        "status": campaign.status.value,
+        "total_items": campaign.total_items,
+        "completed_items": campaign.completed_items,
+        "failed_items": campaign.failed_items,
+        "generated_count": campaign.generated_count,
+        "error": campaign.error,
+        "created_at": campaign.created_at,
+        "started_at": campaign.started_at,
+        "finished_at": campaign.finished_at
+    }
+    if with_items:
+        response["items"] = [
+            {
+                "id": item.id,
+                "position": item.position,
+                "topic": item.topic,
+                "difficulty": item.difficulty,
+                "count": item.count,
+                "status": item.status.value,
+                "attempts": item.attempts,
+                "generated_count": item.generated_count,
+                "saved_question_ids": item.saved_question_ids,
+                "error": item.error,
+                "finished_at": item.finished_at
+            }
+            for item in campaign.items
+        ]
+    return response
+
+def _get_own_campaign(db: Session, campaign_id: str, current_user: TokenData) -> AICampaign:
+    campaign = db.query(AICampaign).filter(
+        AICampaign.id == campaign_id,
+        AICampaign.created_by_user_id == current_user.id
+    ).first()
+    if not campaign:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found"
+        )
+    return campaign
+
+@router.post("/campaigns", response_model=AICampaignSchema, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_campaign(
+    request: AICampaignCreate,
+    current_user: TokenData = Depends(require_admin),
+    runner: AICampaignRunner = Depends(get_ai_campaign_runner),
+    db: Session = Depends(get_db)
+):
+    """Generate and save questions for many topics under the provider rate limit (admin only).
+
+    Returns immediately; poll GET /ai/campaigns/{campaign_id} for progress.
+    """
+    return _campaign_response(runner.submit(db, current_user.id, request))
+
+@router.get("/campaigns", response_model=List[AICampaignSchema])
+def list_generation_campaigns(
+    limit: int = 20,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """List your most recent campaigns (admin only)."""
+    campaigns = db.query(AICampaign).filter(
+        AICampaign.created_by_user_id == current_user.id
+    ).order_by(AICampaign.created_at.desc()).limit(limit).all()
+    return [_campaign_response(campaign) for campaign in campaigns]
+
+@router.get("/campaigns/{campaign_id}", response_model=AICampaignDetail)
+def get_generation_campaign(
+    campaign_id: str,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Get a campaign's progress and the state of every item (admin only)."""
+    return _campaign_response(_get_own_campaign(db, campaign_id, current_user), with_items=True)
+
+@router.delete("/campaigns/{campaign_id}", response_model=AICampaignSchema)
+async def cancel_generation_campaign(
+    campaign_id: str,
+    current_user: TokenData = Depends(require_admin),
+    runner: AICampaignRunner = Depends(get_ai_campaign_runner),
+    db: Session = Depends(get_db)
+):
+    """Cancel a campaign; items already saved are kept (admin only)."""
+    campaign = _get_own_campaign(db, campaign_id, current_user)
+    return _campaign_response(runner.cancel(db, campaign))
@@ -1,9 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status,BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime
-from utils.email import send_invite_email
 from database.connection import get_db
 from models.user import User
 from models.assessment import Assessment
@@ -16,16 +15,21 @@ from schemas.assessment import (
     AssessmentWithQuestions,
     AssessmentForDashboard
 )
-from models.user_assessment import UserAssessment, AssessmentStatus
-from auth.jwt import get_current_user, require_admin, require_student
-from schemas.invite import InviteCreate
+from auth.jwt import get_current_user, get_current_identity, require_admin
+from schemas.user import TokenData
+from schemas.question import PinnedQuestion
+from schemas.invite import InviteCreate, InviteCampaign as InviteCampaignSchema
+from models.invite_campaign import InviteCampaign
+from services.question_version_service import QuestionVersionService
+from services.email_outbox_service import EmailOutboxService
+from services.invite_service import InviteService, InviteCampaignService, CampaignTooLarge
 
 router = APIRouter(prefix="/assessments", tags=["Assessments"])
 
 @router.post("/create", response_model=AssessmentSchema,status_code=status.HTTP_201_CREATED)
 def create_assessment(
     assessment_data: AssessmentCreate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Create a new assessment (admin only)."""
@@ -49,11 +53,13 @@ def create_assessment(
     db.flush()
     db.refresh(db_assessment)
     
-    # Add questions to assessment
+    # Add questions to assessment, pinned to the version they have right now
+    version_ids = QuestionVersionService.current_version_ids(db, assessment_data.question_ids)
     for question_id in assessment_data.question_ids:
         assessment_question = AssessmentQuestion(
             assessment_id=db_assessment.id,
-            question_id=question_id
+            question_id=question_id,
+            question_version_id=version_ids.get(question_id)
         )
         db.add(assessment_question)
     
@@ -62,7 +68,7 @@ def create_assessment(
 
 @router.get("/", response_model=List[AssessmentForDashboard])
 def get_assessments(  # Removed async, as SQLAlchemy's default API is synchronous
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get all assessments (accessible by all authenticated users)."""
@@ -101,7 +107,7 @@ def get_assessments(  # Removed async, as SQLAlchemy's default API is synchronou
 @router.get("/{assessment_id}", response_model=AssessmentWithQuestions)
 async def get_assessment(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get a specific assessment with question details."""
@@ -130,46 +136,107 @@ async def get_assessment(
 async def invite_students_to_assessment(
     assessment_id: int,
     invite_data: InviteCreate, # The Pydantic schema with a list of emails
-    background_tasks:BackgroundTasks,
     db: Session = Depends(get_db),
     current_recruiter: User = Depends(get_current_user)):
     """
     Allows a logged-in recruiter to invite a list of students to a specific assessment.
     """
-    invitations_to_email = []
-    for email in invite_data.emails:
-        # Create a new record using your hybrid model
-        new_assessment_record = UserAssessment(
-            student_email=email,
-            recruiter_id=current_recruiter.id,
-            assessment_id=assessment_id,
-            status=AssessmentStatus.INVITED,
-            # user_id is automatically NULL here
-        )
-        db.add(new_assessment_record)
-        invitations_to_email.append(new_assessment_record)
+    if not db.query(Assessment.id).filter(Assessment.id == assessment_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
 
+    # Emails already invited are skipped; the invite emails are queued in the same
+    # transaction and delivered by email_worker.py
+    invited = InviteService.invite(db, current_recruiter, assessment_id, invite_data.emails,
+                                   send_at=invite_data.send_at)
     db.commit()
-    
-    for record in invitations_to_email:
-        db.refresh(record) # Get the auto-generated unique_token
-        invitation_link = f"https://your-frontend-app.com/take-quiz?token={record.unique_token}"
-        
-        background_tasks.add_task(
-            send_invite_email,
-            recipient_email=record.student_email,
-            recruiter=current_recruiter,
-            invitation_link=invitation_link
+
+    return {
+        "message": f"Invitations are being sent to {invited} student(s).",
+        "already_invited": len(set(invite_data.emails)) - invited
+    }
+
+def _invite_campaign_response(db: Session, campaign: InviteCampaign) -> dict:
+    return {
+        "id": campaign.id,
+        "assessment_id": campaign.assessment_id,
+        "status": campaign.status.value,
+        "total_rows": campaign.total_rows,
+        "invited_count": campaign.invited_count,
+        "duplicate_count": campaign.duplicate_count,
+        "invalid_count": campaign.invalid_count,
+        "emails": EmailOutboxService.campaign_progress(db, campaign.id),
+        "error": campaign.error,
+        "created_at": campaign.created_at,
+        "finished_at": campaign.finished_at
+    }
+
+@router.post("/{assessment_id}/invite/campaigns", response_model=InviteCampaignSchema,
+             status_code=status.HTTP_201_CREATED)
+async def invite_students_from_csv(
+    assessment_id: int,
+    request: Request,
+    send_at: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_recruiter: User = Depends(get_current_user)):
+    """
+    Invites every address in a CSV request body (Content-Type: text/csv) to the assessment.
+
+    One address per row, or a header row with an "email" column; up to
+    INVITE_CAMPAIGN_MAX_EMAILS rows. The emails go out after other mail, from
+    send_at if given. The body is processed as it streams in, so poll GET /assessments/{assessment_id}/invite/campaigns for progress.
+    """
+    if not db.query(Assessment.id).filter(Assessment.id == assessment_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+
+    campaign = InviteCampaignService.create(db, current_recruiter.id, assessment_id)
+    try:
+        campaign = await InviteCampaignService.run(db, campaign, current_recruiter, request.stream(), send_at)
+    except CampaignTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{e}; campaign {campaign.id} stopped after {campaign.total_rows} rows"
         )
+    return _invite_campaign_response(db, campaign)
 
-    return {"message": f"Invitations are being sent to {len(invite_data.emails)} student(s)."}
+@router.get("/{assessment_id}/invite/campaigns", response_model=List[InviteCampaignSchema])
+def get_invite_campaigns(
+    assessment_id: int,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_identity)):
+    """
+    Lists your most recent CSV invite campaigns for the assessment, with upload and delivery progress.
+    """
+    campaigns = db.query(InviteCampaign).filter(
+        InviteCampaign.assessment_id == assessment_id,
+        InviteCampaign.recruiter_id == current_user.id
+    ).order_by(InviteCampaign.created_at.desc()).limit(limit).all()
+    return [_invite_campaign_response(db, campaign) for campaign in campaigns]
+
+@router.get("/{assessment_id}/invite/campaigns/{campaign_id}", response_model=InviteCampaignSchema)
+def get_invite_campaign(
+    assessment_id: int,
+    campaign_id: str,
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_identity)):
+    """
+    Gets one CSV invite campaign's upload and delivery progress.
+    """
+    campaign = db.query(InviteCampaign).filter(
+        InviteCampaign.id == campaign_id,
+        InviteCampaign.assessment_id == assessment_id,
+        InviteCampaign.recruiter_id == current_user.id
+    ).first()
+    if not campaign:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+    return _invite_campaign_response(db, campaign)
     
 
 @router.put("/{assessment_id}", response_model=AssessmentSchema)
 async def update_assessment(
     assessment_id: int,
     assessment_data: AssessmentUpdate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Update an assessment (admin only)."""
@@ -193,7 +260,7 @@ async def update_assessment(
 @router.delete("/{assessment_id}")
 async def delete_assessment(
     assessment_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete an assessment (admin only)."""
@@ -212,7 +279,7 @@ async def delete_assessment(
 async def add_questions_to_assessment(
     assessment_id: int,
     question_ids: List[int],
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Add questions to an assessment (admin only)."""
@@ -244,11 +311,13 @@ async def add_questions_to_assessment(
                 detail=f"Question {question_id} is already in this assessment"
             )
     
-    # Add questions
+    # Add questions, pinned to the version they have right now
+    version_ids = QuestionVersionService.current_version_ids(db, question_ids)
     for question_id in question_ids:
         assessment_question = AssessmentQuestion(
             assessment_id=assessment_id,
-            question_id=question_id
+            question_id=question_id,
+            question_version_id=version_ids.get(question_id)
         )
         db.add(assessment_question)
     
@@ -259,7 +328,7 @@ async def add_questions_to_assessment(
 async def remove_question_from_assessment(
     assessment_id: int,
     question_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Remove a question from an assessment (admin only)."""
@@ -278,13 +347,19 @@ async def remove_question_from_assessment(
     db.commit()
     return {"message": "Question removed from assessment"}
 
-@router.get("/{assessment_id}/questions")
+@router.get("/{assessment_id}/questions", response_model=List[PinnedQuestion], response_model_exclude_none=True)
 async def get_assessment_questions(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
-    """Get all questions in an assessment."""
+    """Get all questions in an assessment, as pinned when they were added.
+
+    Questions and choices come from the pinned question versions, the same
+    content submit_assessment grades against, so later edits to a question
+    never change what this assessment shows. Only admins see which choice
+    is correct.
+    """
     assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
     if not assessment:
         raise HTTPException(
@@ -292,8 +367,30 @@ async def get_assessment_questions(
             detail="Assessment not found"
         )
     
-    questions = db.query(Question).join(AssessmentQuestion).filter(
+    assessment_questions = db.query(AssessmentQuestion).filter(
         AssessmentQuestion.assessment_id == assessment_id
-    ).all()
+    ).order_by(AssessmentQuestion.question_id).all()
+    versions_map = QuestionVersionService.get_versions_by_ids(
+        db, (aq.question_version_id for aq in assessment_questions)
+    )
+    is_admin = current_user.role.lower() == "admin"
     
-    return questions 
\ No newline at end of file
+    questions = []
+    for aq in assessment_questions:
+        content = versions_map.get(aq.question_version_id)
+        if content is None:
+            # Added before versioning: only the live question is available
+            content = QuestionVersionService.build_content(db, aq.question)
+        questions.append({
+            "id": aq.question_id,
+            "question_version_id": aq.question_version_id,
+            "question_text": content["q"],
+            "topic": content["t"],
+            "level": content["l"],
+            "marks": content["m"],
+            "choices": [
+                {"id": choice_id, "choice_text": text, "iss_correct": correct if is_admin else None}
+                for choice_id, text, correct in content["c"]
+            ]
+        })
+    return questions
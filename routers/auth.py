@@ -1,34 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status,BackgroundTasks
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from typing import Optional
 from database.connection import get_db
 from models.user import User
-from schemas.user import UserCreate, UserLogin, Token, User as UserSchema
+from schemas.user import UserCreate, UserLogin, Token, TokenData, RefreshRequest, User as UserSchema
 from auth.jwt import (
     authenticate_user, 
     create_access_token, 
-    get_password_hash, 
+    get_password_hash_async,
     get_current_user,
+    get_current_identity,
     require_admin,
-    verify_password
+    verify_password_async,
+    verify_token,
+    forget_verified_token,
+    invalidate_user,
+    security
 )
+from auth.login_throttle import login_throttle, client_ip
+from services.token_service import TokenService, RefreshTokenInvalid
 from config.settings import settings
-from utils.email import send_invite_email,send_welcome_email
+from services.email_outbox_service import EmailOutboxService
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Login endpoint for users."""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    # Before any lookup or bcrypt work, so a flood of guesses costs almost nothing
+    ip = client_ip(request)
+    retry_after = await login_throttle.check_async(user_credentials.username, ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    await login_throttle.succeeded_async(user_credentials.username, ip)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -36,6 +53,8 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         data={"sub": user.username, "user_id": user.id, "role": user.role},
         expires_delta=access_token_expires
     )
+    refresh_token = TokenService.issue_refresh_token(db, user.id)
+    db.commit()
     
     # Return the role for the token
     primary_role = user.role
@@ -44,11 +63,17 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         "access_token": access_token,
         "token_type": "bearer",
         "role": primary_role,
-        "username": user.username
+        "username": user.username,
+        "refresh_token": refresh_token
     }
 
+@router.get("/login-throttle")
+async def get_login_throttle_stats(current_user: TokenData = Depends(require_admin)):
+    """Login throttling settings and allowed/blocked attempt counters for this process (admin only)."""
+    return login_throttle.stats()
+
 @router.post("/register", response_model=UserSchema,status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate,background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user (admin only)."""
     # Check if username already exists
     existing_user = db.query(User).filter(User.username == user_data.username).first()
@@ -65,7 +90,8 @@ async def register(user_data: UserCreate,background_tasks: BackgroundTasks, db:
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    db.close()  # don't hold a database connection while bcrypt runs
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -75,15 +101,15 @@ async def register(user_data: UserCreate,background_tasks: BackgroundTasks, db:
     )
     
     db.add(db_user)
+    # Committed with the user, then delivered by email_worker.py
+    EmailOutboxService.enqueue(db, "welcome", db_user.email, {"username": db_user.username})
     db.commit()
     db.refresh(db_user)
-
-    background_tasks.add_task(send_welcome_email,db_user.email,db_user.username)
     
     return db_user
 
 @router.post("/register/student", response_model=UserSchema)
-async def register_student(user_data: UserCreate,background_tasks:BackgroundTasks, db: Session = Depends(get_db)):
+async def register_student(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new student (public endpoint)."""
     # Check if username already exists
     existing_user = db.query(User).filter(User.username == user_data.username).first()
@@ -100,7 +126,8 @@ async def register_student(user_data: UserCreate,background_tasks:BackgroundTask
         )
     
     # Create new student (force role to Student)
-    hashed_password = get_password_hash(user_data.password)
+    db.close()  # don't hold a database connection while bcrypt runs
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         name=user_data.name,
         # IMPORTANT: Add the email field from the request data
@@ -111,10 +138,10 @@ async def register_student(user_data: UserCreate,background_tasks:BackgroundTask
     )
     
     db.add(db_user)
+    # Committed with the user, then delivered by email_worker.py
+    EmailOutboxService.enqueue(db, "welcome", db_user.email, {"username": db_user.username})
     db.commit()
     db.refresh(db_user)
-    # NEW: Add the email task to the background
-    background_tasks.add_task(send_welcome_email, db_user.email, db_user.username)
     
     return db_user
 
@@ -124,42 +151,86 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_user)):
-    """Refresh access token."""
+async def refresh_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a new refresh token.
+
+    Works after the access token has expired. The refresh token is single
+    use; keep the one returned.
+    """
+    try:
+        user_id, new_refresh_token = TokenService.rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenInvalid as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": current_user.username, "user_id": current_user.id, "role": current_user.role},
+        data={"sub": user.username, "user_id": user.id, "role": user.role},
         expires_delta=access_token_expires
     )
+    db.commit()
     
-    primary_role = current_user.role
+    primary_role = user.role
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
         "role": primary_role,
-        "username": current_user.username
+        "username": user.username,
+        "refresh_token": new_refresh_token
     }
 
+@router.post("/logout")
+async def logout(
+    request: Optional[RefreshRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: TokenData = Depends(get_current_identity),
+    db: Session = Depends(get_db)
+):
+    """Revoke the current access token and, if given, the refresh token's whole family."""
+    TokenService.revoke_access_token(db, verify_token(credentials.credentials))
+    if request is not None:
+        TokenService.revoke_refresh_token(db, request.refresh_token, current_user.id)
+    db.commit()
+    forget_verified_token(credentials.credentials)
+    
+    return {"message": "Logged out successfully"}
+
 @router.post("/change-password")
 async def change_password(
     old_password: str,
     new_password: str,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Change user password."""
-    from auth.jwt import verify_password, get_password_hash
-    
+    # Read the hash fresh; a cached copy may predate a change made through another process
+    stored_hash = db.query(User.password_hash).filter(User.id == current_user.id).scalar()
+    # Don't hold a database connection while bcrypt runs
+    db.close()
+
     # Verify old password
-    if not verify_password(old_password, current_user.password_hash):
+    if stored_hash is None or not await verify_password_async(old_password, stored_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
     
     # Update password
-    current_user.password_hash = get_password_hash(new_password)
+    new_hash = await get_password_hash_async(new_password)
+    db.query(User).filter(User.id == current_user.id).update({"password_hash": new_hash})
+    # Other sessions can't refresh past their current access token
+    TokenService.revoke_user_refresh_tokens(db, current_user.id)
     db.commit()
+    invalidate_user(current_user.id)
     
     return {"message": "Password changed successfully"}
@@ -1,9 +1,13 @@
 # In file: routers/invites.py
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database.connection import get_db
 from schemas.invite import InviteCreate # Make sure to import your schema
 from models.user import User
-from auth.jwt import get_current_user
-from utils.email import send_invite_email
+from auth.jwt import get_current_user, require_admin
+from schemas.user import TokenData
+from services.email_outbox_service import EmailOutboxService
+from utils.email import invite_context
 
 # Define your frontend URL (replace with your actual domain later)
 FRONTEND_URL = "http://localhost:8501" 
@@ -13,7 +17,7 @@ router = APIRouter(prefix="/invites", tags=["Invitations"])
 @router.post("/send")
 async def send_quiz_invite(
     payload: InviteCreate,
-    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
     current_recruiter: User = Depends(get_current_user)
 ):
     for student_email in payload.emails:
@@ -21,12 +25,18 @@ async def send_quiz_invite(
         # A simple link can include the assessment ID and email.
         # For better security, you would generate and store a unique token here.
         invitation_link = f"{FRONTEND_URL}/?page=take_assessment&id={payload.assessment_id}"
-        
-        background_tasks.add_task(
-            send_invite_email,
-            recipient_email=student_email,
-            recruiter=current_recruiter,
-            invitation_link=invitation_link # Pass the generated link
-        )
+        EmailOutboxService.enqueue(db, "invite", student_email, invite_context(current_recruiter, invitation_link),
+                                   send_at=payload.send_at)
 
-    return {"message": f"Invitations for assessment sent to {len(payload.emails)} student(s)."}
\ No newline at end of file
+    # Delivered by email_worker.py
+    db.commit()
+
+    return {"message": f"Invitations for assessment sent to {len(payload.emails)} student(s)."}
+
+@router.get("/queue")
+def get_email_queue_stats(
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(require_admin)
+):
+    """Email queue depth by status and priority, scheduled emails and the recent send rate (admin only)."""
+    return EmailOutboxService.stats(db)
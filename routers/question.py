@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
 from database.connection import get_db
-from models.user import User
 from models.question import Question
 from models.choice import Choice
+from models.assessment import Assessment
 from schemas.question import (
     QuestionCreate, 
     QuestionUpdate, 
@@ -15,18 +16,24 @@ from schemas.question import (
     Choice as ChoiceSchema,
     QuestionBulkCreate
 )
-from auth.jwt import get_current_user, require_admin, require_student
+from auth.jwt import get_current_identity, require_admin, require_student
+from schemas.user import TokenData
+from models.topic import Topic
+from services.topic_service import TopicService
+from services.question_version_service import QuestionVersionService
+from services.question_bank_service import QuestionBankService
 
 router = APIRouter(prefix="/questions", tags=["Questions"])
 
 @router.post("/bulk", response_model=List[QuestionSchema])
 async def create_questions_bulk(
     questions_data: QuestionBulkCreate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Create multiple questions at once (admin only)."""
     created_questions = []
+    topic_cache = {}
     
     for question_data in questions_data.questions:
         # Validate that at least one choice is correct
@@ -38,9 +45,11 @@ async def create_questions_bulk(
             )
         
         # Create question
+        topic_node = TopicService.get_or_create_topic(db, question_data.topic, topic_cache)
         db_question = Question(
             question_text=question_data.question_text,
             topic=question_data.topic,
+            topic_id=topic_node.id if topic_node else None,
             level=question_data.level,
             created_by_user_id=current_user.id
         )
@@ -58,24 +67,78 @@ async def create_questions_bulk(
             )
             db.add(db_choice)
         
+        db.flush()
+        QuestionVersionService.snapshot(db, db_question)
         created_questions.append(db_question)
     
     db.commit()
     return created_questions
 
+@router.get("/export")
+def export_questions(
+    assessment_id: Optional[int] = None,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Stream the question bank, or one assessment's questions, as gzip JSONL (admin only)."""
+    filename = f"questions-assessment-{assessment_id}.jsonl.gz" if assessment_id else "questions.jsonl.gz"
+    return StreamingResponse(
+        QuestionBankService.iter_export(db, assessment_id),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/import")
+def import_questions(
+    file: UploadFile = File(...),
+    assessment_id: Optional[int] = None,
+    current_user: TokenData = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Import a gzip JSONL export produced by /questions/export (admin only).
+
+    The import is all or nothing: a malformed line rejects the whole file.
+    """
+    if assessment_id is not None and not db.query(Assessment.id).filter(Assessment.id == assessment_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assessment not found"
+        )
+    try:
+        result = QuestionBankService.import_bank(db, file.file, current_user.id, assessment_id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"message": f"Imported {result['imported']} questions", **result}
+
 @router.get("/", response_model=List[QuestionSchema])
 async def get_questions(
     skip: int = 0,
     limit: int = 100,
     topic: Optional[str] = None,
     level: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    include_subtopics: bool = False,
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
-    """Get all questions with optional filtering."""
+    """Get all questions with optional filtering.
+
+    With ``include_subtopics`` the topic is matched against the taxonomy, so
+    ``topic=Python`` also returns questions filed under "Python > Async".
+    """
     query = db.query(Question)
     
-    if topic:
+    if topic and include_subtopics:
+        path = TopicService.normalize_path(topic)
+        if path is None:
+            return []
+        query = query.join(Topic, Question.topic_id == Topic.id).filter(
+            TopicService.subtree_filter(path)
+        )
+    elif topic:
         query = query.filter(Question.topic == topic)
     if level:
         query = query.filter(Question.level == level)
@@ -86,7 +149,7 @@ async def get_questions(
 @router.get("/{question_id}", response_model=QuestionSchema)
 async def get_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get a specific question."""
@@ -102,7 +165,7 @@ async def get_question(
 async def update_question(
     question_id: int,
     question_data: QuestionUpdate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Update a question (admin only)."""
@@ -118,9 +181,12 @@ async def update_question(
         question.question_text = question_data.question_text
     if question_data.topic is not None:
         question.topic = question_data.topic
+        topic_node = TopicService.get_or_create_topic(db, question_data.topic)
+        question.topic_id = topic_node.id if topic_node else None
     if question_data.level is not None:
         question.level = question_data.level
     
+    QuestionVersionService.snapshot(db, question)
     db.commit()
     db.refresh(question)
     return question
@@ -128,7 +194,7 @@ async def update_question(
 @router.delete("/{question_id}")
 async def delete_question(
     question_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete a question (admin only)."""
@@ -145,7 +211,7 @@ async def delete_question(
 
 @router.get("/topics")
 async def get_topics(
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get all unique topics."""
@@ -154,7 +220,7 @@ async def get_topics(
 
 @router.get("/levels")
 async def get_levels(
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get all unique levels."""
@@ -165,7 +231,7 @@ async def get_levels(
 async def add_choice_to_question(
     question_id: int,
     choice_data: ChoiceCreate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Add a choice to a question (admin only)."""
@@ -183,6 +249,8 @@ async def add_choice_to_question(
     )
     
     db.add(db_choice)
+    db.flush()
+    QuestionVersionService.snapshot(db, question)
     db.commit()
     db.refresh(db_choice)
     return db_choice
@@ -191,32 +259,44 @@ async def add_choice_to_question(
 async def update_choice(
     choice_id: int,
     choice_data: ChoiceCreate,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """Update a choice (admin only)."""
-    choice = db.query(Choice).filter(Choice.id == choice_id).first()
+    """Update a choice (admin only).
+
+    Choices are never changed in place: the edited choice is retired and
+    replaced by a new one, whose id is returned, so assessments pinned to
+    an earlier version keep grading and showing the choice they had.
+    """
+    choice = db.query(Choice).filter(Choice.id == choice_id, Choice.retired == False).first()
     if not choice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Choice not found"
         )
     
-    choice.choice_text = choice_data.choice_text
-    choice.iss_correct = choice_data.iss_correct
-    
+    question = choice.question
+    choice.retired = True
+    db_choice = Choice(
+        choice_text=choice_data.choice_text,
+        iss_correct=choice_data.iss_correct,
+        question_id=question.id
+    )
+    db.add(db_choice)
+    db.flush()
+    QuestionVersionService.snapshot(db, question)
     db.commit()
-    db.refresh(choice)
-    return choice
+    db.refresh(db_choice)
+    return db_choice
 
 @router.delete("/choices/{choice_id}")
 async def delete_choice(
     choice_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """Delete a choice (admin only)."""
-    choice = db.query(Choice).filter(Choice.id == choice_id).first()
+    """Delete a choice (admin only); it is retired, since earlier versions may still use it."""
+    choice = db.query(Choice).filter(Choice.id == choice_id, Choice.retired == False).first()
     if not choice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -227,7 +307,8 @@ async def delete_choice(
     if choice.iss_correct:
         correct_choices = db.query(Choice).filter(
             Choice.question_id == choice.question_id,
-            Choice.iss_correct == True
+            Choice.iss_correct == True,
+            Choice.retired == False
         ).count()
         
         if correct_choices <= 1:
@@ -236,6 +317,9 @@ async def delete_choice(
                 detail="Cannot delete the only correct choice"
             )
     
-    db.delete(choice)
+    question = choice.question
+    choice.retired = True
+    db.flush()
+    QuestionVersionService.snapshot(db, question)
     db.commit()
     return {"message": "Choice deleted successfully"} 
\ No newline at end of file
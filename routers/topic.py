@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from database.connection import get_db
+from models.topic import Topic
+from schemas.topic import Topic as TopicSchema
+from auth.jwt import get_current_identity
+from schemas.user import TokenData
+from services.topic_service import TopicService
+
+router = APIRouter(prefix="/topics", tags=["Topics"])
+
+@router.get("/", response_model=List[TopicSchema])
+async def get_topics(
+    under: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_identity),
+    db: Session = Depends(get_db)
+):
+    """Get the topic taxonomy in tree order, optionally limited to one subtree."""
+    return TopicService.get_topics(db, under=under)
+
+@router.get("/{topic_id}", response_model=TopicSchema)
+async def get_topic(
+    topic_id: int,
+    current_user: TokenData = Depends(get_current_identity),
+    db: Session = Depends(get_db)
+):
+    """Get a specific topic."""
+    topic = db.query(Topic).filter(Topic.id == topic_id).first()
+    if not topic:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Topic not found"
+        )
+    return topic
@@ -1,36 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import func
-from typing import List, Optional
-from datetime import datetime, timedelta, timezone # Added timezone
+from typing import List
+from datetime import datetime, timezone
+from config.settings import settings
 from database.connection import get_db
-from models.user import User
 from models.assessment import Assessment
 from models.user_assessment import UserAssessment
 from models.user_answer import UserAnswer
 from models.question import Question
 from models.choice import Choice
-from models.assessment_question import AssessmentQuestion
 from schemas.user_assessment import (
-    UserAssessmentCreate,
     UserAssessment as UserAssessmentSchema,
-    UserAnswerCreate,
     UserAnswer as UserAnswerSchema,
     AssessmentSubmission,
     AssessmentResult,
-    StudentDashboardAssessment
+    StudentDashboardAssessment,
+    AnswerReview
 )
-from auth.jwt import get_current_user, require_student, require_admin
+from auth.jwt import get_current_identity, require_student, require_admin
+from schemas.user import TokenData
+from services.question_version_service import QuestionVersionService
+from services.recruiter_digest_service import RecruiterDigestService
 
 router = APIRouter(prefix="/user-assessments", tags=["User Assessments"])
 
-# Add joinedload to your imports
-from sqlalchemy.orm import joinedload
-
 @router.get("/students/me/assessments", response_model=List[StudentDashboardAssessment])
 def get_student_assessments(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_identity)
 ):
     """Fetch all assessments assigned to or taken by the current student."""
     
@@ -56,7 +54,7 @@ def get_student_assessments(
 @router.post("/start", response_model=UserAssessmentSchema)
 async def start_assessment(
     assessment_id: int,
-    current_user: User = Depends(require_student),
+    current_user: TokenData = Depends(require_student),
     db: Session = Depends(get_db)
 ):
     """Start an assessment (student only)."""
@@ -98,7 +96,7 @@ async def start_assessment(
 async def submit_assessment(
     user_assessment_id: int,
     submission: AssessmentSubmission,
-    current_user: User = Depends(require_student),
+    current_user: TokenData = Depends(require_student),
     db: Session = Depends(get_db)
 ):
     """Submit answers for an assessment (student only)."""
@@ -126,25 +124,41 @@ async def submit_assessment(
 
     # --- Part 2: Efficiently fetch all data in bulk (Replaces N+1 queries) ---
     
-    # Get all question IDs for this assessment
-    question_ids = [q.question_id for q in user_assessment.assessment.assessment_questions]
-    
-    # Get all relevant Question objects in one query
-    questions_from_db = db.query(Question).filter(Question.id.in_(question_ids)).all()
-    questions_map = {q.id: q for q in questions_from_db}
-
-    # Get all correct choices for these questions in one query
-    correct_choices_from_db = db.query(Choice).filter(
-        Choice.question_id.in_(question_ids), 
-        Choice.is_correct == True # Corrected from 'iss_correct'
-    ).all()
-    correct_choices_map = {c.question_id: c.id for c in correct_choices_from_db}
+    # Grade against the question versions pinned when the assessment was built,
+    # so later edits to a question can never change how this attempt is scored.
+    pinned_version_ids = {
+        aq.question_id: aq.question_version_id
+        for aq in user_assessment.assessment.assessment_questions
+    }
+    versions_map = QuestionVersionService.get_versions_by_ids(db, pinned_version_ids.values())
+
+    marks_map = {}
+    correct_choices_map = {}
+    for question_id, version_id in pinned_version_ids.items():
+        content = versions_map.get(version_id)
+        if content is None:
+            continue
+        marks_map[question_id] = content["m"]
+        correct_choices_map[question_id] = next((c[0] for c in content["c"] if c[2]), None)
+
+    # Assessments built before versioning have no pinned version; read the live rows in bulk
+    unpinned_ids = [qid for qid in pinned_version_ids if qid not in marks_map]
+    if unpinned_ids:
+        for q in db.query(Question).filter(Question.id.in_(unpinned_ids)).all():
+            marks_map[q.id] = q.marks
+        correct_choices_from_db = db.query(Choice).filter(
+            Choice.question_id.in_(unpinned_ids),
+            Choice.iss_correct == True,
+            Choice.retired == False
+        ).all()
+        for c in correct_choices_from_db:
+            correct_choices_map[c.question_id] = c.id
 
     # --- Part 3: Process answers with NO database calls inside the loop ---
     
     total_score = 0
     # Calculate total marks from the pre-fetched questions
-    total_marks = sum(q.marks for q in questions_map.values())
+    total_marks = sum(marks_map.values())
 
     for answer_data in submission.answers:
         question_id = answer_data.question_id
@@ -156,12 +170,13 @@ async def submit_assessment(
         
         if is_correct:
             # Look up the question's marks from our pre-fetched map
-            total_score += questions_map[question_id].marks
+            total_score += marks_map.get(question_id, 0)
 
         # Create the UserAnswer object to be saved
         user_answer = UserAnswer(
             user_assessment_id=user_assessment_id,
             question_id=answer_data.question_id,
+            question_version_id=pinned_version_ids.get(question_id),
             selected_choice_id=answer_data.selected_choice_id,
             is_correct=is_correct
         )
@@ -172,16 +187,26 @@ async def submit_assessment(
     user_assessment.score = total_score
     user_assessment.end_time = datetime.now(timezone.utc) # Use timezone-aware datetime
     user_assessment.status = "Completed" # Update the status
+
+    percentage = (total_score / total_marks * 100) if total_marks > 0 else 0
+
+    # Invited attempts count towards the recruiter's next digest, in this same transaction
+    if settings.RECRUITER_DIGESTS_ENABLED and user_assessment.recruiter_id:
+        RecruiterDigestService.record_completion(
+            db, user_assessment.recruiter_id,
+            candidate=user_assessment.student_email or current_user.username,
+            assessment=user_assessment.assessment.name,
+            score=total_score, total_marks=total_marks, percentage=percentage
+        )
     
     # Commit all changes (user answers and user assessment update) in one transaction
     db.commit()
     db.refresh(user_assessment)
     
-    percentage = (total_score / total_marks * 100) if total_marks > 0 else 0
-    
     return AssessmentResult(
         user_assessment_id=user_assessment_id,
         score=total_score,
+        total_questions=len(pinned_version_ids),
         total_marks=total_marks,
         percentage=percentage,
         completed_at=user_assessment.end_time
@@ -191,7 +216,7 @@ async def submit_assessment(
 @router.get("/{user_assessment_id}/answers", response_model=List[UserAnswerSchema])
 async def get_user_answers(
     user_assessment_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """Get answers for a user assessment."""
@@ -219,11 +244,61 @@ async def get_user_answers(
     
     return answers
 
+@router.get("/{user_assessment_id}/review", response_model=List[AnswerReview])
+async def review_user_answers(
+    user_assessment_id: int,
+    current_user: TokenData = Depends(get_current_identity),
+    db: Session = Depends(get_db)
+):
+    """Render a past attempt exactly as it was graded, from the pinned question versions."""
+    user_assessment = db.query(UserAssessment).filter(
+        UserAssessment.id == user_assessment_id
+    ).first()
+    
+    if not user_assessment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User assessment not found"
+        )
+    
+    if current_user.role.lower() != 'admin' and user_assessment.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    answers = db.query(UserAnswer).filter(
+        UserAnswer.user_assessment_id == user_assessment_id
+    ).all()
+    versions_map = QuestionVersionService.get_versions_by_ids(
+        db, (answer.question_version_id for answer in answers)
+    )
+    
+    response_data = []
+    for answer in answers:
+        content = versions_map.get(answer.question_version_id)
+        if content is None:
+            # Answers recorded before versioning can only be shown against the live question
+            content = QuestionVersionService.build_content(db, answer.question)
+        response_data.append({
+            "question_id": answer.question_id,
+            "question_version_id": answer.question_version_id,
+            "question_text": content["q"],
+            "marks": content["m"],
+            "choices": [
+                {"id": choice_id, "choice_text": text, "is_correct": correct}
+                for choice_id, text, correct in content["c"]
+            ],
+            "selected_choice_id": answer.selected_choice_id,
+            "is_correct": answer.is_correct
+        })
+    return response_data
+
 
 
 @router.get("/statistics")
 async def get_assessment_statistics(
-    current_user: User = Depends(require_admin),
+    current_user: TokenData = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get assessment statistics (admin only)."""
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
 from enum import Enum
 
 class DifficultyLevel(str, Enum):
@@ -10,7 +11,8 @@ class DifficultyLevel(str, Enum):
 class QuestionGenerationRequest(BaseModel):
     topic: str
     difficulty:DifficultyLevel=DifficultyLevel.MEDIUM
-    count:int = 5
+    count:int = Field(5, ge=1, le=100)
+    use_cache:bool = True  # False forces a fresh generation
 
 class GeneratedChoice(BaseModel):
     choice_text:str
@@ -23,4 +25,62 @@ class GeneratedQuestion(BaseModel):
     choices:List[GeneratedChoice]
 
 class QuestionGenerationResponse(BaseModel):
-    question:List[GeneratedQuestion]
\ No newline at end of file
+    question:List[GeneratedQuestion]
+    requested:Optional[int] = None  # the model can fall short of it; see len(question)
+
+class AIJobCreate(QuestionGenerationRequest):
+    save:bool = True  # save the generated questions to the bank when the job finishes; saving jobs skip the cache
+
+class AIJob(BaseModel):
+    id:str
+    status:str
+    topic:str
+    difficulty:str
+    count:int
+    save:bool
+    generated_count:int
+    questions:List[GeneratedQuestion] = []
+    saved_question_ids:Optional[List[int]] = None
+    metrics:Optional[dict] = None
+    error:Optional[str] = None
+    created_at:Optional[datetime] = None
+    started_at:Optional[datetime] = None
+    finished_at:Optional[datetime] = None
+
+class AICampaignItemCreate(BaseModel):
+    topic:str
+    difficulty:DifficultyLevel=DifficultyLevel.MEDIUM
+    count:int = Field(5, ge=1, le=100)
+
+class AICampaignCreate(BaseModel):
+    name:Optional[str] = None
+    items:List[AICampaignItemCreate] = Field(..., min_length=1, max_length=1000)
+
+class AICampaignItem(BaseModel):
+    id:int
+    position:int
+    topic:str
+    difficulty:str
+    count:int
+    status:str
+    attempts:int
+    generated_count:int
+    saved_question_ids:Optional[List[int]] = None
+    error:Optional[str] = None
+    finished_at:Optional[datetime] = None
+
+class AICampaign(BaseModel):
+    id:str
+    name:Optional[str] = None
+    status:str
+    total_items:int
+    completed_items:int
+    failed_items:int
+    generated_count:int
+    error:Optional[str] = None
+    created_at:Optional[datetime] = None
+    started_at:Optional[datetime] = None
+    finished_at:Optional[datetime] = None
+
+class AICampaignDetail(AICampaign):
+    items:List[AICampaignItem] = []
@@ -1,8 +1,24 @@
 # In file: schemas/invite.py
 
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import Dict, List, Optional
+from datetime import datetime
 
 class InviteCreate(BaseModel):
     emails: List[EmailStr]
-    assessment_id:int
\ No newline at end of file
+    assessment_id:int
+    send_at: Optional[datetime] = None  # schedule the emails; naive times are UTC
+
+
+class InviteCampaign(BaseModel):
+    id: str
+    assessment_id: int
+    status: str
+    total_rows: int
+    invited_count: int
+    duplicate_count: int
+    invalid_count: int
+    emails: Dict[str, int] = {}  # delivery progress: email count by outbox status
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
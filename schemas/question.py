@@ -41,6 +41,7 @@ class QuestionUpdate(BaseModel):
 
 class Question(QuestionBase):
     id: int
+    topic_id: Optional[int] = None
     created_by_user_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -50,4 +51,23 @@ class Question(QuestionBase):
         from_attributes = True
 
 class QuestionBulkCreate(BaseModel):
-    questions: List[QuestionCreate]
\ No newline at end of file
+    questions: List[QuestionCreate]
+
+# One record of a question-bank export (see services/question_bank_service.py)
+class QuestionTransfer(QuestionCreate):
+    marks: int = 1
+
+# A question as an assessment shows it, from the pinned version (see routers/assessment.py)
+class PinnedChoice(BaseModel):
+    id: int
+    choice_text: str
+    iss_correct: Optional[bool] = None  # admins only
+
+class PinnedQuestion(BaseModel):
+    id: int
+    question_version_id: Optional[int] = None
+    question_text: str
+    topic: Optional[str] = None
+    level: Optional[str] = None
+    marks: int
+    choices: List[PinnedChoice]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class TopicBase(BaseModel):
+    name: str
+    path: str
+    depth: int
+    parent_id: Optional[int] = None
+
+class Topic(TopicBase):
+    id: int
+
+    class Config:
+        from_attributes = True
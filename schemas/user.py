@@ -36,6 +36,10 @@ class Token(BaseModel):
     token_type: str
     role: str
     username: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username:Optional[str]=None
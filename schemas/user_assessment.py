@@ -33,10 +33,25 @@ class UserAnswerCreate(UserAnswerBase):
 class UserAnswer(UserAnswerBase):
     user_assessment_id: int
     is_correct: Optional[bool] = None
+    question_version_id: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+class ReviewedChoice(BaseModel):
+    id: int
+    choice_text: str
+    is_correct: bool
+
+class AnswerReview(BaseModel):
+    question_id: int
+    question_version_id: Optional[int] = None
+    question_text: str
+    marks: int
+    choices: List[ReviewedChoice]
+    selected_choice_id: Optional[int] = None
+    is_correct: Optional[bool] = None
+
 class AssessmentSubmission(BaseModel):
     answers: List[UserAnswerCreate]
 
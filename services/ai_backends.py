@@ -0,0 +1,216 @@
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator, Optional
+from config.settings import settings
+from services.ai_metrics import estimate_tokens
+
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+
+
+class ModelResponse:
+    """Raw model output plus the token usage the provider reported (None when it didn't)."""
+
+    def __init__(self, text: str, prompt_tokens: Optional[int] = None, response_tokens: Optional[int] = None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+
+class AIBackend:
+    """Text-in, text-out model interface used by AIService.
+
+    Backends only turn a prompt into raw model output; prompting, parsing,
+    validation and caching stay in AIService, so every backend exercises
+    the same pipeline.
+    """
+
+    name = "base"
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    def warm_up(self):
+        """Do any expensive setup now instead of on the first call."""
+
+    def generate(self, prompt: str) -> ModelResponse:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str) -> ModelResponse:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the output text in pieces as it is produced (all at once unless overridden)."""
+        yield (await self.generate_async(prompt)).text
+
+
+class GeminiBackend(AIBackend):
+    """Google Gemini; ``google.generativeai`` is imported the first time the model is needed."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = GEMINI_MODEL_NAME):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        """The shared GenerativeModel, built on first use (None if no API key)."""
+        if self._model is None and self.configured:
+            with self._model_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        return self.model
+
+    @staticmethod
+    def _to_response(response) -> ModelResponse:
+        # Older SDK versions don't expose usage_metadata; AIService then estimates.
+        usage = getattr(response, "usage_metadata", None)
+        return ModelResponse(
+            response.text,
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None)
+        )
+
+    def generate(self, prompt: str) -> ModelResponse:
+        return self._to_response(self.model.generate_content(prompt))
+
+    async def generate_async(self, prompt: str) -> ModelResponse:
+        return self._to_response(await self.model.generate_content_async(prompt))
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for piece in response:
+            yield piece.text
+
+
+class MockBackend(AIBackend):
+    """Deterministic offline stand-in for load tests and local development.
+
+    Reads the count, topic and difficulty back out of the prompt and answers
+    with well-formed questions after ``latency_seconds`` plus the time it
+    would take to emit the output at ``tokens_per_second`` (0 means
+    instantly). A ``malformed_rate`` fraction of responses is corrupted the
+    way real model output goes wrong: truncated JSON, prose instead of JSON,
+    or items with a missing field or no correct choice. The same prompt and
+    seed always produce the same output.
+    """
+
+    name = "mock"
+    CHARS_PER_TOKEN = 4
+    STREAM_PIECE_TOKENS = 16
+    PROMPT_PATTERN = re.compile(r'Generate (\d+) multiple choice questions about "(.*)" with (\w+) difficulty')
+    PART_PATTERN = re.compile(r"This is part (\d+) of")
+
+    def __init__(self, latency_seconds: float = 0.0, tokens_per_second: float = 0.0,
+                 malformed_rate: float = 0.0, seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.calls = 0
+        self.malformed = 0
+        self._lock = threading.Lock()
+
+    def _render(self, prompt: str) -> str:
+        match = self.PROMPT_PATTERN.search(prompt)
+        count, topic, difficulty = (int(match.group(1)), match.group(2), match.group(3)) if match else (1, "general", "medium")
+        part_match = self.PART_PATTERN.search(prompt)
+        part = part_match.group(1) if part_match else "1"
+        rng = random.Random(f"{self.seed}:{prompt}")
+
+        questions = []
+        for i in range(count):
+            correct = rng.randrange(4)
+            questions.append({
+                "question_text": f"[mock {part}.{i + 1}] Which statement about {topic} is correct? ({rng.getrandbits(32):08x})",
+                "topic": topic,
+                "level": difficulty,
+                "choices": [
+                    {"choice_text": f"Statement {chr(65 + j)}", "is_correct": j == correct}
+                    for j in range(4)
+                ]
+            })
+
+        with self._lock:
+            self.calls += 1
+            corrupt = rng.random() < self.malformed_rate
+            if corrupt:
+                self.malformed += 1
+        if corrupt:
+            kind = rng.choice(("truncated", "prose", "bad_items"))
+            if kind == "prose":
+                return "I'm sorry, I can only help with questions about other topics."
+            if kind == "bad_items":
+                for choice in questions[0]["choices"]:
+                    choice["is_correct"] = False
+                if len(questions) > 1:
+                    del questions[1]["choices"]
+            text = "```json\n" + json.dumps(questions, indent=2) + "\n```"
+            return text[:len(text) // 2] if kind == "truncated" else text
+        return "```json\n" + json.dumps(questions, indent=2) + "\n```"
+
+    def _emit_seconds(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return len(text) / self.CHARS_PER_TOKEN / self.tokens_per_second
+
+    def generate(self, prompt: str) -> ModelResponse:
+        text = self._render(prompt)
+        time.sleep(self.latency_seconds + self._emit_seconds(text))
+        return ModelResponse(text, estimate_tokens(prompt), estimate_tokens(text))
+
+    async def generate_async(self, prompt: str) -> ModelResponse:
+        text = self._render(prompt)
+        await asyncio.sleep(self.latency_seconds + self._emit_seconds(text))
+        return ModelResponse(text, estimate_tokens(prompt), estimate_tokens(text))
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        text = self._render(prompt)
+        await asyncio.sleep(self.latency_seconds)
+        step = self.STREAM_PIECE_TOKENS * self.CHARS_PER_TOKEN
+        for start in range(0, len(text), step):
+            piece = text[start:start + step]
+            await asyncio.sleep(self._emit_seconds(piece))
+            yield piece
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "malformed": self.malformed}
+
+
+def create_backend(name: Optional[str] = None) -> AIBackend:
+    """Build the backend selected by AI_BACKEND ('gemini' or 'mock')."""
+    name = (name or settings.AI_BACKEND).lower()
+    if name == "gemini":
+        return GeminiBackend(settings.GEMINI_API_KEY)
+    if name == "mock":
+        return MockBackend(
+            latency_seconds=settings.AI_MOCK_LATENCY_SECONDS,
+            tokens_per_second=settings.AI_MOCK_TOKENS_PER_SECOND,
+            malformed_rate=settings.AI_MOCK_MALFORMED_RATE,
+            seed=settings.AI_MOCK_SEED
+        )
+    raise ValueError(f"Unknown AI backend: {name}")
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+
+class AIResponseCache:
+    """Size-bounded, TTL'd on-disk cache of AI generation results.
+
+    Each entry is one JSON file named after the SHA-256 of its key, so every
+    worker process can read what another one wrote. Expiry is based on the
+    file's mtime. Each process keeps an in-memory LRU index of the files it
+    knows about and deletes the least recently used ones once the directory
+    grows past ``max_bytes``.
+
+    ``get_or_create`` coalesces concurrent misses for the same key into a
+    single call of the factory. If that call is cancelled, one of the
+    waiting callers takes over instead of failing them all.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # digest -> size, oldest first
+        self._total_bytes = 0
+        self._in_flight = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(topic: str, difficulty: str, count: int, prompt_version: int) -> str:
+        """Normalize the request so 'Python  Basics' and 'python basics' share an entry."""
+        normalized = {
+            "topic": " ".join(topic.casefold().split()),
+            "difficulty": difficulty.casefold(),
+            "count": int(count),
+            "prompt_version": prompt_version
+        }
+        return json.dumps(normalized, sort_keys=True)
+
+    def _digest(self, key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._index[digest] = size
+            self._total_bytes += size
+        self._evict()
+
+    def get(self, key: str):
+        """Return the cached value, or None if missing or expired."""
+        digest = self._digest(key)
+        path = self._path(digest)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                self._remove(digest)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        with self._lock:
+            if digest in self._index:
+                self._index.move_to_end(digest)
+            else:
+                # Written by another worker process; start tracking it.
+                self._index[digest] = os.path.getsize(path)
+                self._total_bytes += self._index[digest]
+        return value
+
+    def set(self, key: str, value):
+        digest = self._digest(key)
+        path = self._path(digest)
+        data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes -= self._index.pop(digest, 0)
+            self._index[digest] = len(data)
+            self._total_bytes += len(data)
+        self._evict()
+
+    def _remove(self, digest: str):
+        with self._lock:
+            self._total_bytes -= self._index.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._index:
+                    return
+                digest, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """Return ``(value, cache_hit)``, calling ``factory`` at most once per key at a time."""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value, True
+
+            pending: Optional[asyncio.Future] = self._in_flight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending), False
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or getattr(task, "cancelling", lambda: 0)():  # cancelling(): 3.11+
+                    raise  # this caller was cancelled, not the one it waited on
+                # The leader's request went away but ours is still live: the first
+                # follower to get here becomes the leader, the rest wait on it
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await factory()
+            try:
+                self.set(key, value)
+            except OSError as e:
+                # A full or read-only disk should cost us the cache, not the result.
+                print(f"AI cache write failed: {e}")
+            future.set_result(value)
+            return value, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers re-raise it; mark it retrieved so an unawaited future doesn't warn.
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,409 @@
+import asyncio
+import heapq
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.connection import SessionLocal
+from models.ai_job import AIJobStatus
+from models.ai_campaign import AICampaign, AICampaignItem
+from schemas.ai import AICampaignCreate, GeneratedQuestion
+from services.ai_service import get_ai_service
+from services.question_service import QuestionService
+
+FINISHED_STATUSES = (AIJobStatus.SUCCEEDED, AIJobStatus.FAILED, AIJobStatus.CANCELLED)
+
+
+class CampaignCancelled(Exception):
+    """Raised inside a running campaign once its row has been marked cancelled."""
+
+
+class _CampaignState:
+    """In-memory scheduling state of one running campaign."""
+
+    def __init__(self, campaign_id: str, lease: str, owner_id: int, items: List[dict]):
+        self.campaign_id = campaign_id
+        self.lease = lease
+        self.owner_id = owner_id
+        # (ready_at, position, item) min-heap; failed items come back with a later ready_at
+        self.pending: List[Tuple[float, int, dict]] = [(0.0, item["position"], item) for item in items]
+        heapq.heapify(self.pending)
+        self.active = 0
+        self.buffer: List[Tuple[int, List[GeneratedQuestion]]] = []
+        self.buffered_questions = 0
+        self.flush_lock = asyncio.Lock()
+
+
+class AICampaignRunner:
+    """Runs multi-topic generation campaigns under the shared rate limit.
+
+    Every model call takes a token from AIService's process-wide bucket
+    (see AIService), which rate-limit errors pause for every caller, and at
+    most AI_CAMPAIGN_CONCURRENCY items generate at once. A failed item is
+    retried with exponential backoff.
+
+    Generated questions are buffered and inserted AI_CAMPAIGN_INSERT_BATCH_SIZE
+    at a time. An item only becomes Succeeded in the transaction that saves
+    its questions, so after a crash, unsaved items are simply queued again
+    and finished items are never repeated. Items bypass the result cache,
+    since saving a cached result would add its questions twice.
+
+    Like AIJobRunner, a running campaign's heartbeat is written every
+    AI_JOB_HEARTBEAT_SECONDS, and at startup and then on the same interval
+    campaigns whose heartbeat went stale are resumed. Each claim takes a new
+    lease token, and saves and attempts are only recorded under the current
+    lease, so a runner that lost its claim cannot save items a second time.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._recovery: Optional[asyncio.Task] = None
+        self.retries = 0
+
+    async def start(self):
+        await self._recover()
+        self._recovery = asyncio.create_task(self._recovery_loop())
+
+    async def stop(self):
+        # Interrupted campaigns stay Running in the DB and are resumed once their heartbeat goes stale.
+        tasks = list(self._running.values()) + ([self._recovery] if self._recovery else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running = {}
+        self._recovery = None
+
+    async def _recover(self):
+        for campaign_id in await run_in_threadpool(self._recover_campaign_ids):
+            self._launch(campaign_id)
+
+    async def _recovery_loop(self):
+        while True:
+            await asyncio.sleep(settings.AI_JOB_HEARTBEAT_SECONDS)
+            try:
+                await self._recover()
+            except Exception as e:
+                print(f"!!! AI campaign recovery failed: {e}")
+
+    def submit(self, db: Session, user_id: int, request: AICampaignCreate) -> AICampaign:
+        campaign = AICampaign(
+            created_by_user_id=user_id,
+            name=request.name,
+            status=AIJobStatus.QUEUED,
+            total_items=len(request.items)
+        )
+        campaign.items = [
+            AICampaignItem(
+                position=position,
+                topic=item.topic,
+                difficulty=item.difficulty.value,
+                count=item.count,
+                status=AIJobStatus.QUEUED
+            )
+            for position, item in enumerate(request.items)
+        ]
+        db.add(campaign)
+        db.commit()
+        db.refresh(campaign)
+        self._launch(campaign.id)
+        return campaign
+
+    def cancel(self, db: Session, campaign: AICampaign) -> AICampaign:
+        if campaign.status not in FINISHED_STATUSES:
+            campaign.status = AIJobStatus.CANCELLED
+            campaign.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(campaign)
+        # If another process runs it, that process notices the status before its next item.
+        task = self._running.get(campaign.id)
+        if task is not None:
+            task.cancel()
+        return campaign
+
+    def stats(self) -> dict:
+        return {
+            "running_campaigns": len(self._running),
+            "concurrency": self.concurrency,
+            "retries": self.retries
+        }
+
+    def _launch(self, campaign_id: str):
+        if campaign_id in self._running:
+            return
+        task = asyncio.create_task(self._run_campaign(campaign_id))
+        self._running[campaign_id] = task
+        task.add_done_callback(lambda _: self._running.pop(campaign_id, None))
+
+    # --- Scheduling ---
+
+    async def _run_campaign(self, campaign_id: str):
+        claimed = await run_in_threadpool(self._claim, campaign_id)
+        if claimed is None:
+            return
+        lease, owner_id, items = claimed
+        state = _CampaignState(campaign_id, lease, owner_id, items)
+        heartbeat = asyncio.create_task(self._heartbeat_loop(state, asyncio.current_task()))
+        workers = [asyncio.create_task(self._campaign_worker(state)) for _ in range(min(self.concurrency, len(items)) or 1)]
+        try:
+            await asyncio.gather(*workers)
+            await self._flush(state)
+            await run_in_threadpool(self._finish, campaign_id, lease)
+        except (CampaignCancelled, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            print(f"!!! AI campaign {campaign_id} crashed: {e}")
+            await run_in_threadpool(self._fail, campaign_id, lease, str(e))
+        finally:
+            # Questions still buffered are not lost: their items are Queued and run again on resume.
+            heartbeat.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _heartbeat_loop(self, state: _CampaignState, campaign_task: asyncio.Task):
+        """Keep the campaign from looking stale while slow items run; stop it once cancelled or taken over."""
+        while True:
+            await asyncio.sleep(settings.AI_JOB_HEARTBEAT_SECONDS)
+            try:
+                await run_in_threadpool(self._heartbeat, state.campaign_id, state.lease)
+            except CampaignCancelled:
+                campaign_task.cancel()
+                return
+            except Exception as e:
+                print(f"!!! AI campaign {state.campaign_id} heartbeat failed: {e}")
+
+    async def _campaign_worker(self, state: _CampaignState):
+        while True:
+            if not state.pending:
+                if state.active == 0:
+                    return
+                # Another worker's item may still fail and come back for a retry.
+                await asyncio.sleep(0.2)
+                continue
+            ready_at = state.pending[0][0]
+            delay = ready_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(min(delay, 1.0))
+                continue
+            _, _, item = heapq.heappop(state.pending)
+            state.active += 1
+            try:
+                await self._run_item(state, item)
+            finally:
+                state.active -= 1
+
+    async def _run_item(self, state: _CampaignState, item: dict):
+        await run_in_threadpool(self._heartbeat, state.campaign_id, state.lease)
+        try:
+            async with self._slots:
+                questions = await get_ai_service().generate_questions_async(
+                    topic=item["topic"],
+                    difficulty=item["difficulty"],
+                    count=item["count"],
+                    use_cache=False  # the questions are saved; a cached result would duplicate them
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._retry_or_fail(state, item, str(e))
+            return
+
+        state.buffer.append((item["id"], questions))
+        state.buffered_questions += len(questions)
+        if state.buffered_questions >= settings.AI_CAMPAIGN_INSERT_BATCH_SIZE:
+            await self._flush(state)
+
+    async def _retry_or_fail(self, state: _CampaignState, item: dict, error: str):
+        item["attempts"] += 1
+        delay = min(
+            settings.AI_CAMPAIGN_BACKOFF_MAX_SECONDS,
+            settings.AI_CAMPAIGN_BACKOFF_BASE_SECONDS * (2 ** (item["attempts"] - 1))
+        ) * random.uniform(0.8, 1.2)
+
+        give_up = item["attempts"] >= settings.AI_CAMPAIGN_MAX_ATTEMPTS
+        await run_in_threadpool(
+            self._record_attempt, state.campaign_id, state.lease, item["id"], item["attempts"], error, give_up
+        )
+        if not give_up:
+            self.retries += 1
+            heapq.heappush(state.pending, (time.monotonic() + delay, item["position"], item))
+
+    async def _flush(self, state: _CampaignState):
+        async with state.flush_lock:
+            batch, state.buffer, state.buffered_questions = state.buffer, [], 0
+            if batch:
+                await run_in_threadpool(self._save_batch, state.campaign_id, state.lease, state.owner_id, batch)
+
+    # --- Persistence (runs in the thread pool) ---
+
+    def _recover_campaign_ids(self) -> List[str]:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.AI_JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            db.query(AICampaign).filter(
+                AICampaign.status == AIJobStatus.RUNNING,
+                AICampaign.heartbeat_at < stale_before
+            ).update({AICampaign.status: AIJobStatus.QUEUED}, synchronize_session=False)
+            db.commit()
+            rows = db.query(AICampaign.id).filter(
+                AICampaign.status == AIJobStatus.QUEUED
+            ).order_by(AICampaign.created_at).all()
+            return [row[0] for row in rows]
+        finally:
+            db.close()
+
+    def _claim(self, campaign_id: str) -> Optional[Tuple[str, int, List[dict]]]:
+        """Move the campaign to Running under a new lease; returns the lease, its owner and unfinished items."""
+        now = datetime.now(timezone.utc)
+        lease = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            claimed = db.query(AICampaign).filter(
+                AICampaign.id == campaign_id,
+                AICampaign.status == AIJobStatus.QUEUED
+            ).update({
+                AICampaign.status: AIJobStatus.RUNNING,
+                AICampaign.started_at: func.coalesce(AICampaign.started_at, now),
+                AICampaign.heartbeat_at: now,
+                AICampaign.lease_token: lease
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+
+            owner_id = db.query(AICampaign.created_by_user_id).filter(AICampaign.id == campaign_id).scalar()
+            rows = db.query(
+                AICampaignItem.id, AICampaignItem.position, AICampaignItem.topic,
+                AICampaignItem.difficulty, AICampaignItem.count, AICampaignItem.attempts
+            ).filter(
+                AICampaignItem.campaign_id == campaign_id,
+                AICampaignItem.status == AIJobStatus.QUEUED
+            ).order_by(AICampaignItem.position).all()
+            return lease, owner_id, [dict(row._mapping) for row in rows]
+        finally:
+            db.close()
+
+    def _load_running(self, db: Session, campaign_id: str, lease: str) -> AICampaign:
+        campaign = db.query(AICampaign).filter(AICampaign.id == campaign_id).with_for_update().first()
+        if campaign is None or campaign.status != AIJobStatus.RUNNING or campaign.lease_token != lease:
+            raise CampaignCancelled()
+        return campaign
+
+    def _heartbeat(self, campaign_id: str, lease: str):
+        db = SessionLocal()
+        try:
+            touched = db.query(AICampaign).filter(
+                AICampaign.id == campaign_id,
+                AICampaign.status == AIJobStatus.RUNNING,
+                AICampaign.lease_token == lease
+            ).update({AICampaign.heartbeat_at: datetime.now(timezone.utc)}, synchronize_session=False)
+            db.commit()
+            if not touched:
+                raise CampaignCancelled()
+        finally:
+            db.close()
+
+    def _record_attempt(self, campaign_id: str, lease: str, item_id: int, attempts: int, error: str, give_up: bool):
+        db = SessionLocal()
+        try:
+            campaign = self._load_running(db, campaign_id, lease)
+            item = db.query(AICampaignItem).filter(AICampaignItem.id == item_id).first()
+            item.attempts = attempts
+            item.error = error
+            if give_up:
+                item.status = AIJobStatus.FAILED
+                item.finished_at = datetime.now(timezone.utc)
+                campaign.failed_items += 1
+            db.commit()
+        finally:
+            db.close()
+
+    def _save_batch(self, campaign_id: str, lease: str, owner_id: int, batch: List[Tuple[int, List[GeneratedQuestion]]]):
+        """Insert a batch of items' questions and mark those items Succeeded, in one transaction."""
+        db = SessionLocal()
+        try:
+            campaign = self._load_running(db, campaign_id, lease)
+            all_questions = [question for _, questions in batch for question in questions]
+            question_ids = QuestionService.save_generated_questions(db, all_questions, owner_id, commit=False)
+
+            items = {
+                item.id: item
+                for item in db.query(AICampaignItem).filter(AICampaignItem.id.in_([item_id for item_id, _ in batch]))
+            }
+            now = datetime.now(timezone.utc)
+            offset = 0
+            for item_id, questions in batch:
+                item = items[item_id]
+                item.saved_question_ids = question_ids[offset:offset + len(questions)]
+                item.generated_count = len(questions)
+                item.status = AIJobStatus.SUCCEEDED
+                item.error = None
+                item.finished_at = now
+                offset += len(questions)
+
+            campaign.completed_items += len(batch)
+            campaign.generated_count += len(all_questions)
+            campaign.heartbeat_at = now
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, campaign_id: str, lease: str):
+        db = SessionLocal()
+        try:
+            campaign = self._load_running(db, campaign_id, lease)
+            # Only a campaign in which nothing at all could be generated counts as failed.
+            if campaign.completed_items or not campaign.total_items:
+                campaign.status = AIJobStatus.SUCCEEDED
+            else:
+                campaign.status = AIJobStatus.FAILED
+                campaign.error = "No item could be generated"
+            campaign.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except CampaignCancelled:
+            pass
+        finally:
+            db.close()
+
+    def _fail(self, campaign_id: str, lease: str, error: str):
+        db = SessionLocal()
+        try:
+            campaign = self._load_running(db, campaign_id, lease)
+            campaign.status = AIJobStatus.FAILED
+            campaign.error = error
+            campaign.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except CampaignCancelled:
+            pass
+        finally:
+            db.close()
+
+
+# --- Process-wide instance, started and stopped by main.py's lifespan ---
+_campaign_runner: Optional[AICampaignRunner] = None
+
+async def start_ai_campaign_runner() -> AICampaignRunner:
+    global _campaign_runner
+    if _campaign_runner is None:
+        _campaign_runner = AICampaignRunner(settings.AI_CAMPAIGN_CONCURRENCY)
+        await _campaign_runner.start()
+    return _campaign_runner
+
+async def stop_ai_campaign_runner():
+    global _campaign_runner
+    if _campaign_runner is not None:
+        await _campaign_runner.stop()
+        _campaign_runner = None
+
+def get_ai_campaign_runner() -> AICampaignRunner:
+    """FastAPI dependency returning the running campaign runner."""
+    if _campaign_runner is None:
+        raise RuntimeError("AI campaign runner is not running")
+    return _campaign_runner
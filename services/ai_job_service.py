@@ -0,0 +1,326 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.connection import SessionLocal
+from models.ai_job import AIGenerationJob, AIJobStatus
+from schemas.ai import AIJobCreate, GeneratedQuestion
+from services.ai_service import get_ai_service
+from services.ai_metrics import AIMetrics
+from services.question_service import QuestionService
+
+FINISHED_STATUSES = (AIJobStatus.SUCCEEDED, AIJobStatus.FAILED, AIJobStatus.CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised when the per-process job queue is at AI_JOB_QUEUE_SIZE."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its row has been marked cancelled."""
+
+
+class AIJobRunner:
+    """Runs AI generation jobs on a fixed pool of asyncio workers.
+
+    Jobs are rows in ``ai_generation_jobs``; the in-memory queue only holds
+    their ids. Workers claim a job with a conditional UPDATE so that the same
+    job is never run twice, persist each generated chunk as it arrives, and
+    check for cancellation between chunks. A running job's heartbeat is
+    written every AI_JOB_HEARTBEAT_SECONDS, however long a chunk takes.
+    At startup and then every AI_JOB_HEARTBEAT_SECONDS, running jobs whose
+    heartbeat went stale (their process died) are requeued and queued jobs
+    are picked up as the in-memory queue has room, so work survives both
+    client disconnects and server restarts.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.worker_count = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queued: Set[str] = set()  # ids in self.queue
+        self._cancelled: Set[str] = set()  # running ids whose row was marked Cancelled
+        self._recovery: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self):
+        self._stopping = False
+        await self._recover()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        self._recovery = asyncio.create_task(self._recovery_loop())
+
+    async def stop(self):
+        # Cancelled jobs stay Running in the DB and are recovered once their heartbeat goes stale.
+        self._stopping = True
+        tasks = self._workers + ([self._recovery] if self._recovery else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._recovery = None
+
+    def _enqueue(self, job_id: str) -> bool:
+        if job_id in self._queued or job_id in self._running:
+            return True
+        if self.queue.full():
+            return False
+        self.queue.put_nowait(job_id)
+        self._queued.add(job_id)
+        return True
+
+    async def _recover(self):
+        for job_id in await run_in_threadpool(self._recover_job_ids):
+            if not self._enqueue(job_id):
+                break  # the rest stay Queued in the table for the next scan
+
+    async def _recovery_loop(self):
+        while True:
+            await asyncio.sleep(settings.AI_JOB_HEARTBEAT_SECONDS)
+            try:
+                await self._recover()
+            except Exception as e:
+                print(f"!!! AI job recovery failed: {e}")
+
+    def submit(self, db: Session, user_id: int, request: AIJobCreate) -> AIGenerationJob:
+        if self.queue.full():
+            raise JobQueueFull()
+        job = AIGenerationJob(
+            created_by_user_id=user_id,
+            topic=request.topic,
+            difficulty=request.difficulty.value,
+            count=request.count,
+            save=request.save,
+            use_cache=request.use_cache,
+            status=AIJobStatus.QUEUED
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._enqueue(job.id)
+        return job
+
+    def cancel(self, db: Session, job: AIGenerationJob) -> AIGenerationJob:
+        if job.status not in FINISHED_STATUSES:
+            job.status = AIJobStatus.CANCELLED
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(job)
+        # If another process runs it, that worker notices the status before its next chunk.
+        task = self._running.get(job.id)
+        if task is not None:
+            self._cancelled.add(job.id)
+            task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "queued": self.queue.qsize(),
+            "running": len(self._running)
+        }
+
+    # --- Worker side ---
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            self._queued.discard(job_id)
+            try:
+                task = asyncio.create_task(self._run_job(job_id))
+                self._running[job_id] = task
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    # Cancelling the worker cancels the job it awaits as well, so
+                    # only a job cancelled on its own lets the worker carry on.
+                    if self._stopping or not task.cancelled():
+                        raise
+            except Exception as e:
+                print(f"!!! AI job {job_id} crashed: {e}")
+            finally:
+                self._running.pop(job_id, None)
+                self.queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        job = await run_in_threadpool(self._claim, job_id)
+        if job is None:
+            return
+
+        metrics = AIMetrics(settings.AI_PRICE_PER_1K_PROMPT_TOKENS, settings.AI_PRICE_PER_1K_RESPONSE_TOKENS)
+
+        async def on_chunk(questions: List[GeneratedQuestion]):
+            await run_in_threadpool(
+                self._append_partial, job_id, [q.model_dump() for q in questions], metrics.snapshot(False)
+            )
+
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id, asyncio.current_task()))
+        try:
+            questions = await get_ai_service().generate_questions_async(
+                topic=job["topic"],
+                difficulty=job["difficulty"],
+                count=job["count"],
+                # A cached result would save questions the bank already has
+                use_cache=job["use_cache"] and not job["save"],
+                on_chunk=on_chunk,
+                metrics=metrics
+            )
+            await run_in_threadpool(self._finish, job_id, questions, metrics.snapshot(False))
+        except JobCancelled:
+            pass
+        except asyncio.CancelledError:
+            # Only a cancelled job ends quietly; stop() cancels through here too,
+            # and its worker must see the CancelledError to exit.
+            if job_id not in self._cancelled:
+                raise
+        except Exception as e:
+            await run_in_threadpool(self._fail, job_id, str(e), metrics.snapshot(False))
+        finally:
+            heartbeat.cancel()
+            self._cancelled.discard(job_id)
+
+    async def _heartbeat_loop(self, job_id: str, job_task: asyncio.Task):
+        """Keep the job from looking stale while one slow chunk runs; stop it if it was cancelled elsewhere."""
+        while True:
+            await asyncio.sleep(settings.AI_JOB_HEARTBEAT_SECONDS)
+            try:
+                status = await run_in_threadpool(self._heartbeat, job_id)
+            except Exception as e:
+                print(f"!!! AI job {job_id} heartbeat failed: {e}")
+                continue
+            if status != AIJobStatus.RUNNING:
+                if status == AIJobStatus.CANCELLED:
+                    self._cancelled.add(job_id)
+                    job_task.cancel()
+                return
+
+    def _heartbeat(self, job_id: str) -> Optional[AIJobStatus]:
+        db = SessionLocal()
+        try:
+            db.query(AIGenerationJob).filter(
+                AIGenerationJob.id == job_id,
+                AIGenerationJob.status == AIJobStatus.RUNNING
+            ).update({AIGenerationJob.heartbeat_at: datetime.now(timezone.utc)}, synchronize_session=False)
+            db.commit()
+            return db.query(AIGenerationJob.status).filter(AIGenerationJob.id == job_id).scalar()
+        finally:
+            db.close()
+
+    def _recover_job_ids(self) -> List[str]:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.AI_JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            db.query(AIGenerationJob).filter(
+                AIGenerationJob.status == AIJobStatus.RUNNING,
+                AIGenerationJob.heartbeat_at < stale_before
+            ).update({AIGenerationJob.status: AIJobStatus.QUEUED}, synchronize_session=False)
+            db.commit()
+            rows = db.query(AIGenerationJob.id).filter(
+                AIGenerationJob.status == AIJobStatus.QUEUED
+            ).order_by(AIGenerationJob.created_at).all()
+            return [row[0] for row in rows]
+        finally:
+            db.close()
+
+    def _claim(self, job_id: str) -> Optional[dict]:
+        """Move the job from Queued to Running; returns None if someone else got it or it was cancelled."""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            claimed = db.query(AIGenerationJob).filter(
+                AIGenerationJob.id == job_id,
+                AIGenerationJob.status == AIJobStatus.QUEUED
+            ).update({
+                AIGenerationJob.status: AIJobStatus.RUNNING,
+                AIGenerationJob.started_at: now,
+                AIGenerationJob.heartbeat_at: now,
+                AIGenerationJob.generated_count: 0,
+                AIGenerationJob.result: []
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+            job = db.query(AIGenerationJob).filter(AIGenerationJob.id == job_id).first()
+            return {
+                "topic": job.topic,
+                "difficulty": job.difficulty,
+                "count": job.count,
+                "use_cache": job.use_cache,
+                "save": job.save
+            }
+        finally:
+            db.close()
+
+    def _load_running(self, db: Session, job_id: str) -> AIGenerationJob:
+        job = db.query(AIGenerationJob).filter(AIGenerationJob.id == job_id).with_for_update().first()
+        if job is None or job.status != AIJobStatus.RUNNING:
+            raise JobCancelled()
+        return job
+
+    def _append_partial(self, job_id: str, questions: List[dict], metrics: dict):
+        db = SessionLocal()
+        try:
+            job = self._load_running(db, job_id)
+            job.result = (job.result or []) + questions
+            job.generated_count = len(job.result)
+            job.metrics = metrics
+            job.heartbeat_at = datetime.now(timezone.utc)
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, questions: List[GeneratedQuestion], metrics: dict):
+        db = SessionLocal()
+        try:
+            job = self._load_running(db, job_id)
+            if job.save:
+                job.saved_question_ids = QuestionService.save_generated_questions(
+                    db, questions, job.created_by_user_id, commit=False
+                )
+            job.result = [q.model_dump() for q in questions]
+            job.generated_count = len(questions)
+            job.metrics = metrics
+            job.status = AIJobStatus.SUCCEEDED
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        finally:
+            db.close()
+
+    def _fail(self, job_id: str, error: str, metrics: dict):
+        db = SessionLocal()
+        try:
+            job = self._load_running(db, job_id)
+            job.status = AIJobStatus.FAILED
+            job.error = error
+            job.metrics = metrics
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except JobCancelled:
+            pass
+        finally:
+            db.close()
+
+
+# --- Process-wide instance, started and stopped by main.py's lifespan ---
+_job_runner: Optional[AIJobRunner] = None
+
+async def start_ai_job_runner() -> AIJobRunner:
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = AIJobRunner(settings.AI_JOB_WORKERS, settings.AI_JOB_QUEUE_SIZE)
+        await _job_runner.start()
+    return _job_runner
+
+async def stop_ai_job_runner():
+    global _job_runner
+    if _job_runner is not None:
+        await _job_runner.stop()
+        _job_runner = None
+
+def get_ai_job_runner() -> AIJobRunner:
+    """FastAPI dependency returning the running job runner."""
+    if _job_runner is None:
+        raise RuntimeError("AI job runner is not running")
+    return _job_runner
@@ -0,0 +1,220 @@
+import math
+import random
+import threading
+from typing import Dict, Optional, Sequence
+
+# Roughly four characters per token for English text; used when the backend reports no usage.
+CHARS_PER_TOKEN = 4
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+QUESTION_BUCKETS = (0, 1, 2, 5, 10, 15, 20, 30, 50)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are interpolated within the bucket they fall in."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else min(self.min, self.bounds[0])
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self, include_buckets: bool = True) -> dict:
+        data = {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+        if include_buckets:
+            labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+            data["buckets"] = dict(zip(labels, self.counts))
+        return data
+
+
+class AIMetrics:
+    """Per-call measurements of model usage.
+
+    AIService keeps one process-wide instance; background jobs pass their
+    own as well, so each job row can store what it cost.
+    """
+
+    def __init__(self, price_per_1k_prompt_tokens: float = 0.0, price_per_1k_response_tokens: float = 0.0):
+        self.price_per_1k_prompt_tokens = price_per_1k_prompt_tokens
+        self.price_per_1k_response_tokens = price_per_1k_response_tokens
+        self._lock = threading.Lock()
+        self.latency_seconds = Histogram(LATENCY_BUCKETS)
+        self.parse_seconds = Histogram(PARSE_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.response_tokens = Histogram(TOKEN_BUCKETS)
+        self.questions_per_call = Histogram(QUESTION_BUCKETS)
+        self.calls = 0
+        self.failed_calls = 0
+        self.retries = 0
+        self.questions = 0
+        self.estimated_token_counts = 0
+
+    def observe_call(self, latency: float, parse_seconds: float, prompt_tokens: int,
+                     response_tokens: int, questions: int, estimated: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.questions += questions
+            self.estimated_token_counts += estimated
+            self.latency_seconds.observe(latency)
+            self.parse_seconds.observe(parse_seconds)
+            self.prompt_tokens.observe(prompt_tokens)
+            self.response_tokens.observe(response_tokens)
+            self.questions_per_call.observe(questions)
+
+    def observe_failure(self, latency: float):
+        with self._lock:
+            self.calls += 1
+            self.failed_calls += 1
+            self.latency_seconds.observe(latency)
+
+    def observe_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def estimated_cost(self) -> float:
+        return (self.prompt_tokens.sum / 1000 * self.price_per_1k_prompt_tokens
+                + self.response_tokens.sum / 1000 * self.price_per_1k_response_tokens)
+
+    def snapshot(self, include_buckets: bool = True) -> dict:
+        with self._lock:
+            busy = self.latency_seconds.sum
+            return {
+                "calls": self.calls,
+                "failed_calls": self.failed_calls,
+                "retries": self.retries,
+                "questions": self.questions,
+                "prompt_tokens_total": int(self.prompt_tokens.sum),
+                "response_tokens_total": int(self.response_tokens.sum),
+                # Calls whose token counts were estimated from text length (no usage metadata).
+                "estimated_token_counts": self.estimated_token_counts,
+                "estimated_cost": round(self.estimated_cost, 6),
+                # Per unit of model-call time; concurrent calls make wall-clock throughput higher.
+                "questions_per_call_second": round(self.questions / busy, 3) if busy else None,
+                "latency_seconds": self.latency_seconds.snapshot(include_buckets),
+                "parse_seconds": self.parse_seconds.snapshot(include_buckets),
+                "prompt_tokens": self.prompt_tokens.snapshot(include_buckets),
+                "response_tokens": self.response_tokens.snapshot(include_buckets),
+                "questions_per_call": self.questions_per_call.snapshot(include_buckets)
+            }
+
+
+class ChunkSizeTuner:
+    """Chooses the chunk size that should finish a request fastest.
+
+    Call latency is modelled as ``overhead + per_question * chunk_size`` and
+    fitted by least squares over the calls seen so far. With ``parallel``
+    calls at a time, a request for ``count`` questions in chunks of ``s``
+    takes about ``ceil(ceil(count / s) / parallel) * (overhead + per_question * s)``.
+    Among sizes within 10% of the fastest prediction, the one needing the
+    fewest calls wins, since every call repeats the prompt's tokens and
+    counts against the provider's rate limit. Until the fit is trustworthy the
+    configured default is used, and a small share of requests try a random
+    size so there is enough spread in the data to fit.
+    """
+
+    def __init__(self, default: int, minimum: int, maximum: int, explore: float = 0.1, min_samples: int = 20):
+        self.default = default
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.explore = explore
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        # Running sums for the least-squares fit.
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._sizes: Dict[int, int] = {}
+
+    def observe(self, chunk_size: int, latency: float):
+        with self._lock:
+            self._n += 1
+            self._sx += chunk_size
+            self._sy += latency
+            self._sxx += chunk_size * chunk_size
+            self._sxy += chunk_size * latency
+            self._sizes[chunk_size] = self._sizes.get(chunk_size, 0) + 1
+
+    def fit(self) -> Optional[tuple]:
+        """Return ``(overhead_seconds, seconds_per_question)`` or None while there is too little data."""
+        with self._lock:
+            if self._n < self.min_samples or len(self._sizes) < 2:
+                return None
+            denominator = self._n * self._sxx - self._sx * self._sx
+            if denominator <= 0:
+                return None
+            slope = (self._n * self._sxy - self._sx * self._sy) / denominator
+            intercept = (self._sy - slope * self._sx) / self._n
+        return max(intercept, 0.0), max(slope, 0.0)
+
+    def chunk_size_for(self, count: int, parallel: int) -> int:
+        if random.random() < self.explore:
+            return random.randint(self.minimum, self.maximum)
+        model = self.fit()
+        if model is None:
+            return self.default
+        overhead, per_question = model
+        parallel = max(1, parallel)
+
+        def predicted_seconds(size: int) -> float:
+            waves = math.ceil(math.ceil(count / size) / parallel)
+            return waves * (overhead + per_question * size)
+
+        sizes = range(self.minimum, self.maximum + 1)
+        fastest = min(predicted_seconds(size) for size in sizes)
+        good_enough = [size for size in sizes if predicted_seconds(size) <= fastest * 1.1]
+        # Fewest calls first; then the smaller size, which loses less output when a call fails.
+        return min(good_enough, key=lambda size: (math.ceil(count / size), size))
+
+    def snapshot(self) -> dict:
+        model = self.fit()
+        return {
+            "samples": self._n,
+            "sizes_seen": dict(sorted(self._sizes.items())),
+            "overhead_seconds": round(model[0], 4) if model else None,
+            "seconds_per_question": round(model[1], 4) if model else None,
+            "default": self.default,
+            "range": [self.minimum, self.maximum]
+        }
@@ -1,21 +1,187 @@
+import asyncio
 import json
-import google.generativeai as genai
-from typing import List
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 from config.settings import settings
+from utils.json_stream import JSONArrayStreamParser
 from schemas.ai import QuestionGenerationRequest, GeneratedQuestion, GeneratedChoice, QuestionGenerationResponse
+from services.ai_cache import AIResponseCache
+from services.ai_backends import AIBackend, ModelResponse, create_backend
+from services.ai_metrics import AIMetrics, ChunkSizeTuner, estimate_tokens
+from utils.rate_limit import TokenBucket
+# Bump whenever _create_question_prompt changes so cached results from the old prompt are not reused.
+PROMPT_TEMPLATE_VERSION = 2
+# The prompt asks for exactly this many choices; anything else is dropped rather than guessed at.
+REQUIRED_CHOICES = 4
+# Provider errors that mean "slow down" rather than "this request is bad"
+RATE_LIMIT_MARKERS = ("429", "resource exhausted", "resourceexhausted", "quota", "rate limit")
+TRUE_STRINGS = {"true", "yes", "y", "1", "correct"}
+FALSE_STRINGS = {"false", "no", "n", "0", "incorrect", ""}
 
 class AIService:
-    def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+    """AI question generator.
+
+    One instance is created per process in main.py's lifespan (see
+    ``init_ai_service``) and shared by every request, so the client is
+    configured once and its connections are reused. The model itself is an
+    ``AIBackend`` chosen by AI_BACKEND: Gemini in production, or the offline
+    mock for load tests and local development.
+
+    Every model call takes a token from one ``TokenBucket``
+    (AI_REQUESTS_PER_MINUTE, bursts of AI_REQUEST_BURST), whether it comes
+    from a request, a job, a campaign or a salvage follow-up; cache hits
+    make no call and take none. A rate-limit error from the provider pauses
+    the bucket for AI_RATE_LIMIT_PAUSE_SECONDS, so every caller backs off
+    together.
+    """
+
+    def __init__(self, backend: Optional[AIBackend] = None):
+        self.backend = backend or create_backend()
+        self._state_lock = threading.Lock()
+        self._in_flight = 0
+        self._closing = False
+        self.total_calls = 0
+        self.failed_calls = 0
+        self.last_success_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        # How much malformed output was rescued instead of discarded (see _parse_ai_response).
+        self.salvage = {
+            "responses": 0,
+            "clean_responses": 0,
+            "salvaged_responses": 0,
+            "unparseable_responses": 0,
+            "items_repaired": 0,
+            "items_dropped": 0,
+            "questions_salvaged": 0,
+            "followup_calls": 0,
+            "followup_questions": 0,
+            "retry_questions_avoided": 0,
+            # Requests that still returned fewer than ``count`` questions, and by how many
+            "short_requests": 0,
+            "questions_short": 0
+        }
+        self.rate_limiter = TokenBucket(settings.AI_REQUESTS_PER_MINUTE / 60.0, settings.AI_REQUEST_BURST)
+        self.rate_limited = 0
+        self.metrics = AIMetrics(settings.AI_PRICE_PER_1K_PROMPT_TOKENS, settings.AI_PRICE_PER_1K_RESPONSE_TOKENS)
+        self.tuner = ChunkSizeTuner(settings.AI_CHUNK_SIZE, settings.AI_CHUNK_SIZE_MIN, settings.AI_CHUNK_SIZE_MAX)
+        self.cache: Optional[AIResponseCache] = None
+        if settings.AI_CACHE_ENABLED:
+            self.cache = AIResponseCache(
+                settings.AI_CACHE_DIR,
+                settings.AI_CACHE_MAX_BYTES,
+                settings.AI_CACHE_TTL_SECONDS
+            )
+
+    @property
+    def configured(self) -> bool:
+        return self.backend.configured
+
+    def warm_up(self):
+        """Import the SDK and build the model now instead of on the first request."""
+        self.backend.warm_up()
+
+    @contextmanager
+    def _track_call(self):
+        """Count a model call for health reporting and graceful shutdown."""
+        with self._state_lock:
+            if self._closing:
+                raise RuntimeError("AI service is shutting down")
+            self._in_flight += 1
+            self.total_calls += 1
+        try:
+            yield
+        except Exception as e:
+            with self._state_lock:
+                self.failed_calls += 1
+                self.last_error = str(e)
+            raise
         else:
-            self.model = None
-        
+            self.last_success_at = datetime.now(timezone.utc)
+        finally:
+            with self._state_lock:
+                self._in_flight -= 1
+
+    def health(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "configured": self.configured,
+            "model_loaded": self.backend.loaded,
+            "accepting_requests": not self._closing,
+            "in_flight": self._in_flight,
+            "total_calls": self.total_calls,
+            "failed_calls": self.failed_calls,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_error": self.last_error,
+            "rate_limit": {
+                "requests_per_minute": settings.AI_REQUESTS_PER_MINUTE,
+                "tokens_available": round(self.rate_limiter.available, 2),
+                "rate_limited": self.rate_limited
+            },
+            "cache": self.cache.stats() if self.cache else None,
+            "salvage": dict(self.salvage)
+        }
+
+    def metrics_snapshot(self) -> dict:
+        return {
+            **self.metrics.snapshot(),
+            "chunk_size": {
+                "autotune": settings.AI_CHUNK_AUTOTUNE,
+                "configured": settings.AI_CHUNK_SIZE,
+                **self.tuner.snapshot()
+            }
+        }
+
+    def _observe_call(self, prompt: str, response: ModelResponse, latency: float, parse_seconds: float,
+                      requested: int, questions: int, metrics: Optional[AIMetrics] = None):
+        """Record one completed model call in the process-wide metrics and, if given, a job's own."""
+        estimated = response.prompt_tokens is None or response.response_tokens is None
+        prompt_tokens = response.prompt_tokens if response.prompt_tokens is not None else estimate_tokens(prompt)
+        response_tokens = response.response_tokens if response.response_tokens is not None else estimate_tokens(response.text)
+        for target in (self.metrics, metrics):
+            if target is not None:
+                target.observe_call(latency, parse_seconds, prompt_tokens, response_tokens, questions, estimated)
+        self.tuner.observe(requested, latency)
+
+    def _observe_failure(self, latency: float, metrics: Optional[AIMetrics] = None, error: Optional[Exception] = None):
+        for target in (self.metrics, metrics):
+            if target is not None:
+                target.observe_failure(latency)
+        if error is not None and any(marker in str(error).casefold() for marker in RATE_LIMIT_MARKERS):
+            self.rate_limited += 1
+            self.rate_limiter.pause(settings.AI_RATE_LIMIT_PAUSE_SECONDS)
+
+    def _record_salvage(self, **counts):
+        with self._state_lock:
+            for name, value in counts.items():
+                self.salvage[name] += value
+
+    def _record_response(self, kept: int, repaired: int, dropped: int):
+        """Classify one parsed model response for the salvage statistics."""
+        if not repaired and not dropped:
+            self._record_salvage(responses=1, clean_responses=1)
+        else:
+            self._record_salvage(
+                responses=1,
+                salvaged_responses=1 if kept else 0,
+                questions_salvaged=kept,
+                items_repaired=repaired,
+                items_dropped=dropped
+            )
+
+    async def close(self, timeout: float = 30.0):
+        """Stop accepting calls and wait up to ``timeout`` seconds for in-flight ones."""
+        with self._state_lock:
+            self._closing = True
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
     
     def generate_questions(self, topic:str,difficulty:str,count:str) -> list:
         """Generate questions using AI"""
-        if not self.model:
+        if not self.configured:
             raise ValueError("Gemini API key not configured")
         
         try:
@@ -23,20 +189,195 @@ class AIService:
             prompt = self._create_question_prompt(topic,difficulty,count)
             
             # Generate response
-            response = self.model.generate_content(prompt)
+            start = time.perf_counter()
+            try:
+                with self._track_call():
+                    response = self.backend.generate(prompt)
+            except Exception:
+                self._observe_failure(time.perf_counter() - start)
+                raise
+            latency = time.perf_counter() - start
             
             # Parse response
+            parse_start = time.perf_counter()
             questions = self._parse_ai_response(response.text,topic, difficulty)
+            self._observe_call(prompt, response, latency, time.perf_counter() - parse_start, int(count), len(questions))
             
             return questions
             
         except Exception as e:
             raise Exception(f"Failed to generate questions: {str(e)}")
         
+    async def generate_questions_async(
+        self,
+        topic: str,
+        difficulty: str,
+        count: int,
+        use_cache: bool = True,
+        on_chunk: Optional[Callable[[List[GeneratedQuestion]], Awaitable[None]]] = None,
+        metrics: Optional[AIMetrics] = None
+    ) -> List[GeneratedQuestion]:
+        """Generate questions with parallel chunked prompts.
+
+        ``count`` is split into prompts of at most AI_CHUNK_SIZE questions that
+        run concurrently (at most AI_MAX_CONCURRENCY at a time), so a large
+        request takes roughly as long as one chunk. Results are merged,
+        de-duplicated and validated before being returned; duplicates across
+        chunks are replaced by follow-up calls (AI_SALVAGE_MAX_FOLLOWUPS), and
+        if the model still falls short, fewer than ``count`` questions come
+        back. If one chunk fails, the others are cancelled and its error is
+        raised as is.
+
+        Results are cached on disk by (topic, difficulty, count, prompt
+        version); pass ``use_cache=False`` to always call the model.
+        ``on_chunk`` is awaited with each chunk's questions as it completes
+        (it is not called on a cache hit). Model calls are recorded in
+        ``self.metrics`` and, if given, in ``metrics`` too.
+        """
+        if not self.configured:
+            raise ValueError("Gemini API key not configured")
+
+        if self.cache is None or not use_cache:
+            return await self._generate_uncached(topic, difficulty, count, on_chunk, metrics)
 
+        async def factory():
+            questions = await self._generate_uncached(topic, difficulty, count, on_chunk, metrics)
+            return [question.model_dump() for question in questions]
 
-    def _create_question_prompt(self,topic:str,difficulty:str,count:int) -> str:
+        key = AIResponseCache.make_key(topic, difficulty, count, PROMPT_TEMPLATE_VERSION)
+        cached, _ = await self.cache.get_or_create(key, factory)
+        return [GeneratedQuestion(**question) for question in cached]
+
+    async def _generate_uncached(self, topic: str, difficulty: str, count: int, on_chunk=None,
+                                 metrics: Optional[AIMetrics] = None) -> List[GeneratedQuestion]:
+
+        chunks = self._split_count(count)
+        semaphore = asyncio.Semaphore(max(1, settings.AI_MAX_CONCURRENCY))
+
+        async def run_chunk(index: int, chunk_count: int) -> List[GeneratedQuestion]:
+            async with semaphore:
+                prompt = self._create_question_prompt(topic, difficulty, chunk_count, part=index + 1, parts=len(chunks))
+                questions = await self._generate_chunk(prompt, topic, difficulty, chunk_count, metrics)
+                # Ask only for what was dropped instead of regenerating the whole chunk.
+                for _ in range(max(0, settings.AI_SALVAGE_MAX_FOLLOWUPS)):
+                    missing = chunk_count - len(questions)
+                    if missing <= 0:
+                        break
+                    self._record_salvage(followup_calls=1, followup_questions=missing,
+                                         retry_questions_avoided=chunk_count - missing)
+                    for target in (self.metrics, metrics):
+                        if target is not None:
+                            target.observe_retry()
+                    prompt = self._create_question_prompt(
+                        topic, difficulty, missing, part=index + 1, parts=len(chunks),
+                        avoid=[question.question_text for question in questions]
+                    )
+                    questions += await self._generate_chunk(prompt, topic, difficulty, missing, metrics)
+            if on_chunk is not None:
+                await on_chunk(questions)
+            return questions
+
+        # The first failure, or a cancellation, stops the other chunks instead of letting
+        # them keep spending quota; errors (and JobCancelled from on_chunk) pass through as raised
+        tasks = [asyncio.ensure_future(run_chunk(i, n)) for i, n in enumerate(chunks)]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        merged = self._merge_questions(results, count)
+        # Duplicates across chunks are only found once all are merged; ask for replacements
+        for _ in range(max(0, settings.AI_SALVAGE_MAX_FOLLOWUPS)):
+            missing = count - len(merged)
+            if missing <= 0 or not merged:
+                break
+            self._record_salvage(followup_calls=1, followup_questions=missing,
+                                 retry_questions_avoided=len(merged))
+            for target in (self.metrics, metrics):
+                if target is not None:
+                    target.observe_retry()
+            prompt = self._create_question_prompt(
+                topic, difficulty, missing, avoid=[question.question_text for question in merged]
+            )
+            extra = self._merge_questions([merged, await self._generate_chunk(prompt, topic, difficulty, missing, metrics)],
+                                          count)[len(merged):]
+            if on_chunk is not None and extra:
+                await on_chunk(extra)
+            merged += extra
+        if not merged:
+            raise ValueError("the model returned no usable questions")
+        if len(merged) < count:
+            self._record_salvage(short_requests=1, questions_short=count - len(merged))
+        return merged
+
+    async def _generate_chunk(self, prompt: str, topic: str, difficulty: str, requested: int,
+                              metrics: Optional[AIMetrics] = None) -> List[GeneratedQuestion]:
+        """One model call; unparseable output yields no questions rather than failing the request."""
+        await self.rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            with self._track_call():
+                response = await self.backend.generate_async(prompt)
+        except Exception as e:
+            self._observe_failure(time.perf_counter() - start, metrics, e)
+            raise
+        latency = time.perf_counter() - start
+
+        parse_start = time.perf_counter()
+        try:
+            questions = self._parse_ai_response(response.text, topic, difficulty)
+        except ValueError:
+            # Already counted as an unparseable response in the salvage statistics
+            questions = []
+        self._observe_call(prompt, response, latency, time.perf_counter() - parse_start, requested, len(questions), metrics)
+        return questions
+
+    def _split_count(self, count: int) -> List[int]:
+        """Split ``count`` into near-equal chunks no larger than the chunk size.
+
+        The chunk size is AI_CHUNK_SIZE, or the tuner's pick when AI_CHUNK_AUTOTUNE is on.
+        """
+        count = max(1, int(count))
+        if settings.AI_CHUNK_AUTOTUNE:
+            chunk_size = self.tuner.chunk_size_for(count, settings.AI_MAX_CONCURRENCY)
+        else:
+            chunk_size = max(1, settings.AI_CHUNK_SIZE)
+        parts = -(-count // chunk_size)
+        base, extra = divmod(count, parts)
+        return [base + 1 if i < extra else base for i in range(parts)]
+
+    def _merge_questions(self, results: List[List[GeneratedQuestion]], count: int) -> List[GeneratedQuestion]:
+        """Concatenate chunk results, dropping invalid questions and duplicates across chunks."""
+        merged = []
+        seen = set()
+        for questions in results:
+            for question in questions:
+                key = " ".join(question.question_text.casefold().split())
+                if key in seen or not self._is_valid_question(question):
+                    continue
+                seen.add(key)
+                merged.append(question)
+        return merged[:count]
+
+    def _is_valid_question(self, question: GeneratedQuestion) -> bool:
+        """A usable question has text, exactly REQUIRED_CHOICES choices and exactly one correct choice."""
+        if not question.question_text.strip() or len(question.choices) != REQUIRED_CHOICES:
+            return False
+        return sum(1 for choice in question.choices if choice.is_correct) == 1
+
+    def _create_question_prompt(self,topic:str,difficulty:str,count:int,part:int=1,parts:int=1,
+                                avoid:Optional[List[str]]=None) -> str:
         """Create a prompt for question generation"""
+        # Parallel chunks get the same prompt otherwise; nudge each toward different material.
+        part_hint = (
+            f"- This is part {part} of {parts} of a larger set; cover different aspects of the topic than other parts would"
+            if parts > 1 else ""
+        )
+        # Follow-up calls list what the first call already produced so it is not repeated.
+        if avoid:
+            part_hint += "\n        - Do not repeat any of these questions: " + " | ".join(avoid)
         prompt = f"""
         Generate {count} multiple choice questions about "{topic}" with {difficulty} difficulty level.
         
@@ -47,6 +388,7 @@ class AIService:
         - Each question should have exactly 4 choices
         - Only one choice should be correct
         - Questions should be educational and accurate
+        {part_hint}
         
         Return the response in the following JSON format:
         [
@@ -68,44 +410,276 @@ class AIService:
         return prompt
     
     def _parse_ai_response(self, response_text: str, topic: str, difficulty: str) -> List[GeneratedQuestion]:
-        """Parse the AI response into structured data"""
+        """Parse the AI response into structured data, keeping every usable question.
+
+        A broken array (e.g. output cut off mid-way) still yields the elements
+        that were complete, and each element is repaired or dropped on its
+        own, so one bad question no longer throws away the rest of the call.
+        Raises ValueError only when there is no JSON array at all.
+        """
+        # Clean the response text
+        cleaned_text = response_text.strip()
+        if cleaned_text.startswith("```json"):
+            cleaned_text = cleaned_text[7:]
+        if cleaned_text.endswith("```"):
+            cleaned_text = cleaned_text[:-3]
+
+        broken = 0
         try:
-            # Clean the response text
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith("```json"):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.endswith("```"):
-                cleaned_text = cleaned_text[:-3]
-            
-            # Parse JSON
             questions_data = json.loads(cleaned_text)
-            
-            # Convert to GeneratedQuestion objects
-            questions = []
-            for q_data in questions_data:
-                choices = [
-                    GeneratedChoice(
-                        choice_text=choice["choice_text"],
-                        is_correct=choice["is_correct"]
-                    )
-                    for choice in q_data["choices"]
-                ]
-                
-                question = GeneratedQuestion(
-                    question_text=q_data["question_text"],
-                    topic=q_data.get("topic", topic),
-                    level=q_data.get("level", difficulty),
-                    choices=choices
-                )
-                questions.append(question)
-            
-            return questions
-            
+            if isinstance(questions_data, dict):
+                # Some responses wrap the array: {"questions": [...]}
+                questions_data = next((v for v in questions_data.values() if isinstance(v, list)), [questions_data])
+            if not isinstance(questions_data, list):
+                self._record_salvage(responses=1, unparseable_responses=1)
+                raise ValueError("Failed to parse AI response: expected a JSON array")
         except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse AI response: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error processing AI response: {str(e)}")
-    
+            parser = JSONArrayStreamParser()
+            questions_data = parser.feed(cleaned_text)
+            if not parser.started:
+                self._record_salvage(responses=1, unparseable_responses=1)
+                raise ValueError(f"Failed to parse AI response: {str(e)}")
+            # Elements that failed to decode, plus the one cut off by truncation.
+            broken = parser.malformed + (0 if parser.finished else 1)
+
+        questions, repaired, dropped = self._salvage_items(questions_data, topic, difficulty)
+        self._record_response(len(questions), repaired, dropped + broken)
+        return questions
+
+    def _salvage_items(self, items: list, topic: str, difficulty: str) -> Tuple[List[GeneratedQuestion], int, int]:
+        """Return ``(questions, repaired_count, dropped_count)`` for a list of raw elements."""
+        questions = []
+        repaired = dropped = 0
+        for q_data in items:
+            question, was_repaired = self._repair_item(q_data, topic, difficulty)
+            if question is None:
+                dropped += 1
+                continue
+            repaired += was_repaired
+            questions.append(question)
+        return questions, repaired, dropped
+
+    def _repair_item(self, q_data, topic: str, difficulty: str) -> Tuple[Optional[GeneratedQuestion], bool]:
+        """Convert one element of the model's JSON array, fixing common defects.
+
+        Handles alternative key names (``question``, ``options``, ``text``,
+        ``correct``), choices given as bare strings, "true"/"false" strings,
+        duplicate or empty choices, and a separate ``answer`` field naming the
+        correct choice. Returns ``(None, False)`` when the item can't be
+        trusted, e.g. it has the wrong number of choices or no single answer.
+        """
+        if not isinstance(q_data, dict):
+            return None, False
+        repaired = False
+
+        question_text = q_data.get("question_text")
+        if not isinstance(question_text, str) or not question_text.strip():
+            question_text = q_data.get("question")
+            repaired = True
+        if not isinstance(question_text, str) or not question_text.strip():
+            return None, False
+
+        raw_choices = q_data.get("choices")
+        if not isinstance(raw_choices, list):
+            raw_choices = q_data.get("options")
+            repaired = True
+        if not isinstance(raw_choices, list):
+            return None, False
+
+        texts, flags, seen = [], [], set()
+        for raw in raw_choices:
+            if isinstance(raw, dict):
+                text = raw.get("choice_text", raw.get("text"))
+                flag = raw.get("is_correct", raw.get("correct"))
+                repaired = repaired or "choice_text" not in raw or not isinstance(raw.get("is_correct"), bool)
+            else:
+                text, flag = raw, None
+                repaired = True
+            if isinstance(text, (int, float)) and not isinstance(text, bool):
+                text = str(text)
+            if not isinstance(text, str) or not text.strip() or text.strip().casefold() in seen:
+                repaired = True
+                continue
+            seen.add(text.strip().casefold())
+            texts.append(text.strip())
+            flags.append(self._coerce_flag(flag))
+
+        if sum(1 for flag in flags if flag) != 1:
+            answer_index = self._answer_index(q_data.get("answer", q_data.get("correct_answer")), texts)
+            if answer_index is None:
+                return None, False
+            flags = [i == answer_index for i in range(len(texts))]
+            repaired = True
+
+        if len(texts) != REQUIRED_CHOICES:
+            return None, False
+
+        item_topic = q_data.get("topic")
+        item_level = q_data.get("level")
+        question = GeneratedQuestion(
+            question_text=question_text.strip(),
+            topic=item_topic if isinstance(item_topic, str) and item_topic.strip() else topic,
+            level=item_level if isinstance(item_level, str) and item_level.strip() else difficulty,
+            choices=[GeneratedChoice(choice_text=text, is_correct=bool(flag)) for text, flag in zip(texts, flags)]
+        )
+        return question, repaired
+
+    @staticmethod
+    def _coerce_flag(value) -> Optional[bool]:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            return value == 1
+        if isinstance(value, str):
+            lowered = value.strip().casefold()
+            if lowered in TRUE_STRINGS:
+                return True
+            if lowered in FALSE_STRINGS:
+                return False
+        return None
+
+    @staticmethod
+    def _answer_index(answer, texts: List[str]) -> Optional[int]:
+        """Resolve an ``answer`` field given as choice text, letter ("B") or index."""
+        if isinstance(answer, bool) or answer is None:
+            return None
+        if isinstance(answer, int):
+            return answer if 0 <= answer < len(texts) else None
+        if not isinstance(answer, str):
+            return None
+        wanted = answer.strip().casefold()
+        for i, text in enumerate(texts):
+            if text.casefold() == wanted:
+                return i
+        letter = wanted.rstrip(").:")
+        if len(letter) == 1 and "a" <= letter < chr(ord("a") + len(texts)):
+            return ord(letter) - ord("a")
+        return None
+
+    async def stream_questions(
+        self,
+        topic: str,
+        difficulty: str,
+        count: int,
+        use_cache: bool = True
+    ) -> AsyncIterator[GeneratedQuestion]:
+        """Yield questions one by one as soon as the model has finished writing each.
+
+        Chunks run in parallel as in ``generate_questions_async``, but each
+        uses the streaming API and an incremental JSON parser, so the first
+        question arrives after a fraction of the full generation time. If
+        malformed items leave the run short, one follow-up stream asks for the
+        missing count. A complete run is written to the cache; a cache hit is
+        replayed at once.
+        """
+        if not self.configured:
+            raise ValueError("Gemini API key not configured")
+
+        key = AIResponseCache.make_key(topic, difficulty, count, PROMPT_TEMPLATE_VERSION)
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.hits += 1
+                for question in cached:
+                    yield GeneratedQuestion(**question)
+                return
+
+        chunks = self._split_count(count)
+        semaphore = asyncio.Semaphore(max(1, settings.AI_MAX_CONCURRENCY))
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def stream_chunk(prompt: str, requested: int):
+            parser = JSONArrayStreamParser()
+            kept = repaired = dropped = 0
+            completed = False
+            start = None
+            try:
+                async with semaphore:
+                    await self.rate_limiter.acquire()
+                    start = time.perf_counter()
+                    parse_seconds = 0.0
+                    text_parts = []
+                    with self._track_call():
+                        async for piece in self.backend.stream(prompt):
+                            text_parts.append(piece)
+                            parse_start = time.perf_counter()
+                            items = [self._repair_item(q_data, topic, difficulty) for q_data in parser.feed(piece)]
+                            parse_seconds += time.perf_counter() - parse_start
+                            for question, was_repaired in items:
+                                if question is None:
+                                    dropped += 1
+                                    continue
+                                kept += 1
+                                repaired += was_repaired
+                                await queue.put(question)
+                    completed = True
+                    # Streaming responses carry no usage metadata here, so tokens are estimated.
+                    self._observe_call(prompt, ModelResponse("".join(text_parts)), time.perf_counter() - start,
+                                       parse_seconds, requested, kept)
+                    if not parser.started:
+                        self._record_salvage(responses=1, unparseable_responses=1)
+                        parser = None
+            except Exception as e:
+                if start is not None and not completed:
+                    self._observe_failure(time.perf_counter() - start, error=e)
+                await queue.put(e)
+            finally:
+                # Recorded here too when the consumer has enough questions and cancels us mid-stream.
+                if parser is not None and parser.started:
+                    broken = parser.malformed + (1 if completed and not parser.finished else 0)
+                    self._record_response(kept, repaired, dropped + broken)
+                await queue.put(done)
+
+        tasks = [
+            asyncio.create_task(stream_chunk(
+                self._create_question_prompt(topic, difficulty, n, part=i + 1, parts=len(chunks)), n
+            ))
+            for i, n in enumerate(chunks)
+        ]
+        followups = max(0, settings.AI_SALVAGE_MAX_FOLLOWUPS)
+        emitted = []
+        seen = set()
+        errors = []
+        try:
+            remaining = len(tasks)
+            while remaining and len(emitted) < count:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                    if not remaining and followups and len(emitted) < count:
+                        followups -= 1
+                        missing = count - len(emitted)
+                        self._record_salvage(followup_calls=1, followup_questions=missing,
+                                             retry_questions_avoided=len(emitted))
+                        self.metrics.observe_retry()
+                        prompt = self._create_question_prompt(
+                            topic, difficulty, missing, avoid=[question.question_text for question in emitted]
+                        )
+                        tasks.append(asyncio.create_task(stream_chunk(prompt, missing)))
+                        remaining += 1
+                    continue
+                if isinstance(item, Exception):
+                    errors.append(item)
+                    continue
+                question = item
+                text_key = " ".join(question.question_text.casefold().split())
+                if text_key in seen or not self._is_valid_question(question):
+                    continue
+                seen.add(text_key)
+                emitted.append(question)
+                yield question
+        finally:
+            # Also runs when the client disconnects and the generator is closed early.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not emitted and errors:
+            raise Exception(f"Failed to generate questions: {str(errors[0])}")
+        if self.cache is not None and use_cache and len(emitted) >= count:
+            self.cache.set(key, [question.model_dump() for question in emitted])
+
     def generate_question_variations(self, topic: str, difficulty: str = "medium", count: int = 5) -> List[GeneratedQuestion]:
         """Generate question variations for a topic"""
         request = QuestionGenerationRequest(
@@ -115,4 +689,30 @@ class AIService:
         )
         
         response = self.generate_questions(request)
-        return response.questions
\ No newline at end of file
+        return response.questions
+
+
+# --- Process-wide instance ---
+# Created in main.py's lifespan; scripts and tests that skip the lifespan get
+# one lazily from get_ai_service().
+_ai_service: Optional[AIService] = None
+
+def init_ai_service() -> AIService:
+    """Create the shared AIService (called once at application startup)."""
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+        if settings.AI_WARMUP_ON_STARTUP and _ai_service.configured:
+            _ai_service.warm_up()
+    return _ai_service
+
+async def shutdown_ai_service(timeout: float = 30.0):
+    """Drain in-flight model calls and drop the shared AIService."""
+    global _ai_service
+    if _ai_service is not None:
+        await _ai_service.close(timeout)
+        _ai_service = None
+
+def get_ai_service() -> AIService:
+    """FastAPI dependency returning the shared AIService."""
+    return init_ai_service()
@@ -5,6 +5,7 @@ from models.assessment import Assessment
 from models.assessment_question import AssessmentQuestion
 from models.question import Question
 from schemas.assessment import AssessmentCreate, AssessmentUpdate
+from services.question_version_service import QuestionVersionService
 from fastapi import HTTPException
 
 class AssessmentService:
@@ -50,6 +51,7 @@ class AssessmentService:
             assessment_question = AssessmentQuestion(
                 assessment_id=db_assessment.id,
                 question_id=question_id,
+                question_version_id=QuestionVersionService.current_version_ids(db, [question_id]).get(question_id),
                 marks=1  # Default marks per question
             )
             db.add(assessment_question)
@@ -137,6 +139,7 @@ class AssessmentService:
         assessment_question = AssessmentQuestion(
             assessment_id=assessment_id,
             question_id=question_id,
+            question_version_id=QuestionVersionService.current_version_ids(db, [question_id]).get(question_id),
             marks=marks
         )
         db.add(assessment_question)
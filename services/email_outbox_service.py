@@ -0,0 +1,176 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_, func, insert
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.email_outbox import EmailOutbox, EmailStatus
+
+# Priority classes: the worker claims lower numbers first
+PRIORITY_TRANSACTIONAL = 0  # the user is waiting for it: welcome, password
+PRIORITY_NORMAL = 5  # invitations sent one by one
+PRIORITY_BULK = 10  # CSV invite campaigns
+KIND_PRIORITIES = {"welcome": PRIORITY_TRANSACTIONAL, "invite": PRIORITY_NORMAL, "recruiter_digest": PRIORITY_NORMAL}
+
+
+def _send_time(send_at: Optional[datetime]) -> datetime:
+    now = datetime.now(timezone.utc)
+    if send_at is None:
+        return now
+    if send_at.tzinfo is None:
+        send_at = send_at.replace(tzinfo=timezone.utc)
+    return max(now, send_at)
+
+
+class EmailOutboxService:
+    @staticmethod
+    def enqueue(db: Session, kind: str, recipient: str, context: dict,
+                priority: Optional[int] = None, send_at: Optional[datetime] = None) -> EmailOutbox:
+        """Queue an email in the caller's transaction; it goes out once the caller commits.
+
+        ``priority`` defaults to the kind's class in KIND_PRIORITIES, and
+        ``send_at`` (naive means UTC) holds the email back until then.
+        """
+        email = EmailOutbox(
+            kind=kind,
+            recipient=recipient,
+            context=context,
+            priority=KIND_PRIORITIES.get(kind, PRIORITY_NORMAL) if priority is None else priority,
+            status=EmailStatus.PENDING,
+            next_attempt_at=_send_time(send_at)
+        )
+        db.add(email)
+        return email
+
+    @staticmethod
+    def enqueue_many(db: Session, kind: str, emails: List[Tuple[str, dict]], campaign_id: Optional[str] = None,
+                     priority: Optional[int] = None, send_at: Optional[datetime] = None) -> int:
+        """Queue (recipient, context) pairs with one executemany INSERT; the caller commits."""
+        if not emails:
+            return 0
+        next_attempt_at = _send_time(send_at)
+        priority = KIND_PRIORITIES.get(kind, PRIORITY_NORMAL) if priority is None else priority
+        db.execute(insert(EmailOutbox), [
+            {
+                "kind": kind,
+                "recipient": recipient,
+                "context": context,
+                "priority": priority,
+                "status": EmailStatus.PENDING,
+                "attempts": 0,
+                "next_attempt_at": next_attempt_at,
+                "campaign_id": campaign_id
+            }
+            for recipient, context in emails
+        ])
+        return len(emails)
+
+    @staticmethod
+    def campaign_progress(db: Session, campaign_id: str) -> dict:
+        counts = dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).filter(
+            EmailOutbox.campaign_id == campaign_id
+        ).group_by(EmailOutbox.status).all())
+        return {status.value: counts.get(status, 0) for status in EmailStatus}
+
+    @staticmethod
+    def claim_batch(db: Session, limit: int) -> List[EmailOutbox]:
+        """Lease up to ``limit`` due emails to this worker, highest priority first, and commit the claim.
+
+        On PostgreSQL, FOR UPDATE SKIP LOCKED lets several workers claim
+        disjoint batches without waiting on each other. Emails left Sending
+        by a worker that died are due again once their lease runs out.
+        """
+        now = datetime.now(timezone.utc)
+        due = or_(
+            and_(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == EmailStatus.SENDING, EmailOutbox.locked_until < now)
+        )
+        emails = db.query(EmailOutbox).filter(due).order_by(
+            EmailOutbox.priority, EmailOutbox.next_attempt_at, EmailOutbox.id
+        ).limit(limit).with_for_update(skip_locked=True).all()
+        lease = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+        for email in emails:
+            email.status = EmailStatus.SENDING
+            email.locked_until = lease
+        db.commit()
+        return emails
+
+    @staticmethod
+    def extend_lease(db: Session, email_ids: List[int]) -> int:
+        """Push the lease of emails this worker is still sending EMAIL_OUTBOX_LEASE_SECONDS ahead, and commit.
+
+        Returns how many were still leased; the others were already recorded.
+        """
+        if not email_ids:
+            return 0
+        lease = datetime.now(timezone.utc) + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+        extended = db.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(email_ids),
+            EmailOutbox.status == EmailStatus.SENDING
+        ).update({EmailOutbox.locked_until: lease}, synchronize_session=False)
+        db.commit()
+        return extended
+
+    @staticmethod
+    def mark_sent(db: Session, email: EmailOutbox):
+        email.status = EmailStatus.SENT
+        email.attempts += 1
+        email.sent_at = datetime.now(timezone.utc)
+        email.locked_until = None
+        email.last_error = None
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        delay = settings.EMAIL_OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1)
+        delay = min(settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS, delay)
+        # Jitter, so emails that failed together don't all retry in the same second
+        return delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def mark_failed(db: Session, email: EmailOutbox, error: str, permanent: bool = False):
+        """Schedule a retry with exponential backoff, or give up after EMAIL_OUTBOX_MAX_ATTEMPTS."""
+        email.attempts += 1
+        email.last_error = error[:2000]
+        email.locked_until = None
+        if permanent or email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = EmailStatus.FAILED
+        else:
+            email.status = EmailStatus.PENDING
+            email.next_attempt_at = datetime.now(timezone.utc) + timedelta(
+                seconds=EmailOutboxService.backoff_seconds(email.attempts)
+            )
+
+    @staticmethod
+    def stats(db: Session, window_seconds: int = 60) -> dict:
+        """Queue depth and the send rate of all workers together, for sizing campaigns."""
+        now = datetime.now(timezone.utc)
+        counts = dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+        due_by_priority = dict(db.query(EmailOutbox.priority, func.count(EmailOutbox.id)).filter(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now
+        ).group_by(EmailOutbox.priority).all())
+        scheduled, next_scheduled_at = db.query(func.count(EmailOutbox.id), func.min(EmailOutbox.next_attempt_at)).filter(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at > now
+        ).one()
+        sent_recently = db.query(func.count(EmailOutbox.id)).filter(
+            EmailOutbox.status == EmailStatus.SENT,
+            EmailOutbox.sent_at >= now - timedelta(seconds=window_seconds)
+        ).scalar()
+        oldest_pending: Optional[datetime] = db.query(func.min(EmailOutbox.created_at)).filter(
+            EmailOutbox.status.in_([EmailStatus.PENDING, EmailStatus.SENDING])
+        ).scalar()
+
+        due = sum(due_by_priority.values()) + counts.get(EmailStatus.SENDING, 0)
+        send_rate = sent_recently / window_seconds
+        return {
+            "by_status": {status.value: counts.get(status, 0) for status in EmailStatus},
+            "due_by_priority": {str(priority): count for priority, count in sorted(due_by_priority.items())},
+            "scheduled": scheduled,
+            "next_scheduled_at": next_scheduled_at.isoformat() if next_scheduled_at else None,
+            "oldest_unsent_created_at": oldest_pending.isoformat() if oldest_pending else None,
+            "send_rate_per_second": round(send_rate, 2),
+            "rate_limit_per_worker": settings.EMAIL_SEND_RATE_PER_SECOND,
+            # At the measured rate, or at one worker's limit when nothing was sent lately
+            "estimated_drain_seconds": round(due / (send_rate or settings.EMAIL_SEND_RATE_PER_SECOND))
+        }
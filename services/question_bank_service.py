@@ -0,0 +1,144 @@
+import gzip
+import io
+import json
+import zlib
+from sqlalchemy.orm import Session
+from typing import BinaryIO, Iterator, Optional
+from pydantic import ValidationError
+from models.question import Question
+from models.choice import Choice
+from models.assessment_question import AssessmentQuestion
+from schemas.question import QuestionTransfer
+from services.question_service import QuestionService
+
+BANK_FORMAT = "quiz-question-bank"
+BANK_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+
+class QuestionBankService:
+    """Streaming export/import of the question bank as gzip-compressed JSON lines.
+
+    The first line is a header ``{"format": "quiz-question-bank", "version": 1}``;
+    every following line is one QuestionTransfer record. Both directions work
+    in fixed-size batches, so memory stays flat regardless of bank size; an
+    import is still a single transaction, so it applies all or nothing.
+    """
+
+    @staticmethod
+    def iter_export_lines(db: Session, assessment_id: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the export as uncompressed JSON lines."""
+        header = {"format": BANK_FORMAT, "version": BANK_FORMAT_VERSION, "assessment_id": assessment_id}
+        yield (json.dumps(header) + "\n").encode("utf-8")
+
+        # Plain column tuples rather than ORM objects: building identity-mapped
+        # instances dominated export time for large banks.
+        query = db.query(Question.id, Question.question_text, Question.topic, Question.level, Question.marks)
+        if assessment_id is not None:
+            query = query.join(AssessmentQuestion).filter(AssessmentQuestion.assessment_id == assessment_id)
+
+        batch = []
+        for row in query.order_by(Question.id).yield_per(EXPORT_BATCH_SIZE):
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield from QuestionBankService._export_batch(db, batch)
+                batch = []
+        yield from QuestionBankService._export_batch(db, batch)
+
+    @staticmethod
+    def _export_batch(db: Session, batch: list) -> Iterator[bytes]:
+        if not batch:
+            return
+        choices = {}
+        choice_rows = db.query(Choice.question_id, Choice.choice_text, Choice.iss_correct).filter(
+            Choice.question_id.in_([row.id for row in batch]),
+            Choice.retired == False
+        ).order_by(Choice.id)
+        for question_id, choice_text, iss_correct in choice_rows:
+            choices.setdefault(question_id, []).append({"choice_text": choice_text, "iss_correct": iss_correct})
+
+        for row in batch:
+            record = {
+                "question_text": row.question_text,
+                "topic": row.topic,
+                "level": row.level,
+                "marks": row.marks,
+                "choices": choices.get(row.id, [])
+            }
+            yield (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def iter_export(db: Session, assessment_id: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the export as a gzip stream, one compressed chunk per batch of lines."""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        buffer = []
+        for line in QuestionBankService.iter_export_lines(db, assessment_id):
+            buffer.append(line)
+            if len(buffer) >= EXPORT_BATCH_SIZE:
+                chunk = compressor.compress(b"".join(buffer))
+                buffer = []
+                if chunk:
+                    yield chunk
+        yield compressor.compress(b"".join(buffer)) + compressor.flush()
+
+    @staticmethod
+    def import_bank(
+        db: Session,
+        fileobj: BinaryIO,
+        user_id: int,
+        assessment_id: Optional[int] = None,
+        batch_size: int = IMPORT_BATCH_SIZE
+    ) -> dict:
+        """Import a gzip JSONL export, flushing once per batch and committing once at the end.
+
+        Raises ValueError with the offending line number on malformed input;
+        nothing is committed then and the caller rolls back the flushed batches.
+        """
+        stream = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode="rb"), encoding="utf-8")
+        try:
+            return QuestionBankService._import_stream(db, stream, user_id, assessment_id, batch_size)
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt question bank file: {e}")
+
+    @staticmethod
+    def _import_stream(db: Session, stream, user_id: int, assessment_id: Optional[int], batch_size: int) -> dict:
+        header_line = stream.readline()
+        try:
+            header = json.loads(header_line)
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != BANK_FORMAT:
+            raise ValueError("Not a question bank export (missing header line)")
+        if header.get("version") != BANK_FORMAT_VERSION:
+            raise ValueError(f"Unsupported question bank version: {header.get('version')}")
+
+        topic_cache = {}
+        batch = []
+        imported = 0
+        for line_number, line in enumerate(stream, start=2):
+            if not line.strip():
+                continue
+            try:
+                record = QuestionTransfer(**json.loads(line))
+            except (json.JSONDecodeError, TypeError, ValidationError) as e:
+                raise ValueError(f"Line {line_number}: invalid question record: {e}")
+            if not any(choice.iss_correct for choice in record.choices):
+                raise ValueError(f"Line {line_number}: question must have at least one correct choice")
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                imported += QuestionBankService._flush(db, batch, user_id, assessment_id, topic_cache)
+                batch = []
+
+        imported += QuestionBankService._flush(db, batch, user_id, assessment_id, topic_cache)
+        db.commit()
+        return {"imported": imported}
+
+    @staticmethod
+    def _flush(db: Session, batch: list, user_id: int, assessment_id: Optional[int], topic_cache: dict) -> int:
+        if not batch:
+            return 0
+        QuestionService.bulk_insert_questions(db, batch, user_id, assessment_id, topic_cache)
+        db.flush()
+        return len(batch)
@@ -1,9 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy import and_, insert, update
+from typing import Dict, List, Optional
 from models.question import Question
 from models.choice import Choice
-from schemas.question import QuestionCreate, QuestionUpdate, QuestionBulkCreate
+from models.question_version import QuestionVersion
+from models.assessment_question import AssessmentQuestion
+from models.topic import Topic
+from services.topic_service import TopicService
+from services.question_version_service import QuestionVersionService
+from schemas.question import QuestionCreate, QuestionUpdate, QuestionBulkCreate, ChoiceCreate
+from schemas.ai import GeneratedQuestion
 from fastapi import HTTPException
 
 
@@ -19,11 +25,19 @@ class QuestionService:
         skip: int = 0, 
         limit: int = 100,
         topic: Optional[str] = None,
-        level: Optional[str] = None
+        level: Optional[str] = None,
+        include_subtopics: bool = False
     ) -> List[Question]:
         query = db.query(Question)
         
-        if topic:
+        if topic and include_subtopics:
+            path = TopicService.normalize_path(topic)
+            if path is None:
+                return []
+            query = query.join(Topic, Question.topic_id == Topic.id).filter(
+                TopicService.subtree_filter(path)
+            )
+        elif topic:
             query = query.filter(Question.topic == topic)
         if level:
             query = query.filter(Question.level == level)
@@ -34,9 +48,11 @@ class QuestionService:
     @staticmethod
     def create_question(db: Session, question: QuestionCreate, user_id: int) -> Question:
         # Create question
+        topic_node = TopicService.get_or_create_topic(db, question.topic)
         db_question = Question(
             question_text=question.question_text,
             topic=question.topic,
+            topic_id=topic_node.id if topic_node else None,
             level=question.level,
             created_by_user_id=user_id
         )
@@ -49,10 +65,11 @@ class QuestionService:
             db_choice = Choice(
                 question_id=db_question.id,
                 choice_text=choice_data.choice_text,
-                is_correct=choice_data.is_correct
+                iss_correct=choice_data.iss_correct
             )
             db.add(db_choice)
         
+        QuestionVersionService.snapshot(db, db_question)
         db.commit()
         db.refresh(db_question)
         return db_question
@@ -68,6 +85,100 @@ class QuestionService:
         
         return created_questions
     
+    @staticmethod
+    def bulk_insert_questions(
+        db: Session,
+        questions: List[QuestionCreate],
+        user_id: int,
+        assessment_id: Optional[int] = None,
+        topic_cache: Optional[Dict] = None
+    ) -> List[int]:
+        """Insert questions, choices and their first versions with one executemany per table.
+
+        Unlike ``create_question`` this neither commits nor refreshes, so callers
+        can insert thousands of rows per transaction. Returns the new question ids.
+        """
+        if not questions:
+            return []
+        if topic_cache is None:
+            topic_cache = {}
+
+        question_rows = []
+        for question in questions:
+            topic_node = TopicService.get_or_create_topic(db, question.topic, topic_cache)
+            question_rows.append({
+                "question_text": question.question_text,
+                "topic": question.topic,
+                "topic_id": topic_node.id if topic_node else None,
+                "level": question.level,
+                "marks": getattr(question, "marks", None) or 1,
+                "created_by_user_id": user_id
+            })
+        question_ids = list(db.scalars(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            question_rows
+        ))
+
+        choice_rows = [
+            {"question_id": question_id, "choice_text": choice.choice_text, "iss_correct": choice.iss_correct}
+            for question_id, question in zip(question_ids, questions)
+            for choice in question.choices
+        ]
+        choice_ids = iter(db.scalars(
+            insert(Choice).returning(Choice.id, sort_by_parameter_order=True),
+            choice_rows
+        ).all())
+
+        version_rows = []
+        for question_id, question, row in zip(question_ids, questions, question_rows):
+            content = QuestionVersionService.content_from_fields(
+                row["question_text"], row["topic"], row["level"], row["marks"],
+                [(next(choice_ids), choice.choice_text, choice.iss_correct) for choice in question.choices]
+            )
+            content_hash, blob = QuestionVersionService.encode(content)
+            version_rows.append({
+                "question_id": question_id,
+                "version": 1,
+                "content_hash": content_hash,
+                "content": blob
+            })
+        version_ids = list(db.scalars(
+            insert(QuestionVersion).returning(QuestionVersion.id, sort_by_parameter_order=True),
+            version_rows
+        ))
+        db.execute(update(Question), [
+            {"id": question_id, "current_version_id": version_id}
+            for question_id, version_id in zip(question_ids, version_ids)
+        ])
+
+        if assessment_id is not None:
+            db.execute(insert(AssessmentQuestion), [
+                {"assessment_id": assessment_id, "question_id": question_id, "question_version_id": version_id, "marks": row["marks"]}
+                for question_id, version_id, row in zip(question_ids, version_ids, question_rows)
+            ])
+
+        return question_ids
+    
+    @staticmethod
+    def save_generated_questions(db: Session, generated: List[GeneratedQuestion], user_id: int, commit: bool = True) -> List[int]:
+        """Persist AI-generated questions in one transaction and return their ids."""
+        questions = [
+            QuestionCreate(
+                question_text=question.question_text,
+                topic=question.topic,
+                level=question.level,
+                choices=[
+                    ChoiceCreate(choice_text=choice.choice_text, iss_correct=choice.is_correct)
+                    for choice in question.choices
+                ]
+            )
+            for question in generated
+        ]
+        question_ids = QuestionService.bulk_insert_questions(db, questions, user_id)
+        if commit:
+            db.commit()
+        return question_ids
+    
     @staticmethod
     def update_question(db: Session, question_id: int, question_update: QuestionUpdate) -> Optional[Question]:
         db_question = QuestionService.get_question_by_id(db, question_id)
@@ -77,7 +188,11 @@ class QuestionService:
         update_data = question_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_question, field, value)
+        if "topic" in update_data:
+            topic_node = TopicService.get_or_create_topic(db, update_data["topic"])
+            db_question.topic_id = topic_node.id if topic_node else None
         
+        QuestionVersionService.snapshot(db, db_question)
         db.commit()
         db.refresh(db_question)
         return db_question
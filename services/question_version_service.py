@@ -0,0 +1,111 @@
+import hashlib
+import json
+import zlib
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, Iterable, List, Optional
+from models.question import Question
+from models.choice import Choice
+from models.question_version import QuestionVersion
+
+
+class QuestionVersionService:
+    """Copy-on-write snapshots of questions.
+
+    Content is a compact dict with short keys::
+
+        {"q": text, "t": topic, "l": level, "m": marks,
+         "c": [[choice_id, choice_text, is_correct], ...]}
+
+    Call ``snapshot`` after any change to a question or its choices; it only
+    writes a row when the content hash actually changed.
+    """
+
+    @staticmethod
+    def build_content(db: Session, question: Question) -> dict:
+        # Query choices directly so a stale ``question.choices`` collection is never snapshotted.
+        choices = db.query(Choice).filter(
+            Choice.question_id == question.id,
+            Choice.retired == False
+        ).order_by(Choice.id).all()
+        return QuestionVersionService.content_from_fields(
+            question.question_text,
+            question.topic,
+            question.level,
+            question.marks,
+            [(choice.id, choice.choice_text, choice.iss_correct) for choice in choices]
+        )
+
+    @staticmethod
+    def content_from_fields(question_text: str, topic: Optional[str], level: Optional[str],
+                            marks: Optional[int], choices: Iterable[tuple]) -> dict:
+        return {
+            "q": question_text,
+            "t": topic,
+            "l": level,
+            "m": marks if marks is not None else 1,
+            "c": [[choice_id, text, bool(correct)] for choice_id, text, correct in choices]
+        }
+
+    @staticmethod
+    def encode(content: dict) -> tuple:
+        """Return ``(content_hash, compressed_bytes)`` for a content dict."""
+        canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(canonical).hexdigest(), zlib.compress(canonical, 9)
+
+    @staticmethod
+    def decode(version: QuestionVersion) -> dict:
+        return json.loads(zlib.decompress(version.content))
+
+    @staticmethod
+    def snapshot(db: Session, question: Question) -> QuestionVersion:
+        """Record the question's current content, reusing an identical earlier version.
+
+        The new version is flushed but not committed, so it lands in the same
+        transaction as the edit that caused it.
+        """
+        db.flush()
+        content_hash, blob = QuestionVersionService.encode(QuestionVersionService.build_content(db, question))
+
+        version = db.query(QuestionVersion).filter(
+            QuestionVersion.question_id == question.id,
+            QuestionVersion.content_hash == content_hash
+        ).first()
+
+        if version is None:
+            latest = db.query(func.max(QuestionVersion.version)).filter(
+                QuestionVersion.question_id == question.id
+            ).scalar()
+            version = QuestionVersion(
+                question_id=question.id,
+                version=(latest or 0) + 1,
+                content_hash=content_hash,
+                content=blob
+            )
+            db.add(version)
+            db.flush()
+
+        question.current_version_id = version.id
+        return version
+
+    @staticmethod
+    def current_version_ids(db: Session, question_ids: List[int]) -> Dict[int, int]:
+        """Map question id -> current version id, snapshotting questions that have none yet."""
+        if not question_ids:
+            return {}
+        questions = db.query(Question).filter(Question.id.in_(question_ids)).all()
+        result = {}
+        for question in questions:
+            if question.current_version_id is None:
+                QuestionVersionService.snapshot(db, question)
+            result[question.id] = question.current_version_id
+        return result
+
+    @staticmethod
+    def get_versions_by_ids(db: Session, version_ids: Iterable[int]) -> Dict[int, dict]:
+        """Map version id -> decoded content with a single primary-key lookup."""
+        ids = {version_id for version_id in version_ids if version_id is not None}
+        if not ids:
+            return {}
+        versions = db.query(QuestionVersion).filter(QuestionVersion.id.in_(ids)).all()
+        return {version.id: QuestionVersionService.decode(version) for version in versions}
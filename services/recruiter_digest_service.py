@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.connection import dialect_insert
+from models.user import User
+from models.recruiter_digest import RecruiterDigest
+from services.email_outbox_service import EmailOutboxService
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def digest_window(at: datetime) -> Tuple[datetime, datetime]:
+    """The RECRUITER_DIGEST_WINDOW_MINUTES window containing ``at``, aligned to the epoch."""
+    length = timedelta(minutes=max(1, settings.RECRUITER_DIGEST_WINDOW_MINUTES))
+    start = _EPOCH + (at - _EPOCH) // length * length
+    return start, start + length
+
+
+class RecruiterDigestService:
+    @staticmethod
+    def record_completion(db: Session, recruiter_id: int, candidate: str, assessment: str,
+                          score: int, total_marks: int, percentage: float):
+        """Add one completed attempt to its recruiter's current digest; the caller commits.
+
+        The window's row is created with INSERT ... ON CONFLICT DO NOTHING and
+        then locked, so concurrent submissions for one recruiter add up
+        instead of racing. If flush_due already sent that window (the
+        submit waited on its lock), the completion goes into the next one.
+        Only the running counts and the best RECRUITER_DIGEST_TOP_SCORES
+        attempts are kept, so the digest never reads the attempts back.
+        """
+        window_start, window_end = digest_window(datetime.now(timezone.utc))
+        while True:
+            db.execute(dialect_insert(db)(RecruiterDigest).values(
+                recruiter_id=recruiter_id,
+                window_start=window_start,
+                window_end=window_end,
+                completions=0,
+                percentage_sum=0.0,
+                top_scores=[],
+                by_assessment={}
+            ).on_conflict_do_nothing())
+            digest = db.query(RecruiterDigest).filter(
+                RecruiterDigest.recruiter_id == recruiter_id,
+                RecruiterDigest.window_start == window_start,
+                RecruiterDigest.flushed_at.is_(None)
+            ).with_for_update().first()
+            if digest is not None:
+                break
+            window_start, window_end = digest_window(window_end)
+
+        digest.completions += 1
+        digest.percentage_sum += percentage
+        # JSON columns only notice reassignment, so build new values rather than mutating
+        by_assessment = dict(digest.by_assessment)
+        by_assessment[assessment] = by_assessment.get(assessment, 0) + 1
+        digest.by_assessment = by_assessment
+        entry = {
+            "candidate": candidate,
+            "assessment": assessment,
+            "score": score,
+            "total_marks": total_marks,
+            "percentage": round(percentage, 1)
+        }
+        top_scores = sorted(digest.top_scores + [entry], key=lambda e: -e["percentage"])
+        digest.top_scores = top_scores[:settings.RECRUITER_DIGEST_TOP_SCORES]
+
+    @staticmethod
+    def digest_context(digest: RecruiterDigest, recruiter: User) -> dict:
+        return {
+            "recruiter_name": recruiter.name,
+            "window_start": digest.window_start.strftime(_TIME_FORMAT),
+            "window_end": digest.window_end.strftime(_TIME_FORMAT),
+            "completions": digest.completions,
+            "average_percentage": round(digest.percentage_sum / digest.completions, 1),
+            "by_assessment": dict(sorted(digest.by_assessment.items(), key=lambda item: -item[1])),
+            "top_scores": digest.top_scores
+        }
+
+    @staticmethod
+    def flush_due(db: Session, limit: int = 500) -> int:
+        """Queue one digest email per closed window and mark it flushed, then commit.
+
+        FOR UPDATE SKIP LOCKED, like the outbox claim, so several workers
+        flush disjoint digests. Returns how many were queued.
+        """
+        rows: List[Tuple[RecruiterDigest, User]] = db.query(RecruiterDigest, User).join(
+            User, User.id == RecruiterDigest.recruiter_id
+        ).filter(
+            RecruiterDigest.flushed_at.is_(None),
+            RecruiterDigest.window_end <= datetime.now(timezone.utc)
+        ).order_by(RecruiterDigest.window_end).limit(limit).with_for_update(skip_locked=True, of=RecruiterDigest).all()
+        if not rows:
+            return 0
+        now = datetime.now(timezone.utc)
+        for digest, recruiter in rows:
+            if digest.completions:
+                EmailOutboxService.enqueue(
+                    db, "recruiter_digest", recruiter.email, RecruiterDigestService.digest_context(digest, recruiter)
+                )
+            digest.flushed_at = now
+        db.commit()
+        return len(rows)
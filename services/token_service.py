@@ -0,0 +1,97 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.auth_token import RefreshToken
+from auth.revocation import revocation_list
+
+
+class RefreshTokenInvalid(Exception):
+    """Raised for a refresh token that is unknown, expired, revoked or already used."""
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class TokenService:
+    @staticmethod
+    def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+        """Create a refresh token; a new family unless continuing one. The caller commits."""
+        token = secrets.token_urlsafe(32)
+        db.add(RefreshToken(
+            token_hash=_hash_token(token),
+            family_id=family_id or uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        return token
+
+    @staticmethod
+    def rotate_refresh_token(db: Session, token: str) -> Tuple[int, str]:
+        """Spend a refresh token and return ``(user_id, replacement)``. The caller commits.
+
+        A token can be spent once. Presenting a spent token again means
+        someone else holds a copy, so its whole family is revoked and the
+        user has to log in again.
+        """
+        row = db.query(RefreshToken).filter(RefreshToken.token_hash == _hash_token(token)).first()
+        if row is None or row.revoked_at is not None:
+            raise RefreshTokenInvalid("Invalid refresh token")
+        now = datetime.now(timezone.utc)
+        if _as_utc(row.expires_at) <= now:
+            raise RefreshTokenInvalid("Refresh token expired")
+        # Conditional UPDATE, so two requests racing with the same token can't both succeed
+        spent = db.query(RefreshToken).filter(
+            RefreshToken.id == row.id,
+            RefreshToken.used_at.is_(None)
+        ).update({"used_at": now}, synchronize_session=False)
+        if not spent:
+            TokenService.revoke_refresh_family(db, row.family_id)
+            db.commit()
+            raise RefreshTokenInvalid("Refresh token already used; please log in again")
+        return row.user_id, TokenService.issue_refresh_token(db, row.user_id, row.family_id)
+
+    @staticmethod
+    def revoke_refresh_family(db: Session, family_id: str):
+        db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({"revoked_at": datetime.now(timezone.utc)}, synchronize_session=False)
+
+    @staticmethod
+    def revoke_refresh_token(db: Session, token: str, user_id: int) -> bool:
+        """Revoke the family of one of the user's refresh tokens (logout). The caller commits."""
+        row = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == _hash_token(token),
+            RefreshToken.user_id == user_id
+        ).first()
+        if row is None:
+            return False
+        TokenService.revoke_refresh_family(db, row.family_id)
+        return True
+
+    @staticmethod
+    def revoke_user_refresh_tokens(db: Session, user_id: int):
+        """Sign the user out everywhere once their access tokens run out. The caller commits."""
+        db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({"revoked_at": datetime.now(timezone.utc)}, synchronize_session=False)
+
+    @staticmethod
+    def revoke_access_token(db: Session, payload: dict):
+        """Revoke an access token by its jti until its exp. The caller commits."""
+        jti = payload.get("jti")
+        if jti is None:
+            return
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+        revocation_list.revoke(db, jti, expires_at, payload.get("user_id"))
@@ -0,0 +1,107 @@
+import re
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from typing import Dict, List, Optional
+from models.topic import Topic
+
+# "Python > Async > asyncio" and "python/async/asyncio" describe the same node.
+TOPIC_SEPARATORS = re.compile(r"\s*(?:>|/)\s*")
+PATH_SEPARATOR = "/"
+# Characters kept verbatim in a slug; everything else except whitespace is
+# percent-encoded, so "C", "C++" and "C#" stay distinct nodes.
+SLUG_SAFE = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+
+class TopicService:
+    @staticmethod
+    def split_topic(topic: str) -> List[str]:
+        """Split a free-text topic into its display segments."""
+        return [part.strip() for part in TOPIC_SEPARATORS.split(topic or "") if part.strip()]
+
+    @staticmethod
+    def slugify(segment: str) -> str:
+        """Case-fold a segment and encode it reversibly: whitespace runs become "-",
+        other characters outside [a-z0-9] (including "-" itself) become UTF-8 %XX."""
+        slug = []
+        for char in re.sub(r"\s+", " ", segment.strip().casefold()):
+            if char in SLUG_SAFE:
+                slug.append(char)
+            elif char == " ":
+                slug.append("-")
+            else:
+                slug.extend(f"%{byte:02x}" for byte in char.encode("utf-8"))
+        return "".join(slug)
+
+    @staticmethod
+    def tree_key(path: str) -> List[str]:
+        """Sort key giving depth-first order; plain string order puts "a-b" and "a%2b" before "a/x"."""
+        return path.split(PATH_SEPARATOR)
+
+    @staticmethod
+    def normalize_path(topic: str) -> Optional[str]:
+        """Turn a free-text topic into a materialized path, e.g. 'python/async/asyncio'."""
+        segments = TopicService.split_topic(topic)
+        if not segments:
+            return None
+        return PATH_SEPARATOR.join(TopicService.slugify(segment) for segment in segments)
+
+    @staticmethod
+    def get_topic_by_path(db: Session, path: str) -> Optional[Topic]:
+        return db.query(Topic).filter(Topic.path == path).first()
+
+    @staticmethod
+    def get_or_create_topic(db: Session, topic: str, cache: Optional[Dict[str, Topic]] = None) -> Optional[Topic]:
+        """Resolve a free-text topic to its taxonomy node, creating missing ancestors.
+
+        New nodes are flushed but not committed, so they join the caller's transaction.
+        Pass a dict as ``cache`` when resolving many topics in one session.
+        """
+        segments = TopicService.split_topic(topic)
+        if not segments:
+            return None
+
+        parent = None
+        path = ""
+        for depth, segment in enumerate(segments):
+            path = f"{path}{PATH_SEPARATOR}{TopicService.slugify(segment)}" if path else TopicService.slugify(segment)
+            node = cache.get(path) if cache is not None else None
+            if node is None:
+                node = TopicService.get_topic_by_path(db, path)
+            if node is None:
+                node = Topic(
+                    name=segment,
+                    path=path,
+                    depth=depth,
+                    parent_id=parent.id if parent else None
+                )
+                # A savepoint, so losing the race on the unique path to a concurrent
+                # request only rolls back this insert and we pick up the winner's row.
+                try:
+                    with db.begin_nested():
+                        db.add(node)
+                except IntegrityError:
+                    node = TopicService.get_topic_by_path(db, path)
+                    if node is None:
+                        raise
+            if cache is not None:
+                cache[path] = node
+            parent = node
+        return parent
+
+    @staticmethod
+    def subtree_filter(path: str):
+        """Filter matching a node and all of its descendants (one indexed range scan, no recursion)."""
+        # Slugs contain "%", so the prefix has to be escaped for LIKE.
+        return or_(Topic.path == path, Topic.path.startswith(f"{path}{PATH_SEPARATOR}", autoescape=True))
+
+    @staticmethod
+    def get_topics(db: Session, under: Optional[str] = None) -> List[Topic]:
+        """List topics in depth-first tree order (sorted segment by segment, not by raw path)."""
+        query = db.query(Topic)
+        if under:
+            path = TopicService.normalize_path(under)
+            if path is None:
+                return []
+            query = query.filter(TopicService.subtree_filter(path))
+        return sorted(query.all(), key=lambda node: TopicService.tree_key(node.path))
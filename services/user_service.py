@@ -3,7 +3,8 @@ from sqlalchemy import and_
 from typing import List, Optional
 from models.user import User
 from schemas.user import UserCreate, UserUpdate
-from auth.jwt import get_password_hash
+from auth.jwt import get_password_hash, invalidate_user
+from services.token_service import TokenService
 
 
 class UserService:
@@ -41,12 +42,14 @@ class UserService:
             update_data=user_update.dict(exclude_unset=True)
             if "password" in update_data:
                  update_data["password_hash"]=get_password_hash(update_data.pop("password"))
+                 TokenService.revoke_user_refresh_tokens(db,user_id)
             
             for field,value in update_data.items():
                  setattr(db_user,field,value)
             
             db.commit()
             db.refresh(db_user)
+            invalidate_user(user_id)
             return db_user
     
     @staticmethod
@@ -54,8 +57,9 @@ class UserService:
          db_user=UserService.get_user_by_id(db,user_id)
          if not db_user:
               return False
-         db.delete()
+         db.delete(db_user)
          db.commit()
+         invalidate_user(user_id)
          return True
     
     @staticmethod
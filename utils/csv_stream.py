@@ -0,0 +1,34 @@
+import codecs
+import csv
+from typing import List
+
+
+class CSVStreamParser:
+    """Incrementally parse CSV that arrives as chunks of bytes.
+
+    ``feed`` accepts the next chunk and returns every row completed by it;
+    ``close`` returns the last row if the input didn't end with a newline.
+    Input is UTF-8 (a leading BOM, as Excel writes, is dropped) and a chunk
+    may end in the middle of a character or a line. Quoted fields must not
+    contain line breaks, which is fine for lists of addresses or names.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+
+    def feed(self, chunk: bytes) -> List[List[str]]:
+        text = self._partial + self._decoder.decode(chunk)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        return self._parse(lines)
+
+    def close(self) -> List[List[str]]:
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        return self._parse([text])
+
+    @staticmethod
+    def _parse(lines: List[str]) -> List[List[str]]:
+        lines = [line.rstrip("\r") for line in lines]
+        return [row for row in csv.reader(lines) if any(cell.strip() for cell in row)]
@@ -1,87 +1,57 @@
 # In file: utils/email.py
 
-import os
-from dotenv import load_dotenv
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from email.message import Message
+from email.utils import formataddr
+from typing import Callable, Dict, List, Tuple, Union
 from pydantic import EmailStr
+from config.settings import settings
 from models.user import User # Import your SQLAlchemy User model
+from utils.email_templates import get_email_templates
 
-load_dotenv()
+# Messages are rendered from the templates in EMAIL_TEMPLATES_DIR
+# (utils/email_templates.py). Routes don't send directly: they queue an
+# email_outbox row with a kind and its context (services/email_outbox_service.py),
+# and email_worker.py renders it with render_emails() and sends it over pooled
+# SMTP connections (utils/smtp_pool.py).
 
-# --- Connection Configuration ---
-# This is shared by all email functions in this file.
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False
-)
 
 # --- FUNCTION 1: For Welcoming New Users ---
-async def send_welcome_email(email: EmailStr, username: str):
-    """
-    Sends a standard welcome email to any newly registered user.
-    """
-    html_content = f"""
-    <html>
-        <body>
-            <h2>Welcome, {username}!</h2>
-            <p>Thank you for registering for our amazing quiz app.</p>
-            <p>You can now log in and get started. Good luck!</p>
-        </body>
-    </html>
-    """
-
-    message = MessageSchema(
-        subject="Welcome to the FastAPI Quiz App! 🎉",
-        recipients=[email],
-        body=html_content,
-        subtype="html"
-    )
-
-    fm = FastMail(conf)
-    await fm.send_message(message)
+def build_welcome_email(email: EmailStr, username: str) -> Message:
+    return render_email("welcome", email, {"username": username})
 
 # --- FUNCTION 2: For Recruiter Invitations ---
-async def send_invite_email(recipient_email: str, recruiter: User, invitation_link: str):
-    """
-    Sends a personalized quiz invite with a unique link.
-    """
-
-    # UPDATED: The HTML content now includes the invitation_link
-    html_content = f"""
-    <html>
-        <body>
-            <h3>Hi there,</h3>
-            <p>
-                {recruiter.name} has invited you to take a quiz on our platform.
-            </p>
-            <p>
-                Please click the link below to begin:
-                <br>
-                <a href="{invitation_link}">{invitation_link}</a>
-            </p>
-            <p>Good luck!</p>
-        </body>
-    </html>
-    """
-    
-    message = MessageSchema(
-        subject=f"Quiz Invitation from {recruiter.name}",
-        recipients=[recipient_email],
-        body=html_content,
-        subtype="html",
-        headers={"Reply-To": recruiter.email},
-        sender=(f"{recruiter.name} (via QuizApp)", conf.MAIL_FROM)
-    )
-
-    fm = FastMail(conf)
-    try:
-        await fm.send_message(message)
-        print(f"--- Email successfully sent to {recipient_email} ---")
-    except Exception as e:
-        print(f"!!! FAILED TO SEND EMAIL TO {recipient_email} !!!")
-        print(f"ERROR: {e}")
\ No newline at end of file
+def invite_context(recruiter: User, invitation_link: str) -> dict:
+    """What an invite email needs, as plain data for the outbox."""
+    return {"recruiter_name": recruiter.name, "recruiter_email": recruiter.email, "invitation_link": invitation_link}
+
+def _invite_headers(message: Message, context: dict):
+    # Sent by us on the recruiter's behalf; replies go to the recruiter
+    message.replace_header("From", formataddr((f"{context['recruiter_name']} (via QuizApp)", settings.MAIL_FROM),
+                                              charset="utf-8"))
+    message["Reply-To"] = context["recruiter_email"]
+
+
+# --- Outbox rendering: kind -> template, plus any headers the kind sets from its context ---
+EMAIL_HEADERS: Dict[str, Callable[[Message, dict], None]] = {
+    "invite": _invite_headers,
+}
+
+def render_emails(kind: str, recipients: List[Tuple[str, dict]]) -> List[Union[Message, Exception]]:
+    """Render one kind for many (recipient, context) pairs; a failed one is its exception."""
+    results = get_email_templates().render_many(kind, recipients)
+    add_headers = EMAIL_HEADERS.get(kind)
+    if add_headers is not None:
+        for index, (result, (_, context)) in enumerate(zip(results, recipients)):
+            if isinstance(result, Exception):
+                continue
+            try:
+                add_headers(result, context)
+            except Exception as e:
+                results[index] = e
+    return results
+
+def render_email(kind: str, recipient: str, context: dict) -> Message:
+    result = render_emails(kind, [(recipient, context)])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
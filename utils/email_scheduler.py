@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import deque
+from email.message import Message
+from email.utils import parseaddr
+from typing import Dict, List, Optional
+
+import aiosmtplib
+
+from config.settings import settings
+from utils.rate_limit import TokenBucket
+from utils.smtp_pool import SMTPPool
+
+# Provider replies that mean "slow down" rather than "this message is bad"
+THROTTLE_MARKERS = ("rate", "too many", "throttl", "try again later", "exceeded")
+
+
+def is_throttled(error: Exception) -> bool:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return any(is_throttled(recipient) for recipient in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        message = error.message.lower()
+        return error.code == 421 or (400 <= error.code < 500 and any(marker in message for marker in THROTTLE_MARKERS))
+    return False
+
+
+def recipient_domain(message: Message) -> str:
+    return parseaddr(message["To"] or "")[1].rpartition("@")[2].lower()
+
+
+class EmailScheduler:
+    """Shapes outbound email for one SMTP provider.
+
+    Every message takes a token from the provider's ``TokenBucket``
+    (``rate`` messages per second, bursts of ``burst``), and at most
+    ``per_domain`` messages to the same recipient domain are in flight at
+    once, so one big customer domain can't take every connection. When the
+    provider answers with a throttling reply, the bucket is paused for
+    ``throttle_pause`` seconds and every sender backs off together.
+    Messages get domain slots, and then tokens, in the order ``send_many``
+    receives them, so callers pass them highest priority first.
+    """
+
+    def __init__(self, pool: SMTPPool, rate: float, burst: int, per_domain: int, throttle_pause: float):
+        self.pool = pool
+        self.bucket = TokenBucket(rate, burst)
+        self.rate = rate
+        self.per_domain = max(1, per_domain)
+        self.throttle_pause = throttle_pause
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._sent_at = deque()  # monotonic times of recent sends, for the current rate
+        self.throttled = 0
+
+    def _domain_slots(self, domain: str) -> asyncio.Semaphore:
+        slots = self._domains.get(domain)
+        if slots is None:
+            slots = self._domains[domain] = asyncio.Semaphore(self.per_domain)
+        return slots
+
+    async def send(self, message: Message):
+        domain = recipient_domain(message)
+        slots = self._domain_slots(domain)
+        self._in_flight[domain] = self._in_flight.get(domain, 0) + 1
+        try:
+            # Wait for the domain slot before the token, so a token is only spent
+            # right before sending; a token taken while waiting on a busy domain
+            # would still be honoured after a throttling reply paused the bucket.
+            async with slots:
+                await self.bucket.acquire()
+                try:
+                    await self.pool.send(message)
+                except Exception as e:
+                    if is_throttled(e):
+                        self.throttled += 1
+                        self.bucket.pause(self.throttle_pause)
+                    raise
+            self._sent_at.append(time.monotonic())
+        finally:
+            self._in_flight[domain] -= 1
+            if not self._in_flight[domain]:
+                # Forget idle domains so a campaign over many domains doesn't grow these forever
+                del self._in_flight[domain]
+                self._domains.pop(domain, None)
+
+    async def send_many(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send messages under the rate and domain limits; returns each one's error or None."""
+        results = await asyncio.gather(*(self.send(message) for message in messages), return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    def current_rate(self, window: float = 60.0) -> float:
+        """Messages per second sent over the last ``window`` seconds."""
+        cutoff = time.monotonic() - window
+        while self._sent_at and self._sent_at[0] < cutoff:
+            self._sent_at.popleft()
+        return round(len(self._sent_at) / window, 2)
+
+    def stats(self) -> dict:
+        return {
+            "rate_limit_per_second": self.rate,
+            "current_rate_per_second": self.current_rate(),
+            "tokens_available": round(self.bucket.available, 2),
+            "per_domain_concurrency": self.per_domain,
+            "busiest_domains": dict(sorted(self._in_flight.items(), key=lambda item: -item[1])[:10]),
+            "throttled": self.throttled,
+            "smtp": self.pool.stats()
+        }
+
+
+def create_email_scheduler(pool: SMTPPool) -> EmailScheduler:
+    return EmailScheduler(
+        pool,
+        rate=settings.EMAIL_SEND_RATE_PER_SECOND,
+        burst=settings.EMAIL_SEND_BURST,
+        per_domain=settings.EMAIL_MAX_CONCURRENT_PER_DOMAIN,
+        throttle_pause=settings.EMAIL_THROTTLE_PAUSE_SECONDS
+    )
@@ -0,0 +1,87 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayStreamParser:
+    """Incrementally parse a top-level JSON array that arrives in pieces.
+
+    ``feed`` accepts the next piece of text and returns every array element
+    that became complete with it, so callers can act on the first element
+    long before the closing ``]`` arrives. Anything before the opening ``[``
+    (such as a Markdown code fence) is ignored, as is anything after the
+    closing ``]``.
+
+    Elements that fail to parse are skipped and counted in ``malformed``.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element_start = None
+        self.malformed = 0
+
+    @property
+    def started(self) -> bool:
+        """True once the opening ``[`` has been seen."""
+        return self._started
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, text: str) -> List[Any]:
+        if self._finished or not text:
+            return []
+        self._buffer += text
+        elements = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 0:
+                    self._element_start = i
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # the closing bracket of the top-level array
+                    self._finished = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[self._element_start:i + 1], elements)
+                    self._element_start = None
+            i += 1
+
+        # Drop consumed text so long streams don't rescan or hold the whole response.
+        keep_from = self._element_start if self._element_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+        return elements
+
+    def _emit(self, raw: str, elements: List[Any]):
+        try:
+            elements.append(json.loads(raw))
+        except json.JSONDecodeError:
+            self.malformed += 1
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts of up to ``capacity``.
+
+    ``acquire`` waits until enough tokens have accumulated. ``pause`` stops
+    granting tokens for a while, e.g. after the provider answered 429, so
+    every caller sharing the bucket backs off together.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 1e-9)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0):
+        # More than a full bucket can never accumulate; take the whole bucket instead.
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:  # FIFO: one waiter at a time refills toward its amount
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Grant nothing for ``seconds`` and drop the tokens saved up meanwhile."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
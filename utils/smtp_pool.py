@@ -0,0 +1,171 @@
+import asyncio
+import time
+from email.message import Message
+from typing import List, Optional
+
+import aiosmtplib
+
+from config.settings import settings
+
+# Errors after which a connection is dropped and the message retried on a fresh one.
+CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                     aiosmtplib.SMTPTimeoutError, OSError)
+# The server refused this one message; the connection is still good.
+MESSAGE_ERRORS = (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused)
+
+
+class _Connection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent = 0
+        self.idle_since = time.monotonic()
+
+
+class SMTPPool:
+    """Long-lived, authenticated SMTP connections shared by every email sent by this process.
+
+    Opening a connection costs a TCP handshake, STARTTLS and AUTH, several
+    round trips that dwarf sending one message. Connections are reused for
+    up to ``max_messages`` messages each, and at most ``size`` are open at
+    once. A connection that sat idle past ``idle_timeout`` is replaced,
+    because servers close idle sessions. When a send fails on a dropped
+    connection, it is retried once on a new one.
+    """
+
+    def __init__(self, hostname: str, port: int, username: Optional[str], password: Optional[str],
+                 start_tls: bool, use_tls: bool, size: int, max_messages: int,
+                 idle_timeout: float, timeout: float):
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.size = max(1, size)
+        self.max_messages = max(1, max_messages)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(self.size)
+        self._closed = False
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self.reconnects = 0
+        self.failures = 0
+
+    async def _open(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+            use_tls=self.use_tls,
+            timeout=self.timeout
+        )
+        await client.connect()  # also runs STARTTLS and AUTH
+        self.connections_opened += 1
+        return _Connection(client)
+
+    @staticmethod
+    async def _discard(connection: _Connection):
+        try:
+            await connection.client.quit()
+        except Exception:
+            connection.client.close()
+
+    async def _acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.client.is_connected and time.monotonic() - connection.idle_since < self.idle_timeout:
+                return connection
+            await self._discard(connection)
+        return await self._open()
+
+    async def _release(self, connection: _Connection):
+        if self._closed or connection.sent >= self.max_messages or not connection.client.is_connected:
+            await self._discard(connection)
+            return
+        connection.idle_since = time.monotonic()
+        self._idle.append(connection)
+
+    async def send(self, message: Message):
+        """Send one message over a pooled connection; raises if it could not be delivered."""
+        if self._closed:
+            raise RuntimeError("SMTP pool is closed")
+        async with self._slots:
+            connection = await self._acquire()
+            try:
+                try:
+                    await connection.client.send_message(message)
+                except CONNECTION_ERRORS:
+                    # Most likely the server dropped a reused connection; one fresh try
+                    connection.client.close()
+                    self.reconnects += 1
+                    connection = await self._open()
+                    await connection.client.send_message(message)
+            except MESSAGE_ERRORS:
+                self.failures += 1
+                await self._release(connection)
+                raise
+            except Exception:
+                self.failures += 1
+                connection.client.close()
+                raise
+            connection.sent += 1
+            self.messages_sent += 1
+            await self._release(connection)
+
+    async def send_many(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send messages over up to ``size`` connections at once; returns each one's error or None."""
+        results = await asyncio.gather(*(self.send(message) for message in messages), return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    async def close(self):
+        self._closed = True
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._discard(connection) for connection in idle), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle_connections": len(self._idle),
+            "connections_opened": self.connections_opened,
+            "messages_sent": self.messages_sent,
+            "messages_per_connection": round(self.messages_sent / self.connections_opened, 1)
+            if self.connections_opened else None,
+            "reconnects": self.reconnects,
+            "failures": self.failures
+        }
+
+
+def create_smtp_pool() -> SMTPPool:
+    return SMTPPool(
+        hostname=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+        username=settings.MAIL_USERNAME,
+        password=settings.MAIL_PASSWORD,
+        start_tls=settings.MAIL_STARTTLS,
+        use_tls=settings.MAIL_SSL_TLS,
+        size=settings.SMTP_POOL_SIZE,
+        max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+        idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS
+    )
+
+
+# --- Process-wide instance, closed by main.py's lifespan ---
+_smtp_pool: Optional[SMTPPool] = None
+
+def get_smtp_pool() -> SMTPPool:
+    """The shared pool; created on first use so scripts can send without the app's lifespan."""
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = create_smtp_pool()
+    return _smtp_pool
+
+async def close_smtp_pool():
+    global _smtp_pool
+    if _smtp_pool is not None:
+        await _smtp_pool.close()
+        _smtp_pool = None